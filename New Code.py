@@ -13,6 +13,9 @@ import requests  # Added for API calls
 import json  # Added for ecocide events
 import random
 from requests.exceptions import RequestException
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 import base64
 import random
 from streamlit.components.v1 import html as st_html  # Rename to avoid conflict
@@ -20,9 +23,20 @@ import math
 from datetime import timedelta
 from typing import Dict
 from functools import lru_cache
+from collections import OrderedDict
 import unicodedata # Added for Excel loading
 import re # Added for Excel loading
 import io
+import sqlite3  # Persistent prayer time cache
+import hashlib
+import copy
+import bisect
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Set page configuration
 st.set_page_config(
@@ -63,22 +77,54 @@ team_logos = {
 
 
 class MatchScenario:
-    def __init__(self, scenario_id, match_id, home_team, away_team, date, time, city, stadium, 
-                 suitability_score, attendance_percentage, profit, is_selected=False, is_available=True):
+    """
+    One candidate date/time/stadium for a match.
+    Slotted to keep per-scenario memory small; team, city and stadium names are interned,
+    the date is kept as a datetime.date and the kick-off as minutes since midnight so
+    sorting never has to re-parse strings. date/time remain available as strings.
+    """
+    __slots__ = (
+        'scenario_id', 'match_id', 'home_team', 'away_team', 'match_date', 'kickoff_minutes',
+        'city', 'stadium', 'suitability_score', 'attendance_percentage', 'profit',
+        'is_selected', 'is_available', 'conflict_reason'
+    )
+
+    def __init__(self, scenario_id, match_id, home_team, away_team, date, time, city, stadium,
+                 suitability_score, attendance_percentage, profit, is_selected=False, is_available=True,
+                 conflict_reason=''):
         self.scenario_id = scenario_id
         self.match_id = match_id
-        self.home_team = home_team
-        self.away_team = away_team
-        self.date = date
-        self.time = time
-        self.city = city
-        self.stadium = stadium
+        self.home_team = sys.intern(home_team)
+        self.away_team = sys.intern(away_team)
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        elif isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        self.match_date = date
+        self.kickoff_minutes = time_string_to_minutes(time) if isinstance(time, str) else int(time)
+        self.city = sys.intern(city)
+        self.stadium = sys.intern(stadium)
         self.suitability_score = suitability_score
         self.attendance_percentage = attendance_percentage
         self.profit = profit
         self.is_selected = is_selected
         self.is_available = is_available
-    
+        self.conflict_reason = conflict_reason  # Why the scenario is unavailable, '' when it is available
+
+    @property
+    def date(self):
+        """Match date as 'YYYY-MM-DD'"""
+        return self.match_date.isoformat()
+
+    @property
+    def time(self):
+        """Kick-off as 'HH:MM'"""
+        return minutes_to_time_string(self.kickoff_minutes)
+
+    @property
+    def date_ordinal(self):
+        return self.match_date.toordinal()
+
     def to_dict(self):
         return {
             'scenario_id': self.scenario_id,
@@ -96,51 +142,597 @@ class MatchScenario:
             'is_available': self.is_available
         }
 
+
+def _as_number(value):
+    """Return a stored float as int when it is integral, so UI output matches the original ints."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class ScenarioStore:
+    """
+    Column-oriented storage for every generated scenario of a session.
+    Teams, cities, stadiums and conflict reasons are kept as categorical codes and
+    dates/kick-off times as integers, so a full season is a handful of NumPy arrays
+    instead of thousands of Python objects, and converts to a DataFrame in one step.
+    """
+    COLUMN_DTYPES = {
+        'scenario_id': np.int64,
+        'match_id': np.int64,
+        'home_team': np.int32,
+        'away_team': np.int32,
+        'city': np.int32,
+        'stadium': np.int32,
+        'conflict_reason': np.int32,
+        'date_ordinal': np.int32,       # datetime.date.toordinal()
+        'kickoff_minutes': np.int16,    # minutes since midnight
+        'suitability_score': np.float64,
+        'attendance_percentage': np.float64,
+        'profit': np.float64,
+        'is_selected': np.bool_,
+        'is_available': np.bool_,
+        'mask_count': np.int16,         # number of selections currently hiding this scenario
+    }
+    # Categorical columns and the vocabulary they share (home and away use one team list)
+    CATEGORICAL_COLUMNS = {
+        'home_team': 'team',
+        'away_team': 'team',
+        'city': 'city',
+        'stadium': 'stadium',
+        'conflict_reason': 'conflict_reason',
+    }
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMN_DTYPES.items()}
+        self.categories = {vocabulary: [] for vocabulary in set(self.CATEGORICAL_COLUMNS.values())}
+        self._codes = {vocabulary: {} for vocabulary in self.categories}
+        self.row_by_id = {}  # {scenario_id: row}
+
+    def __len__(self):
+        return self.size
+
+    def encode(self, column, value):
+        """Return the categorical code of value, adding it to the column's vocabulary if new."""
+        vocabulary = self.CATEGORICAL_COLUMNS[column]
+        codes = self._codes[vocabulary]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.categories[vocabulary])
+            codes[value] = code
+            self.categories[vocabulary].append(value)
+        return code
+
+    def code_of(self, column, value):
+        """Categorical code of value, or -1 when it has never been stored."""
+        return self._codes[self.CATEGORICAL_COLUMNS[column]].get(value, -1)
+
+    def _reserve(self, extra):
+        capacity = len(self.columns['scenario_id'])
+        if self.size + extra <= capacity:
+            return
+        new_capacity = max(capacity * 2, self.size + extra)
+        for name, values in self.columns.items():
+            grown = np.zeros(new_capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[name] = grown
+
+    def append(self, scenario):
+        """Store a MatchScenario (or any object with the same attributes) and return its row."""
+        self._reserve(1)
+        row = self.size
+        self.size += 1
+        self.set(row, 'scenario_id', scenario.scenario_id)
+        self.set(row, 'match_id', scenario.match_id)
+        self.set(row, 'home_team', scenario.home_team)
+        self.set(row, 'away_team', scenario.away_team)
+        self.set(row, 'city', scenario.city)
+        self.set(row, 'stadium', scenario.stadium)
+        self.set(row, 'conflict_reason', scenario.conflict_reason or '')
+        self.set(row, 'date_ordinal', scenario.date_ordinal)
+        self.set(row, 'kickoff_minutes', scenario.kickoff_minutes)
+        self.set(row, 'suitability_score', scenario.suitability_score)
+        self.set(row, 'attendance_percentage', scenario.attendance_percentage)
+        self.set(row, 'profit', scenario.profit)
+        self.set(row, 'is_selected', scenario.is_selected)
+        self.set(row, 'is_available', scenario.is_available)
+        self.set(row, 'mask_count', 0)
+        self.row_by_id[scenario.scenario_id] = row
+        return row
+
+    def get(self, row, column):
+        value = self.columns[column][row]
+        if column in self.CATEGORICAL_COLUMNS:
+            return self.categories[self.CATEGORICAL_COLUMNS[column]][value]
+        return value.item()
+
+    def set(self, row, column, value):
+        if column in self.CATEGORICAL_COLUMNS:
+            value = self.encode(column, value)
+        self.columns[column][row] = value
+
+    def to_dataframe(self, rows=None):
+        """
+        Build a DataFrame with the same columns as MatchScenario.to_dict().
+        Team/city/stadium columns are categorical; date and time stay 'YYYY-MM-DD'/'HH:MM' strings.
+        """
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        columns = self.columns
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        dates = (columns['date_ordinal'][rows].astype(np.int64) - epoch).astype('datetime64[D]').astype(str)
+        minutes = columns['kickoff_minutes'][rows]
+        unique_minutes, inverse = np.unique(minutes, return_inverse=True)
+        times = np.array([minutes_to_time_string(int(m)) for m in unique_minutes], dtype=object)[inverse] if len(rows) else np.array([], dtype=object)
+
+        def categorical(column):
+            vocabulary = self.categories[self.CATEGORICAL_COLUMNS[column]]
+            return pd.Categorical.from_codes(columns[column][rows], categories=pd.Index(vocabulary, dtype=object))
+
+        return pd.DataFrame({
+            'scenario_id': columns['scenario_id'][rows],
+            'match_id': columns['match_id'][rows],
+            'home_team': categorical('home_team'),
+            'away_team': categorical('away_team'),
+            'date': dates.astype(object),
+            'time': times,
+            'city': categorical('city'),
+            'stadium': categorical('stadium'),
+            'suitability_score': columns['suitability_score'][rows],
+            'attendance_percentage': columns['attendance_percentage'][rows],
+            'profit': columns['profit'][rows],
+            'is_selected': columns['is_selected'][rows],
+            'is_available': columns['is_available'][rows],
+        })
+
+
+class ScenarioView:
+    """
+    Thin read/write view of one ScenarioStore row with the MatchScenario attribute names,
+    so UI code keeps using scenario.date, scenario.stadium, etc.
+    """
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __eq__(self, other):
+        return isinstance(other, ScenarioView) and other._store is self._store and other._row == self._row
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"ScenarioView({self.scenario_id}: {self.home_team} vs {self.away_team} {self.date} {self.time})"
+
+    scenario_id = property(lambda self: self._store.get(self._row, 'scenario_id'))
+    match_id = property(lambda self: self._store.get(self._row, 'match_id'))
+    home_team = property(lambda self: self._store.get(self._row, 'home_team'))
+    away_team = property(lambda self: self._store.get(self._row, 'away_team'))
+    date_ordinal = property(lambda self: self._store.get(self._row, 'date_ordinal'))
+    kickoff_minutes = property(lambda self: self._store.get(self._row, 'kickoff_minutes'))
+
+    @property
+    def match_date(self):
+        return datetime.date.fromordinal(self.date_ordinal)
+
+    @property
+    def date(self):
+        return self.match_date.isoformat()
+
+    @property
+    def time(self):
+        return minutes_to_time_string(self.kickoff_minutes)
+
+    @property
+    def city(self):
+        return self._store.get(self._row, 'city')
+
+    @city.setter
+    def city(self, value):
+        self._store.set(self._row, 'city', value)
+
+    @property
+    def stadium(self):
+        return self._store.get(self._row, 'stadium')
+
+    @stadium.setter
+    def stadium(self, value):
+        self._store.set(self._row, 'stadium', value)
+
+    @property
+    def conflict_reason(self):
+        return self._store.get(self._row, 'conflict_reason')
+
+    @conflict_reason.setter
+    def conflict_reason(self, value):
+        self._store.set(self._row, 'conflict_reason', value or '')
+
+    @property
+    def suitability_score(self):
+        return _as_number(self._store.get(self._row, 'suitability_score'))
+
+    @suitability_score.setter
+    def suitability_score(self, value):
+        self._store.set(self._row, 'suitability_score', value)
+
+    @property
+    def attendance_percentage(self):
+        return _as_number(self._store.get(self._row, 'attendance_percentage'))
+
+    @attendance_percentage.setter
+    def attendance_percentage(self, value):
+        self._store.set(self._row, 'attendance_percentage', value)
+
+    @property
+    def profit(self):
+        return _as_number(self._store.get(self._row, 'profit'))
+
+    @profit.setter
+    def profit(self, value):
+        self._store.set(self._row, 'profit', value)
+
+    @property
+    def is_selected(self):
+        return self._store.get(self._row, 'is_selected')
+
+    @is_selected.setter
+    def is_selected(self, value):
+        self._store.set(self._row, 'is_selected', bool(value))
+
+    @property
+    def is_available(self):
+        return self._store.get(self._row, 'is_available')
+
+    @is_available.setter
+    def is_available(self, value):
+        self._store.set(self._row, 'is_available', bool(value))
+
+    def to_dict(self):
+        return {
+            'scenario_id': self.scenario_id,
+            'match_id': self.match_id,
+            'home_team': self.home_team,
+            'away_team': self.away_team,
+            'date': self.date,
+            'time': self.time,
+            'city': self.city,
+            'stadium': self.stadium,
+            'suitability_score': self.suitability_score,
+            'attendance_percentage': self.attendance_percentage,
+            'profit': self.profit,
+            'is_selected': self.is_selected,
+            'is_available': self.is_available
+        }
+
+
+class RestDayTracker:
+    """
+    Per-team sorted timeline of selected league matches, updated on select/deselect,
+    so "last match before this date" is a bisect instead of a DataFrame filter.
+    """
+    def __init__(self):
+        self.timelines = {}  # {team: [(date_ordinal, match_id), ...]} sorted by date
+
+    def add(self, team, date_ordinal, match_id):
+        bisect.insort(self.timelines.setdefault(team, []), (date_ordinal, match_id))
+
+    def remove(self, team, date_ordinal, match_id):
+        timeline = self.timelines.get(team, [])
+        i = bisect.bisect_left(timeline, (date_ordinal, match_id))
+        if i < len(timeline) and timeline[i] == (date_ordinal, match_id):
+            del timeline[i]
+
+    def last_before(self, team, match_date):
+        """(date_ordinal, match_id) of the team's last selected match strictly before match_date, or None"""
+        timeline = self.timelines.get(team, [])
+        i = bisect.bisect_left(timeline, (match_date.toordinal(), -1))
+        return timeline[i - 1] if i > 0 else None
+
+    def next_after(self, team, match_date):
+        """(date_ordinal, match_id) of the team's next selected match strictly after match_date, or None"""
+        timeline = self.timelines.get(team, [])
+        i = bisect.bisect_left(timeline, (match_date.toordinal() + 1, -1))
+        return timeline[i] if i < len(timeline) else None
+
+    def rest_days(self, team, match_date):
+        """Days since the team's last selected match, or None"""
+        last = self.last_before(team, match_date)
+        return None if last is None else match_date.toordinal() - last[0]
+
+
 class ScenarioManager:
     def __init__(self):
-        self.scenarios = {}  # {match_id: [MatchScenario, ...]}
+        self.store = ScenarioStore()  # Columnar storage of every scenario
+        self.match_rows = {}  # {match_id: [store row, ...]} every scenario generated per match
         self.selected_scenarios = {}  # {match_id: scenario_id}
         self.week_scenarios = {}  # {week: {day: [scenario_ids]}}
-    
+        # Secondary indexes, maintained on add/select/deselect
+        self.rows_by_date = {}  # {date_ordinal: {row, ...}}
+        self.rows_by_team = {}  # {team: {row, ...}}
+        self.stadium_bookings = {}  # {(stadium, 'YYYY-MM-DD'): [booking, ...]} of selected scenarios
+        # Selections hide conflicting scenarios of other matches instead of deleting them
+        self.selection_masks = {}  # {match_id: [rows hidden by its selection]}
+        self.rest_tracker = RestDayTracker()  # Selected match dates per team
+        # Append-only selection journal; entries from journal_position on can be redone
+        self.journal = []  # [{'action': 'select'|'deselect'|'batch', 'match_id', 'scenario_id', 'previous_scenario_id'(, 'changes', 'venues')}]
+        self.journal_position = 0
+        # predict_scenarios_batch inputs of the last generation, reused when a venue changes (None: not predicted)
+        self.prediction_context = None
+
+    @property
+    def scenarios(self):
+        """{match_id: [ScenarioView, ...]} - read-only mapping kept for existing callers"""
+        return {match_id: self.get_scenarios_for_match(match_id) for match_id in self.match_rows}
+
+    def clear(self):
+        """Drop every scenario and selection (used before regenerating)"""
+        self.store = ScenarioStore()
+        self.match_rows = {}
+        self.selected_scenarios = {}
+        self.week_scenarios = {}
+        self.rows_by_date = {}
+        self.rows_by_team = {}
+        self.stadium_bookings = {}
+        self.selection_masks = {}
+        self.rest_tracker = RestDayTracker()
+        self.journal = []
+        self.journal_position = 0
+        self.prediction_context = None
+
+    def _index_row(self, row):
+        view = ScenarioView(self.store, row)
+        self.rows_by_date.setdefault(view.date_ordinal, set()).add(row)
+        self.rows_by_team.setdefault(view.home_team, set()).add(row)
+        self.rows_by_team.setdefault(view.away_team, set()).add(row)
+
+    def _book(self, scenario):
+        """Book the stadium for the ENTIRE day of a selected scenario"""
+        self.stadium_bookings.setdefault((scenario.stadium, scenario.date), []).append({
+            'time': scenario.time,
+            'match_id': scenario.match_id,
+            'home_team': scenario.home_team,
+            'away_team': scenario.away_team
+        })
+
+    def _track_rest(self, scenario, add):
+        for team in (scenario.home_team, scenario.away_team):
+            if add:
+                self.rest_tracker.add(team, scenario.date_ordinal, scenario.match_id)
+            else:
+                self.rest_tracker.remove(team, scenario.date_ordinal, scenario.match_id)
+
+    def _unbook(self, scenario):
+        key = (scenario.stadium, scenario.date)
+        bookings = [b for b in self.stadium_bookings.get(key, []) if b['match_id'] != scenario.match_id]
+        if bookings:
+            self.stadium_bookings[key] = bookings
+        else:
+            self.stadium_bookings.pop(key, None)
+
     def add_scenario(self, scenario):
-        """Add a scenario to the manager"""
-        if scenario.match_id not in self.scenarios:
-            self.scenarios[scenario.match_id] = []
-        self.scenarios[scenario.match_id].append(scenario)
-    
+        """Add a scenario to the manager and return its view"""
+        row = self.store.append(scenario)
+        self.match_rows.setdefault(scenario.match_id, []).append(row)
+        self._index_row(row)
+        view = ScenarioView(self.store, row)
+        if scenario.is_selected:
+            self.selected_scenarios[scenario.match_id] = scenario.scenario_id
+            self._book(view)
+            self._track_rest(view, add=True)
+        return view
+    
+    def _offered_rows(self, match_id):
+        mask_count = self.store.columns['mask_count']
+        return [row for row in self.match_rows.get(match_id, []) if mask_count[row] == 0]
+
     def get_scenarios_for_match(self, match_id):
         """Get all scenarios for a specific match"""
-        return self.scenarios.get(match_id, [])
+        return [ScenarioView(self.store, row) for row in self._offered_rows(match_id)]
+
+    def get_scenario(self, scenario_id):
+        """Get the view of one scenario by id, or None"""
+        row = self.store.row_by_id.get(scenario_id)
+        return None if row is None else ScenarioView(self.store, row)
+
+    def get_selected_scenario(self, match_id):
+        """Get the view of the selected scenario of a match, or None"""
+        scenario_id = self.selected_scenarios.get(match_id)
+        return None if scenario_id is None else self.get_scenario(scenario_id)
+
+    def get_scenarios_for_team(self, team):
+        """Get every offered scenario involving a team"""
+        mask_count = self.store.columns['mask_count']
+        return [ScenarioView(self.store, row) for row in sorted(self.rows_by_team.get(team, ())) if mask_count[row] == 0]
+
+    def to_dataframe(self):
+        """DataFrame of all scenarios still offered, one row per scenario"""
+        rows = [row for match_id in self.match_rows for row in self._offered_rows(match_id)]
+        return self.store.to_dataframe(rows)
     
     def select_scenario(self, match_id, scenario_id):
-        """Select a scenario and remove it from other days"""
-        if match_id in self.scenarios:
-            for scenario in self.scenarios[match_id]:
-                scenario.is_selected = (scenario.scenario_id == scenario_id)
-            self.selected_scenarios[match_id] = scenario_id
-            self._remove_scenario_from_others(match_id, scenario_id)
+        """Select a scenario and hide conflicting scenarios of other matches (journaled)"""
+        row = self.store.row_by_id.get(scenario_id)
+        if row is None or row not in self._offered_rows(match_id):
+            return
+        previous_scenario_id = self.selected_scenarios.get(match_id)
+        self._apply_select(match_id, scenario_id)
+        self._record({'action': 'select', 'match_id': match_id, 'scenario_id': scenario_id,
+                      'previous_scenario_id': previous_scenario_id})
+
+    def deselect_scenario(self, match_id):
+        """Deselect the scenario of a match, release its stadium and restore the scenarios it hid (journaled)"""
+        scenario = self.get_selected_scenario(match_id)
+        if scenario is None:
+            return None
+        self._apply_deselect(match_id)
+        self._record({'action': 'deselect', 'match_id': match_id, 'scenario_id': scenario.scenario_id,
+                      'previous_scenario_id': scenario.scenario_id})
+        return scenario
+
+    def select_many(self, assignments, venues=None):
+        """
+        Apply {match_id: scenario_id or None} as ONE journal entry (None deselects), so a
+        whole optimizer plan is undone or redone with a single click. Changed matches are
+        released first, so scenarios they were hiding can be taken by the others.
+        venues ({match_id: (stadium, city)}) moves the resulting selections to other stadiums
+        within the same entry. Returns the match_ids that changed.
+        """
+        changes = [(match_id, self.selected_scenarios.get(match_id), scenario_id)
+                   for match_id, scenario_id in assignments.items()
+                   if self.selected_scenarios.get(match_id) != scenario_id]
+        self._apply_changes(changes)
+        venue_changes = []
+        for match_id, (stadium, city) in (venues or {}).items():
+            scenario = self.get_selected_scenario(match_id)
+            if scenario is not None and (scenario.stadium, scenario.city) != (stadium, city):
+                venue_changes.append((match_id, scenario.scenario_id, (scenario.stadium, scenario.city), (stadium, city)))
+        self._apply_venues(venue_changes)
+        if not changes and not venue_changes:
+            return []
+        entry = {'action': 'batch', 'match_id': None, 'scenario_id': None, 'previous_scenario_id': None,
+                 'changes': changes, 'venues': venue_changes}
+        self._record(entry)
+        return self.entry_match_ids(entry)
+
+    def _apply_venues(self, venue_changes):
+        """Apply [(match_id, scenario_id, from_venue, to_venue), ...] with venues as (stadium, city)"""
+        for _, scenario_id, _, (stadium, city) in venue_changes:
+            self.set_scenario_stadium(scenario_id, stadium, city, repredict=False)
+        self.repredict([self.store.row_by_id[scenario_id] for _, scenario_id, _, _ in venue_changes])
+
+    def _apply_changes(self, changes):
+        """Apply [(match_id, from_scenario_id, to_scenario_id), ...]: deselect all, then select"""
+        for match_id, from_scenario_id, _ in changes:
+            if from_scenario_id is not None:
+                self._apply_deselect(match_id)
+        for match_id, _, to_scenario_id in changes:
+            if to_scenario_id is not None:
+                self._apply_select(match_id, to_scenario_id)
+
+    @staticmethod
+    def entry_match_ids(entry):
+        """Match ids touched by a journal entry"""
+        if entry is None:
+            return []
+        if entry['action'] == 'batch':
+            match_ids = [match_id for match_id, _, _ in entry['changes']]
+            return match_ids + [venue[0] for venue in entry.get('venues', []) if venue[0] not in match_ids]
+        return [entry['match_id']]
+
+    def _apply_select(self, match_id, scenario_id):
+        if match_id in self.selected_scenarios:
+            self._apply_deselect(match_id)
+        selected = self.get_scenario(scenario_id)
+        selected.is_selected = True
+        self.selected_scenarios[match_id] = scenario_id
+        self._book(selected)
+        self._track_rest(selected, add=True)
+        self._remove_scenario_from_others(match_id, scenario_id)
+
+    def _apply_deselect(self, match_id):
+        scenario = self.get_selected_scenario(match_id)
+        scenario.is_selected = False
+        self._unbook(scenario)
+        self._track_rest(scenario, add=False)
+        del self.selected_scenarios[match_id]
+        hidden_rows = self.selection_masks.pop(match_id, [])
+        if hidden_rows:
+            self.store.columns['mask_count'][hidden_rows] -= 1
+
+    def _record(self, entry):
+        # A new action discards anything that could have been redone
+        del self.journal[self.journal_position:]
+        self.journal.append(entry)
+        self.journal_position = len(self.journal)
+
+    def can_undo(self):
+        return self.journal_position > 0
+
+    def can_redo(self):
+        return self.journal_position < len(self.journal)
+
+    def undo(self):
+        """Revert the last selection change; returns the journal entry or None"""
+        if not self.can_undo():
+            return None
+        self.journal_position -= 1
+        entry = self.journal[self.journal_position]
+        if entry['action'] == 'batch':
+            self._apply_venues([(match_id, scenario_id, new, old) for match_id, scenario_id, old, new in entry.get('venues', [])])
+            self._apply_changes([(match_id, new, old) for match_id, old, new in entry['changes']])
+        elif entry['action'] == 'select':
+            self._apply_deselect(entry['match_id'])
+            if entry['previous_scenario_id'] is not None:
+                self._apply_select(entry['match_id'], entry['previous_scenario_id'])
+        else:
+            self._apply_select(entry['match_id'], entry['scenario_id'])
+        return entry
+
+    def redo(self):
+        """Re-apply the last undone selection change; returns the journal entry or None"""
+        if not self.can_redo():
+            return None
+        entry = self.journal[self.journal_position]
+        self.journal_position += 1
+        if entry['action'] == 'batch':
+            self._apply_changes(entry['changes'])
+            self._apply_venues(entry.get('venues', []))
+        elif entry['action'] == 'select':
+            self._apply_select(entry['match_id'], entry['scenario_id'])
+        else:
+            self._apply_deselect(entry['match_id'])
+        return entry
+
+    def set_scenario_stadium(self, scenario_id, stadium, city, repredict=True):
+        """Move a scenario to another stadium, keeping the booking index and its predictions in step"""
+        scenario = self.get_scenario(scenario_id)
+        if scenario is None:
+            return None
+        if scenario.is_selected:
+            self._unbook(scenario)
+        update_scenario_stadium(scenario, stadium, city)
+        if scenario.is_selected:
+            self._book(scenario)
+        if repredict:
+            self.repredict([self.store.row_by_id[scenario_id]])
+        return scenario
+
+    def repredict(self, rows):
+        """
+        Re-run the models on store rows whose venue changed, with the inputs of the last
+        generation. Rows seen before (e.g. on undo) are served by the prediction cache.
+        Returns the number of rows predicted; 0 when the scenarios were never predicted.
+        """
+        if self.prediction_context is None or not len(rows):
+            return 0
+        try:
+            return predict_scenarios_batch(
+                self, **self.prediction_context, rows=rows,
+                attendance_model=load_model('attendance'),
+                profit_model=load_model('profit'),
+                suitability_model=load_model('suitability')
+            )
+        except Exception as e:
+            logger.warning("Re-prediction after a venue change failed, keeping previous estimates: %s", e)
+            return 0
     
     def _remove_scenario_from_others(self, selected_match_id, selected_scenario_id):
-        """Remove the selected scenario from other matches to avoid conflicts"""
-        selected_scenario = None
-        for scenario in self.scenarios.get(selected_match_id, []):
-            if scenario.scenario_id == selected_scenario_id:
-                selected_scenario = scenario
-                break
-        
-        if not selected_scenario:
+        """Hide scenarios of other matches that conflict with the selected scenario"""
+        selected_scenario = self.get_scenario(selected_scenario_id)
+        if selected_scenario is None:
             return
-        
-        for match_id, scenarios in self.scenarios.items():
-            if match_id == selected_match_id:
-                continue
-            # ONLY remove scenarios with TEAM conflicts on the same date
-            # DO NOT remove based on stadium conflicts
-            self.scenarios[match_id] = [
-                s for s in scenarios 
-                if not (s.date == selected_scenario.date and 
-                       ({s.home_team, s.away_team}.intersection({selected_scenario.home_team, selected_scenario.away_team})))
-            ]    
+
+        # ONLY hide scenarios with TEAM conflicts on the same date
+        # DO NOT hide based on stadium conflicts
+        same_day = self.rows_by_date.get(selected_scenario.date_ordinal, set())
+        same_teams = self.rows_by_team.get(selected_scenario.home_team, set()) | self.rows_by_team.get(selected_scenario.away_team, set())
+        match_ids = self.store.columns['match_id']
+        hidden_rows = sorted(row for row in same_day & same_teams if match_ids[row] != selected_match_id)
+        if hidden_rows:
+            self.store.columns['mask_count'][hidden_rows] += 1
+        self.selection_masks[selected_match_id] = hidden_rows
+
     def _scenarios_conflict(self, scenario1, scenario2):
         """Check if two scenarios conflict (same time/date/stadium or team conflicts)"""
         if scenario1.date == scenario2.date and scenario1.stadium == scenario2.stadium:
@@ -154,16 +746,202 @@ class ScenarioManager:
     
     def get_available_scenarios_for_day(self, date):
         """Get all available scenarios for a specific day"""
-        day_scenarios = []
-        for match_id, scenarios in self.scenarios.items():
-            for scenario in scenarios:
-                if scenario.date == date and not scenario.is_selected:
-                    day_scenarios.append(scenario)
-        return day_scenarios
+        if isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        is_selected = self.store.columns['is_selected']
+        mask_count = self.store.columns['mask_count']
+        return [ScenarioView(self.store, row) for row in sorted(self.rows_by_date.get(date.toordinal(), ()))
+                if not is_selected[row] and mask_count[row] == 0]
+
+
+
+# External fixtures (AFC, King's Cup, friendlies) per team are kept in external_fixtures.json
+# ({team: ['YYYY-MM-DD', ...]}) or a CSV with team,date columns. The team cannot play a
+# league match on these dates or within TEAM_UNAVAILABILITY_BUFFER_DAYS of them.
+EXTERNAL_FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'external_fixtures.json')
+
+
+class ExternalFixturesRegistry:
+    """
+    Single source of external fixtures for availability and rest-day calculations.
+    Keeps each team's fixtures in listed order (used for conflict messages) and as a
+    sorted ordinal array for bisect-based last_before/next_after lookups.
+    load_error is set when the fixtures could not be loaded: the registry is then empty and
+    every team looks available, so the automatic schedulers must not run.
+    """
+    def __init__(self, fixtures, load_error=None):
+        self.fixtures = {team: list(dates) for team, dates in fixtures.items()}  # {team: [datetime.date]}
+        self.load_error = load_error
+        self._ordinals = {team: sorted(d.toordinal() for d in dates) for team, dates in self.fixtures.items()}
+
+    @classmethod
+    def load(cls, path=EXTERNAL_FIXTURES_PATH):
+        """Load fixtures from a JSON mapping or a CSV with team,date columns."""
+        fixtures = {}
+        if path.lower().endswith('.csv'):
+            for row in pd.read_csv(path).itertuples(index=False):
+                fixtures.setdefault(str(row.team).strip(), []).append(datetime.date.fromisoformat(str(row.date).strip()))
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                for team, dates in json.load(f).items():
+                    fixtures[team.strip()] = [datetime.date.fromisoformat(d) for d in dates]
+        return cls(fixtures)
+
+    def teams(self):
+        return list(self.fixtures)
+
+    def fixtures_for(self, team):
+        return self.fixtures.get(team, [])
+
+    def last_before(self, team, match_date):
+        """Most recent external fixture strictly before match_date, or None"""
+        ordinals = self._ordinals.get(team, [])
+        i = bisect.bisect_left(ordinals, match_date.toordinal())
+        return datetime.date.fromordinal(ordinals[i - 1]) if i > 0 else None
+
+    def next_after(self, team, match_date):
+        """Next external fixture strictly after match_date, or None"""
+        ordinals = self._ordinals.get(team, [])
+        i = bisect.bisect_right(ordinals, match_date.toordinal())
+        return datetime.date.fromordinal(ordinals[i]) if i < len(ordinals) else None
+
+    def move_fixture(self, team, old_date, new_date):
+        """Move a team's fixture (old_date None adds one, new_date None removes one)"""
+        dates = self.fixtures.setdefault(team, [])
+        if old_date is not None:
+            if old_date not in dates:
+                raise ValueError(f"{team} has no external fixture on {old_date}")
+            dates.remove(old_date)
+        if new_date is not None:
+            dates.append(new_date)
+        self._ordinals[team] = sorted(d.toordinal() for d in dates)
+
+
+@st.cache_resource
+def load_external_fixtures_registry():
+    """External fixtures registry loaded once per process, shared by every session and never modified."""
+    try:
+        return ExternalFixturesRegistry.load()
+    except (OSError, ValueError, KeyError) as e:
+        st.error(f"Could not load external fixtures from {EXTERNAL_FIXTURES_PATH}: {e}")
+        return ExternalFixturesRegistry({}, load_error=str(e))
+
+
+def get_external_fixtures_registry():
+    """This session's external fixtures: the shared registry, or the session's copy once a fixture was moved"""
+    registry = st.session_state.get('disrupted_fixtures_registry')
+    return load_external_fixtures_registry() if registry is None else registry
 
 
+def external_fixtures_error():
+    """Why the external fixtures failed to load, or None when team availability can be trusted"""
+    return get_external_fixtures_registry().load_error
+
+
+TEAM_UNAVAILABILITY_BUFFER_DAYS = 2
+SEASON_CALENDAR_END = datetime.date(2026, 6, 30)
+
+
+class TeamAvailabilityCalendar:
+    """
+    Precomputed team x season-day availability matrix, including the buffer days around
+    every external fixture. Built once; lookups are O(1) array reads and
+    available_matrix() answers "which teams are free on these dates" in one vectorized step.
+    """
+    def __init__(self, unavailability, buffer_days=TEAM_UNAVAILABILITY_BUFFER_DAYS, end_date=SEASON_CALENDAR_END):
+        self.buffer_days = buffer_days
+        self.end_date = end_date
+        self.teams = list(unavailability)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        all_dates = [d for dates in unavailability.values() for d in dates]
+        self.start_ordinal = (min(all_dates) if all_dates else end_date).toordinal() - buffer_days
+        end_ordinal = max([end_date.toordinal()] + [d.toordinal() + buffer_days for d in all_dates])
+        n_days = end_ordinal - self.start_ordinal + 1
+
+        # unavailable[t, d]: team t cannot play on day d
+        # blocking_fixture[t, d]: ordinal of the fixture causing it (for the conflict reason)
+        # on_fixture_day[t, d]: the fixture is on that exact day
+        self.unavailable = np.zeros((len(self.teams), n_days), dtype=bool)
+        self.blocking_fixture = np.zeros((len(self.teams), n_days), dtype=np.int32)
+        self.on_fixture_day = np.zeros((len(self.teams), n_days), dtype=bool)
+        for t, team in enumerate(self.teams):
+            self._fill_team(t, unavailability[team])
+
+    def _fill_team(self, t, fixtures):
+        self.unavailable[t] = False
+        self.blocking_fixture[t] = 0
+        self.on_fixture_day[t] = False
+        # Reverse order so the first listed fixture wins, like the original loop
+        for fixture in reversed(fixtures):
+            day = fixture.toordinal() - self.start_ordinal
+            window = slice(max(day - self.buffer_days, 0), day + self.buffer_days + 1)
+            self.unavailable[t, window] = True
+            buffer_only = ~self.on_fixture_day[t, window]
+            self.blocking_fixture[t, window][buffer_only] = fixture.toordinal()
+        for fixture in reversed(fixtures):
+            day = fixture.toordinal() - self.start_ordinal
+            self.on_fixture_day[t, day] = True
+            self.blocking_fixture[t, day] = fixture.toordinal()
+
+    def refresh_team(self, team, unavailability):
+        """
+        Recompute one team's row after its fixtures changed; unavailability is the full
+        {team: [dates]} mapping, used to rebuild everything when the team or a date is new.
+        """
+        fixtures = unavailability.get(team, [])
+        n_days = self.unavailable.shape[1]
+        in_range = all(self.buffer_days <= d.toordinal() - self.start_ordinal < n_days - self.buffer_days
+                       for d in fixtures)
+        if team not in self.team_index or not in_range:
+            self.__init__(unavailability, self.buffer_days, self.end_date)
+        else:
+            self._fill_team(self.team_index[team], fixtures)
+
+    def _day(self, match_date):
+        day = match_date.toordinal() - self.start_ordinal
+        return day if 0 <= day < self.unavailable.shape[1] else None
+
+    def is_available(self, team, match_date):
+        """(is_available, conflict_reason) for one team and datetime.date"""
+        t = self.team_index.get(team)
+        day = self._day(match_date)
+        if t is None or day is None or not self.unavailable[t, day]:
+            return True, ""
+        fixture = datetime.date.fromordinal(int(self.blocking_fixture[t, day])).strftime('%Y-%m-%d')
+        if self.on_fixture_day[t, day]:
+            return False, f"has scheduled match on {fixture}"
+        return False, f"will play at {fixture}"
+
+    def available_matrix(self, teams, dates):
+        """Boolean array (len(teams), len(dates)): True where the team is free on that date"""
+        days = np.array([d.toordinal() for d in dates], dtype=np.int64) - self.start_ordinal
+        in_range = (days >= 0) & (days < self.unavailable.shape[1])
+        rows = np.array([self.team_index.get(team, -1) for team in teams], dtype=np.int64)
+        known = rows >= 0
+        free = np.ones((len(rows), len(days)), dtype=bool)
+        if known.any() and in_range.any():
+            sub = self.unavailable[np.ix_(rows[known], days[in_range])]
+            free[np.ix_(known, in_range)] = ~sub
+        return free
+
+    def free_teams_on(self, teams, dates):
+        """{date: [teams free on that date]}"""
+        free = self.available_matrix(teams, dates)
+        return {d: [team for team, ok in zip(teams, free[:, j]) if ok] for j, d in enumerate(dates)}
+
+
+@st.cache_resource
+def load_team_availability_calendar():
+    """Availability matrix built once per process from the shared fixtures."""
+    return TeamAvailabilityCalendar(load_external_fixtures_registry().fixtures)
+
+
+def get_team_availability_calendar():
+    """This session's availability matrix: the shared one, or the session's copy once a fixture was moved"""
+    team_calendar = st.session_state.get('disrupted_team_calendar')
+    return load_team_availability_calendar() if team_calendar is None else team_calendar
+
 
-@lru_cache(maxsize=128)
 def is_team_available(team, match_date):
     """
     Check if a team is available on a given date, including a 2-day buffer.
@@ -178,124 +956,9 @@ def is_team_available(team, match_date):
                If available: (True, "")
                If not available: (False, "will play at {date}")
     """
-    TEAM_UNAVAILABILITY = {
-    'Al-Ittihad': [
-        datetime.date(2025, 9, 15),
-        datetime.date(2025, 9, 30),
-        datetime.date(2025, 10, 20),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 4),
-        datetime.date(2025, 11, 24),
-        datetime.date(2025, 12, 23),
-        datetime.date(2026, 2, 10),
-        datetime.date(2026, 2, 17)
-    ],
-    'Al-Ahli': [
-        datetime.date(2025, 9, 15),
-        datetime.date(2025, 9, 29),
-        datetime.date(2025, 10, 20),
-        datetime.date(2025, 10, 27),
-        datetime.date(2025, 11, 4),
-        datetime.date(2025, 11, 24),
-        datetime.date(2025, 12, 22),
-        datetime.date(2026, 2, 9),
-        datetime.date(2026, 2, 16)
-    ],
-    'Al-Hilal': [
-        datetime.date(2025, 9, 16),
-        datetime.date(2025, 9, 29),
-        datetime.date(2025, 10, 21),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 3),
-        datetime.date(2025, 11, 25),
-        datetime.date(2025, 12, 22),
-        datetime.date(2026, 2, 9),
-        datetime.date(2026, 2, 16)
-    ],
-    'Al-Nassr': [
-        datetime.date(2025, 9, 17),
-        datetime.date(2025, 10, 1),
-        datetime.date(2025, 10, 22),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 5),
-        datetime.date(2025, 11, 26),
-        datetime.date(2025, 12, 24)
-    ],
-    'Al-Shabab': [
-        datetime.date(2025, 10, 1),
-        datetime.date(2025, 10, 21),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 5),
-        datetime.date(2025, 12, 24),
-        datetime.date(2026, 2, 1),
-        datetime.date(2026, 2, 17)
-    ],
- 'Al-Ettifaq': [datetime.date(2025, 10, 24)],
-    'Al-Fayha' : [
-        datetime.date(2025, 10, 24)
-    ],  
-     'NEOM' : [
-        datetime.date(2025, 10, 24)
-    ],  
-    'Al-Khaleej': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Fateh': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Okhdood': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Batin': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Qadisiyah': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Kholood': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Taawoun': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-riyadh': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Najma': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Hazem': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Raed': [
-        datetime.date(2025, 10, 28)
-    ],
-     'Damac': [
-        datetime.date(2025, 10, 25)
-    ]
-}
-    
-    
-    unavailable_dates = TEAM_UNAVAILABILITY.get(team, [])
-    
-    # First check if the exact match_date conflicts with any unavailable date
-    for unavailable_date in unavailable_dates:
-        if match_date == unavailable_date:
-            return False, f"has scheduled match on {unavailable_date.strftime('%Y-%m-%d')}"
-    
-    # Apply a 2-day buffer around each unavailability date and find the closest conflict
-    for unavailable_date in unavailable_dates:
-        buffer_dates = [
-            unavailable_date - datetime.timedelta(days=2),
-            unavailable_date - datetime.timedelta(days=1),
-            unavailable_date + datetime.timedelta(days=1),
-            unavailable_date + datetime.timedelta(days=2)
-        ]
-        
-        if match_date in buffer_dates:
-            return False, f"will play at {unavailable_date.strftime('%Y-%m-%d')}"
-    
-    return True, ""
+    if isinstance(match_date, datetime.datetime):
+        match_date = match_date.date()
+    return get_team_availability_calendar().is_available(team, match_date)
 
 
 CITY_STADIUMS = {
@@ -479,38 +1142,168 @@ TEAM_STADIUMS = {
     }
 }
 
+class StadiumCalendar:
+    """
+    Closure intervals per stadium, sorted by start date, with bisect lookups.
+    Built from STADIUM_UNAVAILABILITY; more closures can be added at runtime.
+    Bookings of selected scenarios live in ScenarioManager.stadium_bookings.
+    """
+    def __init__(self, unavailability=None):
+        self.closures = {}  # {stadium: [(start_ordinal, end_ordinal, alternative), ...]} sorted by start
+        self._starts = {}   # {stadium: [start_ordinal, ...]}
+        for stadium, info in (unavailability or {}).items():
+            start_date, end_date = info['unavailable']
+            self.add_closure(stadium, start_date, end_date, info.get('alternative'))
+
+    def add_closure(self, stadium, start_date, end_date, alternative=None):
+        intervals = self.closures.setdefault(stadium, [])
+        # Ordered on dates only: alternatives may be None or str and cannot be compared
+        bisect.insort(intervals, (start_date.toordinal(), end_date.toordinal(), alternative),
+                      key=lambda interval: interval[:2])
+        self._starts[stadium] = [interval[0] for interval in intervals]
+
+    def remove_closure(self, stadium, start_date, end_date):
+        intervals = self.closures.get(stadium, [])
+        self.closures[stadium] = [i for i in intervals if (i[0], i[1]) != (start_date.toordinal(), end_date.toordinal())]
+        self._starts[stadium] = [interval[0] for interval in self.closures[stadium]]
+
+    def closure_on(self, stadium, match_date):
+        """(start_date, end_date, alternative) of the closure covering match_date, or None"""
+        starts = self._starts.get(stadium)
+        if not starts:
+            return None
+        ordinal = match_date.toordinal()
+        # Intervals starting on or before the date, latest first (usually just one)
+        for i in range(bisect.bisect_right(starts, ordinal) - 1, -1, -1):
+            start, end, alternative = self.closures[stadium][i]
+            if end >= ordinal:
+                return datetime.date.fromordinal(start), datetime.date.fromordinal(end), alternative
+        return None
+
+    def is_available(self, stadium, match_date):
+        return self.closure_on(stadium, match_date) is None
+
+    def closure_reason(self, stadium, match_date):
+        closure = self.closure_on(stadium, match_date)
+        if closure is None:
+            return None
+        return f"Unavailable from {closure[0].strftime('%Y-%m-%d')} to {closure[1].strftime('%Y-%m-%d')}"
+
+
+@st.cache_resource
+def load_stadium_calendar():
+    """Stadium closure calendar built once per process, shared by every session and never modified."""
+    return StadiumCalendar(STADIUM_UNAVAILABILITY)
+
+
+def get_stadium_calendar():
+    """This session's stadium calendar: the shared one, or the session's copy once a closure was added"""
+    stadium_calendar = st.session_state.get('disrupted_stadium_calendar')
+    return load_stadium_calendar() if stadium_calendar is None else stadium_calendar
+
+
 def is_stadium_available(stadium, match_date):
     """Check if a stadium is available on a given date."""
-    if stadium in STADIUM_UNAVAILABILITY:
-        unavailable_start, unavailable_end = STADIUM_UNAVAILABILITY[stadium]['unavailable']
-        if unavailable_start <= match_date <= unavailable_end:
-            return False
-    return True
+    return get_stadium_calendar().is_available(stadium, match_date)
 
 
 def get_stadium_bookings(scenario_manager):
     """
     Get all stadium bookings from selected scenarios.
     Returns dict: {(stadium_name, date): [time_slots]} for full day bookings
+    The manager keeps this index up to date on select/deselect, so no scan is needed.
     """
-    bookings = {}
-    for match_id, scenario_id in scenario_manager.selected_scenarios.items():
-        scenarios = scenario_manager.get_scenarios_for_match(match_id)
-        for scenario in scenarios:
-            if scenario.scenario_id == scenario_id:
-                # Book the stadium for the ENTIRE day, not just one time slot
-                key = (scenario.stadium, scenario.date)
-                if key not in bookings:
-                    bookings[key] = []
-                # Store all time slots for this stadium on this date
-                bookings[key].append({
-                    'time': scenario.time,
-                    'match_id': match_id,
-                    'home_team': scenario.home_team,
-                    'away_team': scenario.away_team
-                })
-                break
-    return bookings
+    return scenario_manager.stadium_bookings
+
+
+def _stadium_candidates(team, match_date, calendar):
+    """
+    Ordered stadium candidates for a team on a date, independent of bookings:
+    [(stadium, stadium_type, closure_reason or None), ...]
+    Order: primary (or its automatic alternative when closed), team alternatives, other city stadiums.
+    """
+    team_info = TEAM_STADIUMS[team]
+    candidates = []
+    processed_stadiums = set()
+
+    # 1. Primary stadium
+    primary_stadium = team_info['primary']
+    processed_stadiums.add(primary_stadium)
+    primary_closure = calendar.closure_on(primary_stadium, match_date)
+    if primary_closure is None:
+        candidates.append((primary_stadium, 'Primary', None))
+    else:
+        candidates.append((primary_stadium, 'Primary', calendar.closure_reason(primary_stadium, match_date)))
+        # Add the automatic alternative if not already processed (skipped when it is closed too)
+        alt = primary_closure[2]
+        if alt and alt not in processed_stadiums:
+            processed_stadiums.add(alt)
+            if calendar.is_available(alt, match_date):
+                candidates.append((alt, 'Alternative', None))
+
+    # 2. Alternative stadiums defined for the team
+    for alt_stadium in team_info['alternatives']:
+        if alt_stadium not in processed_stadiums:
+            processed_stadiums.add(alt_stadium)
+            candidates.append((alt_stadium, 'Alternative', calendar.closure_reason(alt_stadium, match_date)))
+
+    # 3. Other stadiums in the same city
+    for city_stadium in CITY_STADIUMS.get(team_info['city'], []):
+        if city_stadium not in processed_stadiums:
+            processed_stadiums.add(city_stadium)
+            candidates.append((city_stadium, 'Other City Stadium', calendar.closure_reason(city_stadium, match_date)))
+
+    return candidates
+
+
+def get_available_stadiums_batch(stadium_requests, scenario_manager=None):
+    """
+    Resolve stadium options for many (team, match_date, current_match_id) requests at once.
+    Closures are looked up once per (team, date) and bookings are read once for the batch.
+
+    Returns:
+        dict: {(team, match_date, current_match_id): (available_stadiums, unavailable_stadiums)}
+              in the format of get_available_stadiums_for_team
+    """
+    calendar = get_stadium_calendar()
+    stadium_bookings = get_stadium_bookings(scenario_manager) if scenario_manager else {}
+    candidates_by_day = {}
+    results = {}
+
+    for request in stadium_requests:
+        team, match_date, current_match_id = request
+        if team not in TEAM_STADIUMS:
+            results[request] = ([], [])
+            continue
+        if isinstance(match_date, str):
+            match_date = datetime.date.fromisoformat(match_date)
+        match_date_str = match_date.strftime('%Y-%m-%d')
+        team_city = TEAM_STADIUMS[team]['city']
+
+        day_key = (team, match_date)
+        if day_key not in candidates_by_day:
+            candidates_by_day[day_key] = _stadium_candidates(team, match_date, calendar)
+
+        available_stadiums = []
+        unavailable_stadiums = []
+        for stadium, stadium_type, closure_reason in candidates_by_day[day_key]:
+            if closure_reason is not None:
+                unavailable_stadiums.append((stadium, team_city, stadium_type, closure_reason))
+                continue
+            # A stadium is booked for the whole day by any other match on that date
+            booking_info = next(
+                (booking for booking in stadium_bookings.get((stadium, match_date_str), [])
+                 if current_match_id is None or booking['match_id'] != current_match_id),
+                None
+            )
+            if booking_info is not None:
+                reason = f"Booked for entire day on {match_date_str} ({booking_info['home_team']} vs {booking_info['away_team']} at {booking_info['time']})"
+                unavailable_stadiums.append((stadium, team_city, stadium_type, reason))
+            else:
+                available_stadiums.append((stadium, team_city, stadium_type, True))
+        results[request] = (available_stadiums, unavailable_stadiums)
+
+    return results
 
 
 def get_available_stadiums_for_team(team, match_date, match_time, current_match_id=None, scenario_manager=None):
@@ -527,122 +1320,14 @@ def get_available_stadiums_for_team(team, match_date, match_time, current_match_
         is_selectable: False if stadium is booked for ANY time on this date
     unavailable_stadiums: [(stadium_name, city, stadium_type, reason), ...]
     """
-    if team not in TEAM_STADIUMS:
-        return [], []
-    
-    team_info = TEAM_STADIUMS[team]
-    team_city = team_info['city']
-    available_stadiums = []
-    unavailable_stadiums = []
-    
-    # Get current stadium bookings (now organized by date instead of time)
-    stadium_bookings = {}
-    if scenario_manager:
-        stadium_bookings = get_stadium_bookings(scenario_manager)
-    
-    # Track which stadiums we've already processed
-    processed_stadiums = set()
-    
-    # Helper function to check if stadium is booked for the entire day
-    def is_stadium_booked_full_day(stadium_name, date_str):
-        """Check if stadium is booked for ANY time slot on this date"""
-        booking_key = (stadium_name, date_str)
-        if booking_key in stadium_bookings:
-            # Check if any booking is for a different match
-            bookings = stadium_bookings[booking_key]
-            for booking in bookings:
-                if current_match_id is None or booking['match_id'] != current_match_id:
-                    return True, booking
-        return False, None
-    
-    # Convert match_date to string format for consistency
-    match_date_str = match_date.strftime('%Y-%m-%d') if isinstance(match_date, datetime.date) else match_date
-    
-    # 1. Check primary stadium
-    primary_stadium = team_info['primary']
-    processed_stadiums.add(primary_stadium)
-    
-    if is_stadium_available(primary_stadium, match_date):
-        is_booked, booking_info = is_stadium_booked_full_day(primary_stadium, match_date_str)
-        if is_booked:
-            # Stadium is booked for the entire day
-            reason = f"Booked for entire day on {match_date_str} ({booking_info['home_team']} vs {booking_info['away_team']} at {booking_info['time']})"
-            unavailable_stadiums.append((
-                primary_stadium, 
-                team_city, 
-                'Primary', 
-                reason
-            ))
-        else:
-            # Stadium is available for all time slots
-            available_stadiums.append((primary_stadium, team_city, 'Primary', True))
-    else:
-        # Get unavailability reason
-        if primary_stadium in STADIUM_UNAVAILABILITY:
-            unavailable_start, unavailable_end = STADIUM_UNAVAILABILITY[primary_stadium]['unavailable']
-            reason = f"Unavailable from {unavailable_start.strftime('%Y-%m-%d')} to {unavailable_end.strftime('%Y-%m-%d')}"
-            unavailable_stadiums.append((primary_stadium, team_city, 'Primary', reason))
-            
-            # Add the automatic alternative if not already processed
-            alt = STADIUM_UNAVAILABILITY[primary_stadium]['alternative']
-            if alt not in processed_stadiums:
-                processed_stadiums.add(alt)
-                if is_stadium_available(alt, match_date):
-                    is_booked, booking_info = is_stadium_booked_full_day(alt, match_date_str)
-                    if is_booked:
-                        reason = f"Booked for entire day on {match_date_str} ({booking_info['home_team']} vs {booking_info['away_team']} at {booking_info['time']})"
-                        unavailable_stadiums.append((alt, team_city, 'Alternative', reason))
-                    else:
-                        available_stadiums.append((alt, team_city, 'Alternative', True))
-    
-    # 2. Check alternative stadiums defined for the team
-    for alt_stadium in team_info['alternatives']:
-        if alt_stadium not in processed_stadiums:
-            processed_stadiums.add(alt_stadium)
-            
-            if is_stadium_available(alt_stadium, match_date):
-                is_booked, booking_info = is_stadium_booked_full_day(alt_stadium, match_date_str)
-                if is_booked:
-                    reason = f"Booked for entire day on {match_date_str} ({booking_info['home_team']} vs {booking_info['away_team']} at {booking_info['time']})"
-                    unavailable_stadiums.append((alt_stadium, team_city, 'Alternative', reason))
-                else:
-                    available_stadiums.append((alt_stadium, team_city, 'Alternative', True))
-            else:
-                # Get unavailability reason for alternative
-                if alt_stadium in STADIUM_UNAVAILABILITY:
-                    unavailable_start, unavailable_end = STADIUM_UNAVAILABILITY[alt_stadium]['unavailable']
-                    reason = f"Unavailable from {unavailable_start.strftime('%Y-%m-%d')} to {unavailable_end.strftime('%Y-%m-%d')}"
-                    unavailable_stadiums.append((alt_stadium, team_city, 'Alternative', reason))
-    
-    # 3. Add other stadiums in the same city
-    if team_city in CITY_STADIUMS:
-        for city_stadium in CITY_STADIUMS[team_city]:
-            if city_stadium not in processed_stadiums:
-                processed_stadiums.add(city_stadium)
-                
-                if is_stadium_available(city_stadium, match_date):
-                    is_booked, booking_info = is_stadium_booked_full_day(city_stadium, match_date_str)
-                    if is_booked:
-                        reason = f"Booked for entire day on {match_date_str} ({booking_info['home_team']} vs {booking_info['away_team']} at {booking_info['time']})"
-                        unavailable_stadiums.append((city_stadium, team_city, 'Other City Stadium', reason))
-                    else:
-                        available_stadiums.append((city_stadium, team_city, 'Other City Stadium', True))
-                else:
-                    # Check if this stadium has unavailability info
-                    if city_stadium in STADIUM_UNAVAILABILITY:
-                        unavailable_start, unavailable_end = STADIUM_UNAVAILABILITY[city_stadium]['unavailable']
-                        reason = f"Unavailable from {unavailable_start.strftime('%Y-%m-%d')} to {unavailable_end.strftime('%Y-%m-%d')}"
-                        unavailable_stadiums.append((city_stadium, team_city, 'Other City Stadium', reason))
-    
-    return available_stadiums, unavailable_stadiums
+    request = (team, match_date, current_match_id)
+    return get_available_stadiums_batch([request], scenario_manager)[request]
 
 
 def update_scenario_stadium(scenario, new_stadium, new_city):
-    """Update a scenario's stadium and city, and recalculate if needed."""
+    """Update a scenario's stadium and city (ScenarioManager.set_scenario_stadium re-predicts it)."""
     scenario.stadium = new_stadium
     scenario.city = new_city
-    # You may want to recalculate suitability_score, attendance, profit here
-    # based on the new stadium's capacity and other factors
     return scenario
 
 
@@ -654,31 +1339,521 @@ def get_alternative_stadium(stadium, match_date):
     Get the alternative stadium if the primary stadium is unavailable.
     Returns the original stadium if available, or the alternative.
     """
-    stadium_info = STADIUM_UNAVAILABILITY.get(stadium, {})
-    if stadium_info:
-        start_date, end_date = stadium_info['unavailable']
-        if start_date <= match_date <= end_date:
-            return stadium_info['alternative']
+    closure = get_stadium_calendar().closure_on(stadium, match_date)
+    if closure is not None and closure[2]:
+        return closure[2]
     return stadium
 
 
+MIN_REST_DAYS = 2  # Minimum days between two matches of the same team
+MAX_MATCHES_PER_DAY = 3
+
+
 def check_rest_period(schedule, team, match_date):
     """
     Ensure at least 2 days rest between matches for a team.
     Returns True if rest period is satisfied, False otherwise.
     """
-    min_rest_days = 2
+    min_rest_days = MIN_REST_DAYS
     for _, match in schedule.iterrows():
         if match['home_team'] == team or match['away_team'] == team:
             existing_date = pd.to_datetime(match['date']).date()
             if abs((match_date - existing_date).days) < min_rest_days:
                 return False
     return True
-@lru_cache(maxsize=1000)
-def get_prayer_times_unified(city, date, prayer='all'):
+
+
+# City names as understood by the Aladhan API (used by the optional API cross-check)
+PRAYER_API_CITY_MAPPING = {
+    'Riyadh': 'Riyadh', 'Jeddah': 'Jeddah', 'Dammam': 'Dammam', 'Buraydah': 'Buraydah',
+    'Al-Mubarraz': 'Al Mubarraz', 'Khamis Mushait': 'Khamis Mushait', 'Abha': 'Abha',
+    'Al Khobar': 'Al Khobar', 'Saihat': 'Saihat', 'Al-Majmaah': 'Al-Majmaah',
+    'Ar Rass': 'Ar Rass', 'Unaizah': 'Unaizah', 'NEOM': 'Tabuk'
+}
+
+# (latitude, longitude) for every city used by CITY_STADIUMS, TEAM_STADIUMS,
+# the teams data and PRAYER_API_CITY_MAPPING. All cities are on Arabia Standard Time (UTC+3).
+CITY_COORDINATES = {
+    'Riyadh': (24.7136, 46.6753),
+    'Jeddah': (21.4858, 39.1925),
+    'Dammam': (26.4207, 50.0888),
+    'Al Khobar': (26.2172, 50.1971),
+    'Saihat': (26.4834, 50.0418),
+    'Buraydah': (26.3260, 43.9750),
+    'Unaizah': (26.0840, 43.9940),
+    'Ar Rass': (25.8694, 43.4973),
+    'Al-Majmaah': (25.9039, 45.3456),
+    'Al-Ahsa': (25.3839, 49.5865),
+    'Al-Mubarraz': (25.4077, 49.5903),
+    'Khamis Mushait': (18.3060, 42.7297),
+    'Abha': (18.2164, 42.5053),
+    'Najran': (17.4924, 44.1277),
+    'Tabuk': (28.3835, 36.5662),
+    'NEOM': (28.3835, 36.5662),  # Same location the API is queried with (mapped to Tabuk)
+}
+SAUDI_UTC_OFFSET_HOURS = 3.0
+
+# Umm Al-Qura (Aladhan method 4): Fajr at 18.5 degrees, Isha 90 minutes after Maghrib
+# (120 minutes in Ramadan), Maghrib at sunset, Asr with the standard (Shafi'i) shadow factor of 1.
+UMM_AL_QURA_PARAMS = {
+    'fajr_angle': 18.5,
+    'isha_interval_minutes': 90,
+    'isha_interval_minutes_ramadan': 120,
+    'asr_shadow_factor': 1,
+    'sunset_angle': 0.833,
+}
+
+# First and last day of Ramadan in the Umm Al-Qura calendar for the seasons the app covers.
+# Other years fall back to the tabular (civil) Hijri calendar, which can be a day off.
+UMM_AL_QURA_RAMADAN = {
+    1446: (datetime.date(2025, 3, 1), datetime.date(2025, 3, 29)),
+    1447: (datetime.date(2026, 2, 18), datetime.date(2026, 3, 19)),
+}
+HIJRI_EPOCH_ORDINAL = datetime.date(622, 7, 19).toordinal()  # 1 Muharram 1 AH (civil epoch)
+
+# Set to True to compare every offline calculation against the Aladhan API
+PRAYER_TIMES_API_CROSS_CHECK = False
+PRAYER_TIMES_CROSS_CHECK_TOLERANCE_MINUTES = 2
+
+
+def _julian_day(year, month, day):
+    """Julian day number at 00:00 UTC for a Gregorian calendar date."""
+    if month <= 2:
+        year -= 1
+        month += 12
+    a = year // 100
+    b = 2 - a + a // 4
+    return math.floor(365.25 * (year + 4716)) + math.floor(30.6001 * (month + 1)) + day + b - 1524.5
+
+
+def _sun_position(jd):
+    """
+    Return (declination in degrees, equation of time in hours) for a Julian day.
+    Uses the low-precision solar coordinates from the U.S. Naval Observatory.
+    """
+    d = jd - 2451545.0
+    g = math.radians((357.529 + 0.98560028 * d) % 360)
+    q = (280.459 + 0.98564736 * d) % 360
+    ecliptic_lon = math.radians((q + 1.915 * math.sin(g) + 0.020 * math.sin(2 * g)) % 360)
+    obliquity = math.radians(23.439 - 0.00000036 * d)
+
+    right_ascension = math.degrees(math.atan2(math.cos(obliquity) * math.sin(ecliptic_lon), math.cos(ecliptic_lon))) / 15
+    equation_of_time = q / 15 - (right_ascension % 24)
+    declination = math.degrees(math.asin(math.sin(obliquity) * math.sin(ecliptic_lon)))
+    return declination, equation_of_time
+
+
+def _hijri_month_start(year, month):
+    """Ordinal of the first day of a month in the tabular Hijri calendar."""
+    return HIJRI_EPOCH_ORDINAL + math.ceil(29.5 * (month - 1)) + (year - 1) * 354 + (3 + 11 * year) // 30
+
+
+def gregorian_to_hijri(date):
+    """(year, month, day) of a datetime.date in the tabular (civil) Hijri calendar."""
+    ordinal = date.toordinal()
+    year = (30 * (ordinal - HIJRI_EPOCH_ORDINAL) + 10646) // 10631
+    while _hijri_month_start(year + 1, 1) <= ordinal:
+        year += 1
+    while _hijri_month_start(year, 1) > ordinal:
+        year -= 1
+    month = 12
+    while _hijri_month_start(year, month) > ordinal:
+        month -= 1
+    return year, month, ordinal - _hijri_month_start(year, month) + 1
+
+
+def is_ramadan(date):
+    """True when a datetime.date falls in Ramadan (Hijri month 9)."""
+    for first_day, last_day in UMM_AL_QURA_RAMADAN.values():
+        if first_day <= date <= last_day:
+            return True
+    year, month, _ = gregorian_to_hijri(date)
+    return month == 9 and year not in UMM_AL_QURA_RAMADAN
+
+
+def calculate_prayer_times_offline(city, date):
+    """
+    Calculate prayer times locally with the Umm Al-Qura method (no network access).
+
+    Args:
+        city (str): City name, must be a key of CITY_COORDINATES
+        date (datetime.date): Date to calculate prayer times for
+
+    Returns:
+        dict: Same structure as get_prayer_times_unified
+              {'timings': {'fajr': 'HH:MM', ...}, 'minutes': {'fajr_minutes': int, ...}}
+              or None if the city has no known coordinates
+    """
+    if city not in CITY_COORDINATES:
+        return None
+    latitude, longitude = CITY_COORDINATES[city]
+    lat_rad = math.radians(latitude)
+
+    # Julian day at local noon-ish reference, corrected for longitude
+    jd = _julian_day(date.year, date.month, date.day) - longitude / (15 * 24)
+
+    def mid_day(day_fraction):
+        _, equation_of_time = _sun_position(jd + day_fraction)
+        return (12 - equation_of_time) % 24
+
+    def sun_angle_time(angle, day_fraction, before_noon=False):
+        declination, _ = _sun_position(jd + day_fraction)
+        decl_rad = math.radians(declination)
+        noon = mid_day(day_fraction)
+        cos_hour_angle = (-math.sin(math.radians(angle)) - math.sin(decl_rad) * math.sin(lat_rad)) / (
+            math.cos(decl_rad) * math.cos(lat_rad))
+        hour_angle = math.degrees(math.acos(max(-1.0, min(1.0, cos_hour_angle)))) / 15
+        return noon - hour_angle if before_noon else noon + hour_angle
+
+    def asr_time(shadow_factor, day_fraction):
+        declination, _ = _sun_position(jd + day_fraction)
+        angle = -math.degrees(math.atan(1 / (shadow_factor + math.tan(math.radians(abs(latitude - declination))))))
+        return sun_angle_time(angle, day_fraction)
+
+    # One refinement iteration starting from rough default times (hours / 24)
+    fajr = sun_angle_time(UMM_AL_QURA_PARAMS['fajr_angle'], 5 / 24, before_noon=True)
+    dhuhr = mid_day(12 / 24)
+    asr = asr_time(UMM_AL_QURA_PARAMS['asr_shadow_factor'], 13 / 24)
+    maghrib = sun_angle_time(UMM_AL_QURA_PARAMS['sunset_angle'], 18 / 24)
+    isha_interval = UMM_AL_QURA_PARAMS['isha_interval_minutes_ramadan' if is_ramadan(date) else 'isha_interval_minutes']
+    isha = maghrib + isha_interval / 60
+
+    # Convert from local solar time to clock time
+    offset = SAUDI_UTC_OFFSET_HOURS - longitude / 15
+    hours = {'fajr': fajr, 'dhuhr': dhuhr, 'asr': asr, 'maghrib': maghrib, 'isha': isha}
+    minutes = {name: int(math.floor(((value + offset) % 24) * 60 + 0.5)) % 1440 for name, value in hours.items()}
+
+    return {
+        'timings': {name: minutes_to_time_string(value) for name, value in minutes.items()},
+        'minutes': {f"{name}_minutes": value for name, value in minutes.items()}
+    }
+
+
+def _parse_api_timings(timings):
+    """Convert an Aladhan 'timings' block into the unified prayer times structure."""
+    # Calendar endpoints append the timezone, e.g. "17:14 (+03)"
+    clean = {name: str(timings[name]).split(' ')[0] for name in ['Fajr', 'Dhuhr', 'Asr', 'Maghrib', 'Isha']}
+    return {
+        'timings': {
+            'fajr': clean['Fajr'], 'dhuhr': clean['Dhuhr'], 'asr': clean['Asr'],
+            'maghrib': clean['Maghrib'], 'isha': clean['Isha']
+        },
+        'minutes': {
+            'fajr_minutes': time_string_to_minutes(clean['Fajr']),
+            'dhuhr_minutes': time_string_to_minutes(clean['Dhuhr']),
+            'asr_minutes': time_string_to_minutes(clean['Asr']),
+            'maghrib_minutes': time_string_to_minutes(clean['Maghrib']),
+            'isha_minutes': time_string_to_minutes(clean['Isha'])
+        }
+    }
+
+
+# Aladhan API access - override the base URL (e.g. with a local stub server) via environment
+ALADHAN_API_BASE_URL = os.environ.get('ALADHAN_API_BASE_URL', 'http://api.aladhan.com/v1')
+PRAYER_API_MAX_WORKERS = 8
+PRAYER_API_MAX_RETRIES = 3
+PRAYER_API_BACKOFF_SECONDS = 0.5
+PRAYER_API_MIN_INTERVAL_SECONDS = 0.1  # Per-host rate limit (10 requests/second)
+
+
+class PrayerTimesFetcher:
+    """
+    Pooled HTTP client for the Aladhan API.
+    One keep-alive session is shared by a bounded thread pool; requests are retried
+    with exponential backoff and spaced out by a per-host rate limit.
+    """
+    def __init__(self, base_url=ALADHAN_API_BASE_URL, max_workers=PRAYER_API_MAX_WORKERS,
+                 max_retries=PRAYER_API_MAX_RETRIES, backoff_seconds=PRAYER_API_BACKOFF_SECONDS,
+                 min_interval_seconds=PRAYER_API_MIN_INTERVAL_SECONDS, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.timeout = timeout
+        self.request_count = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._next_request_at = {}  # {host: monotonic time of the next allowed request}
+
+    def _wait_for_rate_limit(self, url):
+        """Reserve the next request slot for the URL's host and sleep until it arrives."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_request_at.get(host, now))
+            self._next_request_at[host] = scheduled + self.min_interval_seconds
+        delay = scheduled - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_json(self, path, params=None):
+        """
+        GET an API path and return the decoded JSON body.
+        Connection errors, 429 and 5xx responses are retried; API errors are raised immediately.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_rate_limit(url)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                with self._lock:
+                    self.request_count += 1
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RequestException(f"HTTP {response.status_code}")
+                data = response.json()
+            except (RequestException, ValueError) as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff_seconds * (2 ** attempt))
+                continue
+
+            if response.status_code != 200 or data.get('code') != 200:
+                raise Exception(f"API error: Status {response.status_code}, Code {data.get('code')}, {data.get('status', 'Unknown error')}")
+            return data
+
+        raise Exception(f"API request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    @staticmethod
+    def _city_params(city):
+        return {'city': PRAYER_API_CITY_MAPPING.get(city, city), 'country': 'Saudi Arabia', 'method': 4}
+
+    def fetch_day(self, city, date):
+        """Prayer times for one city-day."""
+        data = self.get_json(f"timingsByCity/{date.strftime('%d-%m-%Y')}", self._city_params(city))
+        return _parse_api_timings(data['data']['timings'])
+
+    def fetch_month(self, city, year, month):
+        """A whole month for one city in a single calendar request: {datetime.date: prayer_times}."""
+        data = self.get_json(f"calendarByCity/{year}/{month}", self._city_params(city))
+        month_times = {}
+        for day in data['data']:
+            day_date = datetime.datetime.strptime(day['date']['gregorian']['date'], '%d-%m-%Y').date()
+            month_times[day_date] = _parse_api_timings(day['timings'])
+        return month_times
+
+    def _run_concurrently(self, function, keys):
+        """Call function(*key) for every key on the thread pool. Failures are returned as exceptions."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(function, *key): key for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    results[key] = e
+        return results
+
+    def fetch_days(self, city_dates):
+        """Fetch many (city, date) pairs concurrently: {(city, date): prayer_times or Exception}."""
+        return self._run_concurrently(self.fetch_day, set(city_dates))
+
+    def fetch_months(self, city_months):
+        """Fetch many (city, year, month) calendars concurrently: {key: month_times or Exception}."""
+        return self._run_concurrently(self.fetch_month, set(city_months))
+
+
+@st.cache_resource
+def get_prayer_times_fetcher():
+    """Process-wide Aladhan client so every session shares one connection pool."""
+    return PrayerTimesFetcher()
+
+
+def fetch_prayer_times_from_api(city, date):
     """
     Fetch prayer times for a given city and date from the Aladhan API using Umm Al-Qura method.
+    Returns the same structure as calculate_prayer_times_offline, raises on failure.
+    """
+    if isinstance(date, str):
+        date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+    return get_prayer_times_fetcher().fetch_day(city, date)
+
+
+def fetch_prayer_calendar_from_api(city, year, month):
+    """
+    Fetch a whole month of prayer times for a city in one Aladhan calendar request.
+    Returns {datetime.date: prayer_times}, raises on failure.
+    """
+    return get_prayer_times_fetcher().fetch_month(city, year, month)
+
+
+def cross_check_prayer_times(city, date, prayer_times, tolerance_minutes=PRAYER_TIMES_CROSS_CHECK_TOLERANCE_MINUTES):
+    """
+    Compare locally calculated prayer times against the Aladhan API.
+    Returns a dict {prayer: (offline, api)} of differences above the tolerance,
+    or None if the API could not be reached.
+    """
+    try:
+        api_times = fetch_prayer_times_from_api(city, date)
+    except Exception:
+        return None
+
+    differences = {}
+    for key, offline_minutes in prayer_times['minutes'].items():
+        api_minutes = api_times['minutes'].get(key)
+        if api_minutes is not None and abs(offline_minutes - api_minutes) > tolerance_minutes:
+            differences[key.replace('_minutes', '')] = (minutes_to_time_string(offline_minutes), minutes_to_time_string(api_minutes))
+    return differences
+
+
+PRAYER_TIMES_CACHE_PATH = 'prayer_times_cache.sqlite'
+PRAYER_TIMES_CACHE_TTL_DAYS = 60
+
+
+def get_prayer_times_method_signature():
+    """
+    Identify the calculation setup (method parameters and city coordinates).
+    Cached prayer times computed with a different signature are discarded.
+    """
+    payload = json.dumps({
+        'params': UMM_AL_QURA_PARAMS,
+        'coordinates': CITY_COORDINATES,
+        'utc_offset': SAUDI_UTC_OFFSET_HOURS
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class PrayerTimesCache:
+    """
+    Persistent prayer time cache stored in SQLite, keyed by normalized city + ISO date.
+    Shared by every session and survives Streamlit restarts.
+    """
+    def __init__(self, path=PRAYER_TIMES_CACHE_PATH, method_signature=None, ttl_days=PRAYER_TIMES_CACHE_TTL_DAYS):
+        self.path = path
+        self.method_signature = method_signature or get_prayer_times_method_signature()
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}  # {(city, iso_date): (created_at, prayer_times)}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prayer_times ("
+            "city TEXT NOT NULL, date TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (city, date))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._invalidate_on_method_change()
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_city(city):
+        """Normalize a city name so 'riyadh', ' Riyadh ' and 'Unknown' share one entry."""
+        city = re.sub(r'\s+', ' ', str(city or '').strip())
+        if not city or city == 'Unknown':
+            return 'Riyadh'
+        for known_city in CITY_COORDINATES:
+            if known_city.lower() == city.lower():
+                return known_city
+        return city
+
+    @staticmethod
+    def _key(city, date):
+        return PrayerTimesCache.normalize_city(city), date.isoformat()
+
+    def _invalidate_on_method_change(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'method_signature'").fetchone()
+        if row is None or row[0] != self.method_signature:
+            self._conn.execute("DELETE FROM prayer_times")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('method_signature', ?)",
+                (self.method_signature,)
+            )
+            self._memory.clear()
+
+    def warm_up(self):
+        """Load every non-expired entry into memory. Returns the number of entries loaded."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT city, date, payload, created_at FROM prayer_times WHERE created_at >= ?", (cutoff,)
+            ).fetchall()
+            for city, date_iso, payload, created_at in rows:
+                self._memory[(city, date_iso)] = (created_at, json.loads(payload))
+        return len(rows)
+
+    def get(self, city, date):
+        """Return cached prayer times or None (counted as a miss)."""
+        key = self._key(city, date)
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] >= cutoff:
+                self.hits += 1
+                return entry[1]
+            self._memory.pop(key, None)  # Missing or expired here; another process may have refreshed the disk entry
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM prayer_times WHERE city = ? AND date = ? AND created_at >= ?",
+                (key[0], key[1], cutoff)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            prayer_times = json.loads(row[0])
+            self._memory[key] = (row[1], prayer_times)
+            return prayer_times
+
+    def put(self, city, date, prayer_times):
+        """Store prayer times for one city-day."""
+        self.put_many([(city, date, prayer_times)])
+
+    def put_many(self, entries):
+        """Store many (city, date, prayer_times) entries in one transaction."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for city, date, prayer_times in entries:
+                key = self._key(city, date)
+                self._memory[key] = (now, prayer_times)
+                rows.append((key[0], key[1], json.dumps(prayer_times), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prayer_times (city, date, payload, created_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached entry and reset counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM prayer_times")
+            self._conn.commit()
+            self._memory.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+            'entries': len(self._memory)
+        }
+
+
+@st.cache_resource
+def get_prayer_times_cache():
+    """Process-wide prayer time cache, warmed up from disk on first use."""
+    cache = PrayerTimesCache()
+    cache.warm_up()
+    return cache
+
+
+def get_prayer_times_unified(city, date, prayer='all'):
+    """
+    Get prayer times for a given city and date using the Umm Al-Qura method.
+    Times are calculated locally; the Aladhan API is only used as an optional cross-check
+    (PRAYER_TIMES_API_CROSS_CHECK) or for cities without known coordinates.
     Map 'Unknown' city to 'Riyadh' and handle invalid dates with fallbacks.
+    `prayer` is kept for compatibility; all prayers are always returned and it is not
+    part of any cache key.
     """
     if city == 'Unknown':
         city = 'Riyadh'
@@ -688,59 +1863,56 @@ def get_prayer_times_unified(city, date, prayer='all'):
         date = datetime.date.today()
         st.warning(f"No date provided for prayer times. Using today's date: {date}")
 
-    city_mapping = {
-        'Riyadh': 'Riyadh', 'Jeddah': 'Jeddah', 'Dammam': 'Dammam', 'Buraydah': 'Buraydah',
-        'Al-Mubarraz': 'Al Mubarraz', 'Khamis Mushait': 'Khamis Mushait', 'Abha': 'Abha',
-        'Al Khobar': 'Al Khobar', 'Saihat': 'Saihat', 'Al-Majmaah': 'Al-Majmaah',
-        'Ar Rass': 'Ar Rass', 'Unaizah': 'Unaizah', 'NEOM': 'Tabuk'
-    }
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    elif isinstance(date, str):
+        date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+
+    return _get_prayer_times_for_day(PrayerTimesCache.normalize_city(city), date)
+
+
+def _get_prayer_times_for_day(city, date):
+    """
+    Resolve prayer times for a normalized city and datetime.date. PrayerTimesCache is the
+    only cache layer, so its TTL and hit/miss counters cover every lookup.
+    """
+    cache = get_prayer_times_cache()
+    cached = cache.get(city, date)
+    if cached is not None:
+        return cached
 
     # Fallback times only for when API completely fails
     jeddah_fallback_times = {
         'fajr': '04:45', 'dhuhr': '12:00', 'asr': '15:30', 'maghrib': '17:45', 'isha': '19:15'
     }
-    
+
     riyadh_fallback_times = {
         'fajr': '05:35', 'dhuhr': '12:15', 'asr': '15:25', 'maghrib': '17:35', 'isha': '19:05'
     }
 
-    api_city = city_mapping.get(city, city)
-    date_str = date.strftime('%d-%m-%Y') if isinstance(date, (datetime.date, datetime.datetime)) else str(date)
+    date_str = date.strftime('%d-%m-%Y')
+
+    prayer_times = calculate_prayer_times_offline(city, date)
+    if prayer_times is not None:
+        if PRAYER_TIMES_API_CROSS_CHECK:
+            differences = cross_check_prayer_times(city, date, prayer_times)
+            if differences is None:
+                st.warning(f"Prayer time cross-check skipped for {city} on {date_str}: API unreachable.")
+            elif differences:
+                st.warning(f"Offline prayer times for {city} on {date_str} differ from the API (offline, api): {differences}")
+        cache.put(city, date, prayer_times)
+        return prayer_times
 
     try:
-        # Try the API first, regardless of how far in the future the date is
-        url = f"http://api.aladhan.com/v1/timingsByCity/{date_str}?city={api_city}&country=Saudi%20Arabia&method=4"
-        # st.write(f"Trying API call: {url}")  # Debug info
-        response = requests.get(url, timeout=10)
-        data = response.json()
-
-        if response.status_code == 200 and data.get('code') == 200:
-            # API call successful
-            timings = data['data']['timings']
-            prayer_times = {
-                'timings': {
-                    'fajr': timings['Fajr'], 'dhuhr': timings['Dhuhr'], 'asr': timings['Asr'],
-                    'maghrib': timings['Maghrib'], 'isha': timings['Isha']
-                },
-                'minutes': {
-                    'fajr_minutes': time_string_to_minutes(timings['Fajr']),
-                    'dhuhr_minutes': time_string_to_minutes(timings['Dhuhr']),
-                    'asr_minutes': time_string_to_minutes(timings['Asr']),
-                    'maghrib_minutes': time_string_to_minutes(timings['Maghrib']),
-                    'isha_minutes': time_string_to_minutes(timings['Isha'])
-                }
-            }
-            # st.write(f"API success for {city} on {date_str}: Maghrib={timings['Maghrib']}, Isha={timings['Isha']}")
-            return prayer_times
-        else:
-            # API returned an error response
-            st.warning(f"API returned error for {city} on {date_str}: Status {response.status_code}, Code {data.get('code')}")
-            raise Exception(f"API error: {data.get('status', 'Unknown error')}")
+        # City has no known coordinates - ask the API
+        prayer_times = fetch_prayer_times_from_api(city, date)
+        cache.put(city, date, prayer_times)
+        return prayer_times
 
     except Exception as e:
         # API call failed completely
         st.error(f"API call failed for {city} on {date_str}: {e}")
-        
+
         # Use fallback times only as last resort
         if city == 'Jeddah':
             st.warning(f"Using fallback prayer times for Jeddah on {date_str}.")
@@ -758,6 +1930,97 @@ def get_prayer_times_unified(city, date, prayer='all'):
             # For other cities, return error
             return {'error': f'No fallback times available for {city} on {date_str}'}
 
+def collect_prayer_time_requests(week_start_dates, cities=None, days_per_week=3):
+    """
+    Build the set of (city, date) pairs needed for a season.
+
+    Args:
+        week_start_dates (dict): {week: first day of the week}
+        cities (iterable): Cities to include, defaults to every home city in TEAM_STADIUMS
+        days_per_week (int): Number of match days per week starting at the week start
+
+    Returns:
+        set: {(city, datetime.date), ...}
+    """
+    if cities is None:
+        cities = {info['city'] for info in TEAM_STADIUMS.values()}
+    pairs = set()
+    for start in week_start_dates.values():
+        for offset in range(days_per_week):
+            day = start + datetime.timedelta(days=offset)
+            for city in cities:
+                pairs.add((city, day))
+    return pairs
+
+
+def prefetch_prayer_times(city_dates):
+    """
+    Fill the prayer time cache for many (city, date) pairs before generation or export.
+    Pairs already cached are skipped, cities with coordinates are computed locally and
+    the rest are fetched one month per city with the Aladhan calendar endpoint.
+
+    Returns:
+        dict: {'requested', 'cached', 'computed', 'fetched', 'failed'} counts, plus
+              'cross_check_differences' when PRAYER_TIMES_API_CROSS_CHECK finds any
+    """
+    cache = get_prayer_times_cache()
+    summary = {'requested': 0, 'cached': 0, 'computed': 0, 'fetched': 0, 'failed': 0}
+
+    # Group missing days by (city, year, month)
+    missing_by_month = {}
+    for city, day in set(city_dates):
+        if isinstance(day, datetime.datetime):
+            day = day.date()
+        elif isinstance(day, str):
+            day = datetime.datetime.strptime(day, '%Y-%m-%d').date()
+        city = PrayerTimesCache.normalize_city(city)
+        summary['requested'] += 1
+        if cache.get(city, day) is not None:
+            summary['cached'] += 1
+            continue
+        missing_by_month.setdefault((city, day.year, day.month), set()).add(day)
+
+    computed_entries = []
+    api_months = []
+    for (city, year, month), days in missing_by_month.items():
+        if city in CITY_COORDINATES:
+            for day in days:
+                computed_entries.append((city, day, calculate_prayer_times_offline(city, day)))
+            summary['computed'] += len(days)
+        else:
+            api_months.append((city, year, month))
+
+    # Remaining cities: one calendar request per city-month, fetched concurrently
+    if api_months:
+        fetched_months = get_prayer_times_fetcher().fetch_months(api_months)
+        for key, month_times in fetched_months.items():
+            days = missing_by_month[key]
+            if isinstance(month_times, Exception):
+                st.warning(f"Could not prefetch prayer times for {key[0]} ({key[1]}-{key[2]:02d}): {month_times}")
+                summary['failed'] += len(days)
+                continue
+            # Store the whole month - neighbouring days are usually needed next
+            cache.put_many([(key[0], day, times) for day, times in month_times.items()])
+            summary['fetched'] += len(days & set(month_times))
+            summary['failed'] += len(days - set(month_times))
+
+    # Optional cross-check of the locally computed months against the API
+    if PRAYER_TIMES_API_CROSS_CHECK and computed_entries:
+        computed_months = {(city, day.year, day.month) for city, day, _ in computed_entries}
+        api_calendars = get_prayer_times_fetcher().fetch_months(computed_months)
+        for city, day, prayer_times in computed_entries:
+            month_times = api_calendars.get((city, day.year, day.month))
+            if not isinstance(month_times, dict) or day not in month_times:
+                continue
+            for key, offline_minutes in prayer_times['minutes'].items():
+                if abs(offline_minutes - month_times[day]['minutes'][key]) > PRAYER_TIMES_CROSS_CHECK_TOLERANCE_MINUTES:
+                    summary.setdefault('cross_check_differences', []).append((city, day.isoformat(), key))
+
+    if computed_entries:
+        cache.put_many(computed_entries)
+    return summary
+
+
 def time_string_to_minutes(time_str):
     """
     Convert time string (HH:MM) to minutes since midnight
@@ -799,7 +2062,46 @@ def minutes_to_time_string(total_minutes):
         return f"{hours:02d}:{minutes:02d}"
     except:
         return "00:00"
-def round_time_smart(time_minutes, asr_minutes, maghrib_minutes, isha_minutes):
+MATCH_DURATION_MINUTES = 120
+HALFTIME_START_MINUTES = 45   # End of first half
+HALFTIME_END_MINUTES = 75     # Start of second half
+MANDATORY_SLOT_MINUTES = [20 * 60 + 30, 21 * 60]  # 20:30 and 21:00, never rounded
+
+
+class SlotTrace:
+    """
+    Structured record of how the match slots of one city-day were derived.
+    Every event is also sent to the module logger at DEBUG level.
+    """
+    def __init__(self, city=None, match_date=None):
+        self.city = city
+        self.match_date = match_date
+        self.events = []  # [{'step': str, 'message': str, ...details}]
+
+    def add(self, step, message, **details):
+        self.events.append({'step': step, 'message': message, **details})
+        logger.debug("%s %s: %s", self.city or '', self.match_date or '', message)
+
+    def to_lines(self):
+        return [event['message'] for event in self.events]
+
+
+def find_prayer_conflict(start_minutes, asr_minutes, maghrib_minutes, isha_minutes):
+    """
+    Return the name of the prayer that falls during a match starting at start_minutes,
+    or None. Prayers that fall during halftime are not conflicts.
+    """
+    match_end = start_minutes + MATCH_DURATION_MINUTES
+    for prayer_name, prayer_time in [('Asr', asr_minutes), ('Maghrib', maghrib_minutes), ('Isha', isha_minutes)]:
+        if start_minutes <= prayer_time <= match_end:
+            halftime_start = start_minutes + HALFTIME_START_MINUTES
+            halftime_end = start_minutes + HALFTIME_END_MINUTES
+            if not (halftime_start <= prayer_time <= halftime_end):
+                return prayer_name
+    return None
+
+
+def round_time_smart(time_minutes, asr_minutes, maghrib_minutes, isha_minutes, trace=None):
     """
     Smart rounding of match time to nearest 5-minute interval based on prayer conflicts.
     Rounds to: :00, :05, :10, :15, :20, :25, :30, :35, :40, :45, :50, :55
@@ -810,17 +2112,21 @@ def round_time_smart(time_minutes, asr_minutes, maghrib_minutes, isha_minutes):
         asr_minutes: Asr prayer time in minutes
         maghrib_minutes: Maghrib prayer time in minutes
         isha_minutes: Isha prayer time in minutes
+        trace: Optional SlotTrace receiving the rounding decisions
     
     Returns:
         Rounded time in minutes
     """
+    if trace is None:
+        trace = SlotTrace()
+
     # Extract the minute component
     minute_part = time_minutes % 60
     hour_part = time_minutes - minute_part
     
     # Check if already at a 5-minute interval
     if minute_part % 5 == 0:
-        st.write(f"DEBUG: Time already at 5-min interval :{minute_part:02d}")
+        trace.add('round', f"Time already at 5-min interval :{minute_part:02d}", time=time_minutes)
         return time_minutes
     
     # Calculate nearest 5-minute intervals
@@ -840,43 +2146,195 @@ def round_time_smart(time_minutes, asr_minutes, maghrib_minutes, isha_minutes):
         (upper_hour_part + upper_interval, f":{upper_interval:02d}", "UP")
     ]
     
-    st.write(f"DEBUG: Minute :{minute_part:02d} → trying DOWN to :{lower_interval:02d} first, then UP to :{upper_interval:02d}")
+    trace.add('round', f"Minute :{minute_part:02d} → trying DOWN to :{lower_interval:02d} first, then UP to :{upper_interval:02d}", time=time_minutes)
     
     # Check each option for prayer conflicts
     for rounded_time, label, direction in options:
-        match_end = rounded_time + 120  # 2-hour match duration
-        
-        # Check if any prayer falls during the match
-        has_conflict = False
-        conflict_prayer = None
-        for prayer_name, prayer_time in [('Asr', asr_minutes), ('Maghrib', maghrib_minutes), ('Isha', isha_minutes)]:
-            if rounded_time <= prayer_time <= match_end:
-                # Prayer falls during match - check if it's in halftime
-                halftime_start = rounded_time + 45  # End of first half
-                halftime_end = rounded_time + 75    # Start of second half
-                
-                if not (halftime_start <= prayer_time <= halftime_end):
-                    # Prayer is NOT during halftime - this is a conflict
-                    has_conflict = True
-                    conflict_prayer = prayer_name
-                    break
-        
-        if not has_conflict:
-            st.write(f"DEBUG: ✅ Rounded {direction} to {label} - no conflicts")
+        conflict_prayer = find_prayer_conflict(rounded_time, asr_minutes, maghrib_minutes, isha_minutes)
+        if conflict_prayer is None:
+            trace.add('round', f"✅ Rounded {direction} to {label} - no conflicts", time=rounded_time)
             return rounded_time
-        else:
-            st.write(f"DEBUG: ❌ Rounding {direction} to {label} causes conflict with {conflict_prayer}")
+        trace.add('round', f"❌ Rounding {direction} to {label} causes conflict with {conflict_prayer}", time=rounded_time, prayer=conflict_prayer)
     
     # If both options conflict, keep original time
-    st.write(f"DEBUG: ⚠️ Both DOWN and UP rounding options conflict - keeping original :{minute_part:02d}")
+    trace.add('round', f"⚠️ Both DOWN and UP rounding options conflict - keeping original :{minute_part:02d}", time=time_minutes)
     return time_minutes
 
 
+def compute_match_slots(asr_minutes, maghrib_minutes, isha_minutes, trace=None):
+    """
+    Pure slot engine: calculate up to FOUR match start times for one city-day.
+    Slots: Maghrib - 51 min and Isha - 51 min (smart-rounded), 20:30 and 21:00 (mandatory),
+    topped up with an Asr gap slot and alternative times when fewer than four are valid.
+    No Streamlit calls, so it can run from batch jobs and benchmarks.
+
+    Args:
+        asr_minutes, maghrib_minutes, isha_minutes: Prayer times in minutes since midnight
+        trace: Optional SlotTrace to append to (a new one is created otherwise)
+
+    Returns:
+        tuple: (sorted list of slot start minutes, SlotTrace)
+    """
+    if trace is None:
+        trace = SlotTrace()
+
+    # Generate initial slots: Maghrib - 51 min, Isha - 51 min, 20:30 (mandatory), 21:00 (mandatory)
+    trace.add('candidate', f"Before rounding - Maghrib slot: {minutes_to_time_string(maghrib_minutes - 51)}")
+    maghrib_slot = round_time_smart(maghrib_minutes - 51, asr_minutes, maghrib_minutes, isha_minutes, trace) % 1440
+    trace.add('candidate', f"Before rounding - Isha slot: {minutes_to_time_string(isha_minutes - 51)}")
+    isha_slot = round_time_smart(isha_minutes - 51, asr_minutes, maghrib_minutes, isha_minutes, trace) % 1440
+
+    # Check for prayer conflicts in each slot; mandatory slots are kept despite conflicts
+    valid_slots = []
+    for start_minutes in [maghrib_slot, isha_slot] + MANDATORY_SLOT_MINUTES:
+        conflict_prayer = find_prayer_conflict(start_minutes, asr_minutes, maghrib_minutes, isha_minutes)
+        if conflict_prayer is None:
+            valid_slots.append(start_minutes)
+            trace.add('validate', f"✅ {minutes_to_time_string(start_minutes)} is VALID", slot=start_minutes)
+        elif start_minutes in MANDATORY_SLOT_MINUTES:
+            valid_slots.append(start_minutes)
+            trace.add('validate', f"⚠️ {minutes_to_time_string(start_minutes)} is MANDATORY (added despite {conflict_prayer} conflict)", slot=start_minutes, prayer=conflict_prayer)
+        else:
+            trace.add('validate', f"{minutes_to_time_string(start_minutes)} conflicts with {conflict_prayer}", slot=start_minutes, prayer=conflict_prayer)
+
+    # Fill to exactly 4 slots if needed
+    if len(valid_slots) < 4 and maghrib_minutes - asr_minutes >= 150:
+        gap_start = round_time_smart(asr_minutes + 30, asr_minutes, maghrib_minutes, isha_minutes, trace)
+        gap_conflict = find_prayer_conflict(gap_start, asr_minutes, maghrib_minutes, isha_minutes)
+        if gap_conflict is None and gap_start % 1440 not in valid_slots:
+            valid_slots.append(gap_start % 1440)
+            trace.add('fill', f"Added gap slot {minutes_to_time_string(gap_start)}", slot=gap_start % 1440)
+
+    # If we still need more slots, try alternative times with rounding
+    if len(valid_slots) < 4:
+        alternative_times = [
+            isha_minutes - 60,  # Isha - 60 min
+            maghrib_minutes - 30,  # Maghrib - 30 min
+            asr_minutes + 60  # Asr + 60 min
+        ]
+        for alt_time in alternative_times:
+            if len(valid_slots) >= 4:
+                break
+            alt_time_rounded = round_time_smart(alt_time, asr_minutes, maghrib_minutes, isha_minutes, trace)
+            if alt_time_rounded % 1440 in valid_slots:
+                continue
+            if find_prayer_conflict(alt_time_rounded, asr_minutes, maghrib_minutes, isha_minutes) is None:
+                valid_slots.append(alt_time_rounded % 1440)
+                trace.add('fill', f"Added alternative slot {minutes_to_time_string(alt_time_rounded)}", slot=alt_time_rounded % 1440)
+
+    # Sort and limit to 4 slots
+    slots = sorted(set(valid_slots))[:4]
+    trace.add('result', f"Final match slots: {[minutes_to_time_string(slot) for slot in slots]}", slots=slots)
+    return slots, trace
+
+
+def _find_prayer_conflicts_batch(start_minutes, asr_minutes, maghrib_minutes, isha_minutes):
+    """Vectorized find_prayer_conflict: boolean array, True where a prayer falls outside halftime."""
+    conflict = np.zeros(start_minutes.shape, dtype=bool)
+    for prayer_time in (asr_minutes, maghrib_minutes, isha_minutes):
+        during_match = (start_minutes <= prayer_time) & (prayer_time <= start_minutes + MATCH_DURATION_MINUTES)
+        in_halftime = (start_minutes + HALFTIME_START_MINUTES <= prayer_time) & (prayer_time <= start_minutes + HALFTIME_END_MINUTES)
+        conflict |= during_match & ~in_halftime
+    return conflict
+
+
+def _round_time_smart_batch(time_minutes, asr_minutes, maghrib_minutes, isha_minutes):
+    """Vectorized round_time_smart: DOWN to the 5-minute mark first, then UP, else keep the original."""
+    minute_part = np.mod(time_minutes, 60)
+    rounded_down = time_minutes - minute_part + (minute_part // 5) * 5
+    rounded_up = rounded_down + 5  # :55 + 5 rolls into the next hour, like the scalar version
+    down_ok = ~_find_prayer_conflicts_batch(rounded_down, asr_minutes, maghrib_minutes, isha_minutes)
+    up_ok = ~_find_prayer_conflicts_batch(rounded_up, asr_minutes, maghrib_minutes, isha_minutes)
+    rounded = np.where(down_ok, rounded_down, np.where(up_ok, rounded_up, time_minutes))
+    return np.where(minute_part % 5 == 0, time_minutes, rounded)
+
+
+def compute_match_slots_batch(asr_minutes, maghrib_minutes, isha_minutes):
+    """
+    Vectorized compute_match_slots for many city-days at once (e.g. a whole season, all cities).
+    Applies the same rules as the scalar engine - Maghrib/Isha - 51 with smart rounding,
+    mandatory 20:30/21:00, halftime prayer exemption, gap and alternative fill - as array operations.
+
+    Args:
+        asr_minutes, maghrib_minutes, isha_minutes: Array-likes of prayer minutes, one entry per city-day
+
+    Returns:
+        np.ndarray of shape (n, 4) with sorted slot start minutes per row, padded with -1
+    """
+    asr = np.asarray(asr_minutes, dtype=np.int64).ravel()
+    maghrib = np.asarray(maghrib_minutes, dtype=np.int64).ravel()
+    isha = np.asarray(isha_minutes, dtype=np.int64).ravel()
+    n = asr.shape[0]
+
+    # Up to 8 candidates per row: 2 prayer slots, 2 mandatory, 1 gap, 3 alternatives
+    candidates = np.full((n, 8), -1, dtype=np.int64)
+    accepted = np.zeros((n, 8), dtype=bool)
+
+    maghrib_slot = np.mod(_round_time_smart_batch(maghrib - 51, asr, maghrib, isha), 1440)
+    isha_slot = np.mod(_round_time_smart_batch(isha - 51, asr, maghrib, isha), 1440)
+    candidates[:, 0], candidates[:, 1] = maghrib_slot, isha_slot
+    candidates[:, 2], candidates[:, 3] = MANDATORY_SLOT_MINUTES
+    # A computed slot landing exactly on a mandatory time is kept even if it conflicts
+    for column, slot in ((0, maghrib_slot), (1, isha_slot)):
+        accepted[:, column] = ~_find_prayer_conflicts_batch(slot, asr, maghrib, isha) | np.isin(slot, MANDATORY_SLOT_MINUTES)
+    accepted[:, 2:4] = True
+    # Duplicates count towards the four-slot target, exactly like the scalar list
+    slot_count = accepted.sum(axis=1)
+
+    def already_accepted(values):
+        return ((candidates == values[:, None]) & accepted).any(axis=1)
+
+    # Gap slot after Asr when the afternoon window is wide enough
+    gap_start = _round_time_smart_batch(asr + 30, asr, maghrib, isha)
+    gap_wrapped = np.mod(gap_start, 1440)
+    take = ((slot_count < 4) & (maghrib - asr >= 150)
+            & ~_find_prayer_conflicts_batch(gap_start, asr, maghrib, isha) & ~already_accepted(gap_wrapped))
+    candidates[:, 4] = gap_wrapped
+    accepted[:, 4] = take
+    slot_count += take
+
+    # Alternative times, in priority order, while fewer than four slots
+    for column, alt_time in enumerate((isha - 60, maghrib - 30, asr + 60), start=5):
+        alt_rounded = _round_time_smart_batch(alt_time, asr, maghrib, isha)
+        alt_wrapped = np.mod(alt_rounded, 1440)
+        take = ((slot_count < 4) & ~already_accepted(alt_wrapped)
+                & ~_find_prayer_conflicts_batch(alt_rounded, asr, maghrib, isha))
+        candidates[:, column] = alt_wrapped
+        accepted[:, column] = take
+        slot_count += take
+
+    # Sort, de-duplicate and keep the first four per row
+    sentinel = np.iinfo(np.int64).max
+    ordered = np.sort(np.where(accepted, candidates, sentinel), axis=1)
+    ordered[:, 1:][ordered[:, 1:] == ordered[:, :-1]] = sentinel
+    ordered = np.sort(ordered, axis=1)[:, :4]
+    ordered[ordered == sentinel] = -1
+    return ordered
+
+
+def record_slot_trace(trace):
+    """Keep the trace for the opt-in trace panel when it is enabled in the sidebar."""
+    if st.session_state.get('show_slot_trace', False):
+        traces = st.session_state.setdefault('slot_traces', [])
+        traces.append(trace)
+        del traces[:-200]  # Keep only the most recent traces
+
+
 def calculate_match_times_for_city_and_date(city, match_date, teams_data=None):
     """
     Enhanced version with smart time rounding to nearest 5-minute interval for ALL times.
     Calculates FOUR match start times per day: Maghrib - 51 min, Isha - 51 min, 20:30 (mandatory), and 21:00 (mandatory).
     Ensures matches avoid prayer times or place prayers in halftime.
+    Results are memoized per (city, date, rule version) in the shared SlotTable.
+    """
+    return get_slot_table().get(city, match_date)
+
+
+def _calculate_match_times_uncached(city, match_date):
+    """
+    Calculate the slots of one city-day with the scalar engine.
+    The slot rules live in compute_match_slots; debug output goes to the logger and,
+    when enabled, the slot trace panel.
     """
     result = {
         "asr_time": None,
@@ -904,139 +2362,119 @@ def calculate_match_times_for_city_and_date(city, match_date, teams_data=None):
     maghrib_minutes = time_string_to_minutes(result["maghrib_time"])
     isha_minutes = time_string_to_minutes(result["isha_time"])
 
-    st.write(f"DEBUG: Prayer times for {city} on {match_date}:")
-    st.write(f"  Maghrib: {result['maghrib_time']} = {maghrib_minutes} minutes")
-    st.write(f"  Isha: {result['isha_time']} = {isha_minutes} minutes")
+    trace = SlotTrace(city, match_date)
+    trace.add('prayers', f"Prayer times: Asr {result['asr_time']}, Maghrib {result['maghrib_time']}, Isha {result['isha_time']}")
+    slots, trace = compute_match_slots(asr_minutes, maghrib_minutes, isha_minutes, trace)
+    record_slot_trace(trace)
 
-    # Generate initial slots: Maghrib - 51 min, Isha - 51 min, 20:30 (mandatory), 21:00 (mandatory)
-    maghrib_slot_minutes = maghrib_minutes - 51
-    isha_slot_minutes = isha_minutes - 51
-    mandatory_slot_2030_minutes = time_string_to_minutes("20:30")  # NEW: 20:30 mandatory
-    mandatory_slot_2100_minutes = time_string_to_minutes("21:00")  # Existing 21:00 mandatory
-    
-    # Apply smart rounding to calculated slots (NOT to mandatory slots)
-    st.write(f"DEBUG: Before rounding - Maghrib slot: {minutes_to_time_string(maghrib_slot_minutes)}")
-    maghrib_slot_minutes = round_time_smart(maghrib_slot_minutes, asr_minutes, maghrib_minutes, isha_minutes)
-    st.write(f"DEBUG: After rounding - Maghrib slot: {minutes_to_time_string(maghrib_slot_minutes)}")
-    
-    st.write(f"DEBUG: Before rounding - Isha slot: {minutes_to_time_string(isha_slot_minutes)}")
-    isha_slot_minutes = round_time_smart(isha_slot_minutes, asr_minutes, maghrib_minutes, isha_minutes)
-    st.write(f"DEBUG: After rounding - Isha slot: {minutes_to_time_string(isha_slot_minutes)}")
-    
-    # Mandatory slots are NOT rounded
-    st.write(f"DEBUG: Mandatory slot 20:30 - NOT ROUNDED (mandatory)")
-    st.write(f"DEBUG: Mandatory slot 21:00 - NOT ROUNDED (mandatory)")
-    
-    maghrib_slot = minutes_to_time_string(maghrib_slot_minutes)
-    isha_slot = minutes_to_time_string(isha_slot_minutes)
-    mandatory_slot_2030 = minutes_to_time_string(mandatory_slot_2030_minutes)
-    mandatory_slot_2100 = minutes_to_time_string(mandatory_slot_2100_minutes)
+    result["match_slots"] = [minutes_to_time_string(slot) for slot in slots]
+    return result
 
-    st.write(f"DEBUG: All match slots:")
-    st.write(f"  Maghrib slot: {maghrib_slot} (rounded)")
-    st.write(f"  Isha slot: {isha_slot} (rounded)")
-    st.write(f"  Mandatory slot: {mandatory_slot_2030} (NOT rounded)")
-    st.write(f"  Mandatory slot: {mandatory_slot_2100} (NOT rounded)")
 
-    candidate_slots = [maghrib_slot, isha_slot, mandatory_slot_2030, mandatory_slot_2100]
+SLOT_RULES_VERSION = 1  # Bump whenever the slot rules in compute_match_slots change
 
-    # Check for prayer conflicts in each slot
-    valid_slots = []
-    for start_time in candidate_slots:
-        start_minutes = time_string_to_minutes(start_time)
-        end_minutes = start_minutes + 120  # 2-hour match
-        prayer_conflict = False
-        conflict_prayer = None
-        
-        for prayer_name, prayer_minutes in [('Asr', asr_minutes), ('Maghrib', maghrib_minutes), ('Isha', isha_minutes)]:
-            if start_minutes <= prayer_minutes <= end_minutes:
-                halftime_start = start_minutes + 45
-                halftime_end = start_minutes + 75
-                
-                if not (halftime_start <= prayer_minutes <= halftime_end):
-                    prayer_conflict = True
-                    conflict_prayer = prayer_name
-                    st.write(f"DEBUG: {start_time} conflicts with {prayer_name}")
-                    break
-        
-        if not prayer_conflict:
-            valid_slots.append(start_time)
-            st.write(f"DEBUG: ✅ {start_time} is VALID")
-        else:
-            # For mandatory slots, still add them even if they conflict (just note the conflict)
-            if start_time in [mandatory_slot_2030, mandatory_slot_2100]:
-                valid_slots.append(start_time)
-                st.write(f"DEBUG: ⚠️ {start_time} is MANDATORY (added despite {conflict_prayer} conflict)")
 
-    # Fill to exactly 4 slots if needed
-    if len(valid_slots) < 4:
-        gap_available = maghrib_minutes - asr_minutes
-        if gap_available >= 150:
-            gap_start = asr_minutes + 30
-            
-            # Apply smart rounding to gap slot too
-            st.write(f"DEBUG: Before rounding - Gap slot: {minutes_to_time_string(gap_start)}")
-            gap_start = round_time_smart(gap_start, asr_minutes, maghrib_minutes, isha_minutes)
-            st.write(f"DEBUG: After rounding - Gap slot: {minutes_to_time_string(gap_start)}")
-            
-            gap_time = minutes_to_time_string(gap_start)
-            
-            # Verify no conflict with this gap slot
-            gap_end = gap_start + 120
-            gap_conflict = False
-            for prayer_minutes in [asr_minutes, maghrib_minutes, isha_minutes]:
-                if gap_start <= prayer_minutes <= gap_end:
-                    halftime_start = gap_start + 45
-                    halftime_end = gap_start + 75
-                    if not (halftime_start <= prayer_minutes <= halftime_end):
-                        gap_conflict = True
-                        break
-            
-            if not gap_conflict and gap_time not in valid_slots:
-                valid_slots.append(gap_time)
-                st.write(f"DEBUG: Added gap slot {gap_time}")
-    
-    # If we still need more slots, try alternative times with rounding
-    if len(valid_slots) < 4:
-        alternative_times = [
-            isha_minutes - 60,  # Isha - 60 min
-            maghrib_minutes - 30,  # Maghrib - 30 min
-            asr_minutes + 60  # Asr + 60 min
-        ]
-        
-        for alt_time in alternative_times:
-            if len(valid_slots) >= 4:
-                break
-            
-            # Apply smart rounding to alternative times
-            st.write(f"DEBUG: Before rounding - Alternative slot: {minutes_to_time_string(alt_time)}")
-            alt_time_rounded = round_time_smart(alt_time, asr_minutes, maghrib_minutes, isha_minutes)
-            st.write(f"DEBUG: After rounding - Alternative slot: {minutes_to_time_string(alt_time_rounded)}")
-            
-            alt_time_str = minutes_to_time_string(alt_time_rounded)
-            
-            if alt_time_str not in valid_slots:
-                # Check for conflicts
-                alt_end = alt_time_rounded + 120
-                alt_conflict = False
-                for prayer_minutes in [asr_minutes, maghrib_minutes, isha_minutes]:
-                    if alt_time_rounded <= prayer_minutes <= alt_end:
-                        halftime_start = alt_time_rounded + 45
-                        halftime_end = alt_time_rounded + 75
-                        if not (halftime_start <= prayer_minutes <= halftime_end):
-                            alt_conflict = True
-                            break
-                
-                if not alt_conflict:
-                    valid_slots.append(alt_time_str)
-                    st.write(f"DEBUG: Added alternative slot {alt_time_str}")
-    
-    # Sort and limit to 4 slots
-    valid_slots_sorted = sorted(set(valid_slots), key=time_string_to_minutes)[:4]
-    result["match_slots"] = valid_slots_sorted
-    
-    st.write(f"Final match slots for {city} on {match_date}: {result['match_slots']}")
-    return result
+class SlotTable:
+    """
+    Memoized (city, date, rule version) → match slot table for the whole season.
+    Generation, the weekly display and exports all read from here, so every
+    city-day is calculated once no matter how many matches it hosts.
+    """
+    def __init__(self, rules_version=SLOT_RULES_VERSION):
+        self.rules_version = rules_version
+        self._entries = {}  # {(city, date, rules_version): {'asr_time', 'maghrib_time', 'isha_time', 'match_slots'}}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(city, match_date):
+        if isinstance(match_date, datetime.datetime):
+            match_date = match_date.date()
+        elif isinstance(match_date, str):
+            match_date = datetime.datetime.strptime(match_date, '%Y-%m-%d').date()
+        return PrayerTimesCache.normalize_city(city), match_date
+
+    def _check_version(self):
+        # Drop everything calculated under older slot rules
+        if self.rules_version != SLOT_RULES_VERSION:
+            with self._lock:
+                self._entries.clear()
+                self.rules_version = SLOT_RULES_VERSION
+
+    @staticmethod
+    def _copy(entry):
+        return {**entry, 'match_slots': list(entry['match_slots'])}
+
+    def get(self, city, match_date):
+        """Return the slot calculation for one city-day, calculating it on a miss."""
+        self._check_version()
+        city, match_date = self._normalize(city, match_date)
+        key = (city, match_date, self.rules_version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return self._copy(entry)
+
+        self.misses += 1
+        entry = _calculate_match_times_uncached(city, match_date)
+        with self._lock:
+            self._entries[key] = entry
+        return self._copy(entry)
+
+    def precompute(self, city_dates):
+        """
+        Fill the table for many (city, date) pairs with one vectorized slot calculation.
+        City-days whose prayer times cannot be resolved are left for get(), which reports the error.
+
+        Returns:
+            int: Number of city-days added to the table
+        """
+        self._check_version()
+        missing = {self._normalize(city, match_date) for city, match_date in city_dates}
+        missing = sorted(pair for pair in missing if (pair[0], pair[1], self.rules_version) not in self._entries)
+        if not missing:
+            return 0
+
+        prefetch_prayer_times(missing)
+        rows = []
+        for city, match_date in missing:
+            prayer_data = get_prayer_times_unified(city, match_date)
+            if 'error' not in prayer_data:
+                rows.append((city, match_date, prayer_data['timings']))
+        if not rows:
+            return 0
+
+        slot_matrix = compute_match_slots_batch(
+            [time_string_to_minutes(timings['asr']) for _, _, timings in rows],
+            [time_string_to_minutes(timings['maghrib']) for _, _, timings in rows],
+            [time_string_to_minutes(timings['isha']) for _, _, timings in rows]
+        )
+        with self._lock:
+            for (city, match_date, timings), slots in zip(rows, slot_matrix):
+                self._entries[(city, match_date, self.rules_version)] = {
+                    'asr_time': timings['asr'],
+                    'maghrib_time': timings['maghrib'],
+                    'isha_time': timings['isha'],
+                    'match_slots': [minutes_to_time_string(int(slot)) for slot in slots if slot >= 0]
+                }
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'rules_version': self.rules_version}
+
+
+@st.cache_resource
+def get_slot_table():
+    """Process-wide slot table shared by every session."""
+    return SlotTable()
 
 
 # CSS styling
@@ -1395,18 +2833,31 @@ def determine_winner(match, teams_data):
     return winner, is_draw
 
 
-@st.cache_data
-def load_data():
+MODEL_PATHS = {
+    'attendance': 'best_model_attendance_percentage.pkl',
+    'profit': 'best_model_profit.pkl',
+    'suitability': 'best_model_suitability_RandomForest.pkl',
+}
+
+
+@st.cache_resource(show_spinner="Loading prediction model...")
+def load_model(name):
+    """
+    Load one of the shipped models (a MODEL_PATHS key) on first use.
+    The model is shared by every session and rerun instead of being copied per cache
+    access, and its NumPy arrays are memory-mapped read-only where the file allows it,
+    so concurrent planners share the same pages. Returns None when the file is missing.
+    """
     try:
-        attendance_model = joblib.load('best_model_attendance_percentage.pkl')
-        profit_model = joblib.load('best_model_profit.pkl')
-        models_loaded = True
+        return joblib.load(MODEL_PATHS[name], mmap_mode='r')
     except FileNotFoundError:
-        st.warning("Model files not found. Using default predictions.")
-        attendance_model = None
-        profit_model = None
-        models_loaded = False
+        st.warning(f"Model file {MODEL_PATHS[name]} not found. Using default predictions.")
+        return None
 
+
+@st.cache_data
+def load_data():
+    # Models are no longer loaded here; see load_model (loaded on first prediction)
     # Updated data dictionary with all 18 teams - corrected to match CITY_STADIUMS
     data = {
         'team': [
@@ -1460,7 +2911,7 @@ def load_data():
         'humidity': [30, 60, 55, 35, 50, 40, 45, 55, 50, 35, 35, 35, 25, 40]
     })
 
-    return teams_data, weather_data, attendance_model, profit_model, models_loaded  
+    return teams_data, weather_data
 
 
 
@@ -1665,6 +3116,39 @@ def load_match_schedule_from_files():
 
 
 
+# First match day of every league week handled by the scheduler (weeks 7 to 34)
+LEAGUE_WEEK_START_DATES = {
+    7: datetime.date(2025, 10, 30),  # Thursday
+    8: datetime.date(2025, 11, 6),   # Thursday
+    9: datetime.date(2025, 11, 21),  # Friday
+    10: datetime.date(2025, 12, 19), # Friday
+    11: datetime.date(2025, 12, 25), # Thursday
+    12: datetime.date(2025, 12, 29), # Monday
+    13: datetime.date(2026, 1, 2),   # Friday
+    14: datetime.date(2026, 1, 8),   # Thursday
+    15: datetime.date(2026, 1, 12),  # Monday
+    16: datetime.date(2026, 1, 16),  # Friday
+    17: datetime.date(2026, 1, 20),  # Tuesday
+    18: datetime.date(2026, 1, 24),  # Saturday
+    19: datetime.date(2026, 1, 28),  # Wednesday
+    20: datetime.date(2026, 2, 1),   # Sunday
+    21: datetime.date(2026, 2, 5),   # Thursday
+    22: datetime.date(2026, 2, 12),  # Thursday
+    23: datetime.date(2026, 2, 19),  # Thursday
+    24: datetime.date(2026, 2, 26),  # Thursday
+    25: datetime.date(2026, 3, 5),   # Thursday
+    26: datetime.date(2026, 3, 12),  # Thursday
+    27: datetime.date(2026, 4, 3),   # Friday
+    28: datetime.date(2026, 4, 9),   # Thursday
+    29: datetime.date(2026, 4, 23),  # Thursday
+    30: datetime.date(2026, 4, 28),  # Tuesday
+    31: datetime.date(2026, 5, 2),   # Saturday
+    32: datetime.date(2026, 5, 7),   # Thursday
+    33: datetime.date(2026, 5, 13),  # Wednesday
+    34: datetime.date(2026, 5, 21),  # Thursday
+}
+
+
 def validate_and_redistribute_matches(matches_from_excel, week_start_dates, matches_per_week=9):
     """Validate and redistribute matches to enforce 3-match-per-day limit."""
     redistributed = {week: [] for week in matches_from_excel}
@@ -1699,45 +3183,29 @@ def get_last_match_info(team, current_week, current_date):
     Get the last match played by a team before the current date.
     Returns: (date, opponent, stadium, rest_days) or None if no previous match
     """
-    if 'schedule_df' not in st.session_state:
-        return None
-    
-    schedule_df = st.session_state.schedule_df
-    if schedule_df.empty:
-        return None
-    
-    # Filter for selected matches only
-    selected_matches = schedule_df[schedule_df['is_selected'] == True].copy()
-    
-    if selected_matches.empty:
+    if 'scenario_manager' not in st.session_state:
         return None
+    scenario_manager = st.session_state.scenario_manager
     
-    # Convert date to datetime for comparison
-    selected_matches['date_dt'] = pd.to_datetime(selected_matches['date'])
-    current_date_dt = pd.to_datetime(current_date)
-    
-    # Find matches where the team played (as home or away) before current date
-    team_matches = selected_matches[
-        ((selected_matches['home_team'] == team) | (selected_matches['away_team'] == team)) &
-        (selected_matches['date_dt'] < current_date_dt)
-    ].sort_values('date_dt', ascending=False)
+    if isinstance(current_date, str):
+        current_date = datetime.date.fromisoformat(current_date)
+    elif isinstance(current_date, datetime.datetime):
+        current_date = current_date.date()
     
-    if team_matches.empty:
+    # Most recent selected match for this team, from the rest-day timeline
+    last = scenario_manager.rest_tracker.last_before(team, current_date)
+    if last is None:
         return None
     
-    # Get the most recent match
-    last_match = team_matches.iloc[0]
-    opponent = last_match['away_team'] if last_match['home_team'] == team else last_match['home_team']
-    
-    # Calculate rest days
-    rest_days = (current_date_dt.date() - last_match['date_dt'].date()).days
+    last_match = scenario_manager.get_selected_scenario(last[1])
+    opponent = last_match.away_team if last_match.home_team == team else last_match.home_team
     
     return {
-        'date': last_match['date'],
+        'date': last_match.date,
         'opponent': opponent,
-        'stadium': last_match['stadium'],
-        'was_home': last_match['home_team'] == team,
-        'rest_days': rest_days
+        'stadium': last_match.stadium,
+        'was_home': last_match.home_team == team,
+        'rest_days': current_date.toordinal() - last[0]
     }
 
 
@@ -1990,7 +3458,7 @@ def get_match_prestige_level(home_team, away_team):
 
 def get_team_rest_days(team, match_date):
     """
-    Calculate rest days for a team considering both selected matches and TEAM_UNAVAILABILITY.
+    Calculate rest days for a team considering both selected matches and external fixtures.
     
     Args:
         team (str): Team name
@@ -2000,141 +3468,28 @@ def get_team_rest_days(team, match_date):
         tuple: (rest_days, last_match_date, match_type)
                match_type can be 'league' or 'external'
     """
-    import datetime
-    
-    TEAM_UNAVAILABILITY = {
-    'Al-Ittihad': [
-        datetime.date(2025, 9, 15),
-        datetime.date(2025, 9, 30),
-        datetime.date(2025, 10, 20),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 4),
-        datetime.date(2025, 11, 24),
-        datetime.date(2025, 12, 23),
-        datetime.date(2026, 2, 10),
-        datetime.date(2026, 2, 17)
-    ],
-    'Al-Ahli': [
-        datetime.date(2025, 9, 15),
-        datetime.date(2025, 9, 29),
-        datetime.date(2025, 10, 20),
-        datetime.date(2025, 10, 27),
-        datetime.date(2025, 11, 4),
-        datetime.date(2025, 11, 24),
-        datetime.date(2025, 12, 22),
-        datetime.date(2026, 2, 9),
-        datetime.date(2026, 2, 16)
-    ],
-    'Al-Hilal': [
-        datetime.date(2025, 9, 16),
-        datetime.date(2025, 9, 29),
-        datetime.date(2025, 10, 21),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 3),
-        datetime.date(2025, 11, 25),
-        datetime.date(2025, 12, 22),
-        datetime.date(2026, 2, 9),
-        datetime.date(2026, 2, 16)
-    ],
-    'Al-Nassr': [
-        datetime.date(2025, 9, 17),
-        datetime.date(2025, 10, 1),
-        datetime.date(2025, 10, 22),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 5),
-        datetime.date(2025, 11, 26),
-        datetime.date(2025, 12, 24)
-    ],
-    'Al-Shabab': [
-        datetime.date(2025, 10, 1),
-        datetime.date(2025, 10, 21),
-        datetime.date(2025, 10, 28),
-        datetime.date(2025, 11, 5),
-        datetime.date(2025, 12, 24),
-        datetime.date(2026, 2, 1),
-        datetime.date(2026, 2, 17)
-    ],
- 'Al-Ettifaq': [datetime.date(2025, 10, 24)],
-    'Al-Fayha' : [
-        datetime.date(2025, 10, 24)
-    ],  
-     'NEOM' : [
-        datetime.date(2025, 10, 24)
-    ],  
-    'Al-Khaleej': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Fateh': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Okhdood': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Batin': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Qadisiyah': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Kholood': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Taawoun': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-riyadh': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Najma': [
-        datetime.date(2025, 10, 27)
-    ],
-    'Al-Hazem': [
-        datetime.date(2025, 10, 28)
-    ],
-    'Al-Raed': [
-        datetime.date(2025, 10, 28)
-    ],
-     'Damac': [
-        datetime.date(2025, 10, 25)
-    ]
-    }
-    
     # Convert match_date to datetime.date if it's a string
     if isinstance(match_date, str):
         match_date = datetime.datetime.strptime(match_date, '%Y-%m-%d').date()
     
-    # Get external matches for this team
-    external_matches = TEAM_UNAVAILABILITY.get(team, [])
+    # Most recent external fixture for this team
+    last_external = get_external_fixtures_registry().last_before(team, match_date)
     
-    # Get league matches from schedule_df
-    league_matches = []
-    if 'schedule_df' in st.session_state and not st.session_state.schedule_df.empty:
-        schedule_df = st.session_state.schedule_df
-        selected_matches = schedule_df[schedule_df['is_selected'] == True].copy()
-        
-        if not selected_matches.empty:
-            selected_matches['date_dt'] = pd.to_datetime(selected_matches['date']).dt.date
-            team_matches = selected_matches[
-                ((selected_matches['home_team'] == team) | (selected_matches['away_team'] == team)) &
-                (selected_matches['date_dt'] < match_date)
-            ]
-            league_matches = team_matches['date_dt'].tolist()
-    
-    # Combine all matches and filter only those before match_date
-    all_matches = []
-    for ext_date in external_matches:
-        if ext_date < match_date:
-            all_matches.append((ext_date, 'external'))
-    
-    for league_date in league_matches:
-        all_matches.append((league_date, 'league'))
+    # Most recent selected league match, from the rest-day timeline
+    last_league = None
+    if 'scenario_manager' in st.session_state:
+        last = st.session_state.scenario_manager.rest_tracker.last_before(team, match_date)
+        if last is not None:
+            last_league = datetime.date.fromordinal(last[0])
     
-    # Sort by date and get the most recent one
-    if not all_matches:
+    # The most recent of the two (external wins a tie)
+    if last_external is None and last_league is None:
         return None, None, None
     
-    all_matches.sort(key=lambda x: x[0], reverse=True)
-    last_match_date, match_type = all_matches[0]
+    if last_league is not None and (last_external is None or last_league > last_external):
+        last_match_date, match_type = last_league, 'league'
+    else:
+        last_match_date, match_type = last_external, 'external'
     
     # Calculate rest days
     rest_days = (match_date - last_match_date).days
@@ -2150,18 +3505,26 @@ def get_scenario_time_context(scenario, available_scenarios):
         scenario: The current scenario object
         available_scenarios: List of all available scenarios for this match
     """
+    # The slot table holds the day's slots in order: Maghrib-based first, then Isha-based
+    try:
+        day_slots = get_slot_table().get(scenario.city, scenario.date)['match_slots']
+        if scenario.time in day_slots:
+            scenario_index_in_day = day_slots.index(scenario.time)
+            if scenario_index_in_day == 0:
+                return "🌙 Calculated from Maghrib Prayer Time"
+            elif scenario_index_in_day == 1:
+                return "🕌 Calculated from Isha Prayer Time"
+            else:
+                return "⏰ Fixed Time"
+    except (ValueError, KeyError, TypeError):
+        pass
+
     try:
-        import datetime
-        
-        # Get the date of the current scenario
-        current_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
-        
         # Group scenarios by date and find position within the same day
-        scenarios_same_day = [s for s in available_scenarios 
-                             if datetime.datetime.strptime(s.date, '%Y-%m-%d').date() == current_date]
+        scenarios_same_day = [s for s in available_scenarios if s.date_ordinal == scenario.date_ordinal]
         
         # Sort scenarios of the same day by time
-        scenarios_same_day.sort(key=lambda s: datetime.datetime.strptime(s.time, '%H:%M').time())
+        scenarios_same_day.sort(key=lambda s: s.kickoff_minutes)
         
         # Find the index of this scenario within its day
         scenario_index_in_day = scenarios_same_day.index(scenario)
@@ -2179,6 +3542,1077 @@ def get_scenario_time_context(scenario, available_scenarios):
 
 
 
+def resolve_week_stadium_options(week_number, pairings, days, scenario_manager):
+    """
+    Stadium options for every scenario card of a week in one pass.
+    Collects the (home team, date, match_id) of each unselected match's scenarios on the
+    week's days and resolves them with a single get_available_stadiums_batch call.
+
+    Returns:
+        dict: {(home_team, match_date, match_id): (available_stadiums, unavailable_stadiums)}
+    """
+    week_days = set(days)
+    stadium_requests = set()
+    for home, away in pairings:
+        match_id = st.session_state.week_match_ids.get(week_number, {}).get((home, away))
+        if match_id is None or match_id in scenario_manager.selected_scenarios:
+            continue
+        for scenario in scenario_manager.get_scenarios_for_match(match_id):
+            if scenario.match_date in week_days:
+                stadium_requests.add((home, scenario.match_date, match_id))
+    return get_available_stadiums_batch(stadium_requests, scenario_manager)
+
+
+# Relative weight of each prediction in the optimizer objective (each is scaled to 0..1 first)
+OPTIMIZER_WEIGHTS = {'attendance_percentage': 1.0, 'profit': 1.0, 'suitability_score': 1.0}
+OPTIMIZER_TIME_LIMIT_SECONDS = 2.0
+
+
+class WeekOptimizer:
+    """
+    Exact branch-and-bound choice of one scenario per match for a set of matches.
+
+    Schedules as many matches as possible first, then maximizes the weighted sum of
+    attendance, profit and suitability (each scaled to 0..1 over the candidates) subject to:
+      - at most MAX_MATCHES_PER_DAY selected matches per day,
+      - one match per stadium per day (stadiums are booked for the full day),
+      - team availability (external fixtures) and stadium closures,
+      - MIN_REST_DAYS between two matches of the same team.
+    Selections of matches outside match_ids are kept and count against every constraint;
+    selections of matches inside match_ids are re-planned. fixed_assignments
+    ({match_id: scenario_id}) adds or overrides kept selections without touching the manager,
+    which lets a season plan be built up before anything is selected.
+    """
+
+    def __init__(self, scenario_manager, match_ids, weights=None, time_limit=OPTIMIZER_TIME_LIMIT_SECONDS,
+                 fixed_assignments=None):
+        self.manager = scenario_manager
+        self.match_ids = list(dict.fromkeys(match_ids))
+        self.weights = weights or OPTIMIZER_WEIGHTS
+        self.fixed_assignments = fixed_assignments or {}
+        self.time_limit = time_limit
+        self._started = time.perf_counter()  # elapsed includes building the candidate lists
+        self._load_fixed_selections()
+        self._build_candidates()
+
+    def _load_fixed_selections(self):
+        """Day loads, stadium-days and team match days of the selections that stay"""
+        free = set(self.match_ids)
+        self.day_load = {}       # {date_ordinal: selected matches}
+        self.stadium_days = set()  # {(stadium, date_ordinal)}
+        self.team_days = {}      # {team: {date_ordinal, ...}}
+        kept = dict(self.manager.selected_scenarios)
+        kept.update(self.fixed_assignments)
+        for match_id, scenario_id in kept.items():
+            if match_id in free or scenario_id is None:
+                continue
+            scenario = self.manager.get_scenario(scenario_id)
+            ordinal = scenario.date_ordinal
+            self.day_load[ordinal] = self.day_load.get(ordinal, 0) + 1
+            self.stadium_days.add((scenario.stadium, ordinal))
+            for team in (scenario.home_team, scenario.away_team):
+                self.team_days.setdefault(team, set()).add(ordinal)
+
+    def _rested(self, team, ordinal):
+        days = self.team_days.get(team)
+        return not days or all((ordinal + k) not in days for k in range(1 - MIN_REST_DAYS, MIN_REST_DAYS))
+
+    def _build_candidates(self):
+        """
+        Feasible scenarios per match against the fixed selections, as
+        (score, scenario_id, date_ordinal, stadium, home_team, away_team) sorted best first.
+        """
+        store = self.manager.store
+        columns = store.columns
+        stadium_calendar = get_stadium_calendar()
+        rows_per_match = {match_id: self.manager.match_rows.get(match_id, []) for match_id in self.match_ids}
+        all_rows = np.array([row for rows in rows_per_match.values() for row in rows], dtype=np.int64)
+
+        # Scale every prediction to 0..1 over the candidates so the weights are comparable
+        scores = np.zeros(store.size)
+        if len(all_rows):
+            for column, weight in self.weights.items():
+                values = columns[column][all_rows].astype(float)
+                top = values.max()
+                if top > 0:
+                    scores[all_rows] += weight * values / top
+
+        self.candidates = {}
+        for match_id, rows in rows_per_match.items():
+            options = []
+            for row in rows:
+                scenario = ScenarioView(store, row)
+                match_date = scenario.match_date
+                ordinal = scenario.date_ordinal
+                home, away, stadium = scenario.home_team, scenario.away_team, scenario.stadium
+                if self.day_load.get(ordinal, 0) >= MAX_MATCHES_PER_DAY or (stadium, ordinal) in self.stadium_days:
+                    continue
+                if not (self._rested(home, ordinal) and self._rested(away, ordinal)):
+                    continue
+                if not (is_team_available(home, match_date)[0] and is_team_available(away, match_date)[0]):
+                    continue
+                if not stadium_calendar.is_available(stadium, match_date):
+                    continue
+                options.append((float(scores[row]), scenario.scenario_id, ordinal, stadium, home, away))
+            options.sort(key=lambda option: (-option[0], option[2], option[1]))
+            self.candidates[match_id] = options
+
+    def rescore(self, scenario_scores, weights):
+        """
+        Replace the candidate scores with scenario_scores ({scenario_id: score}); each score must be
+        a sum of 0..1 criteria times their weight in weights, which bounds the skip penalty.
+        """
+        self.weights = weights
+        for match_id, options in self.candidates.items():
+            options = [(scenario_scores[option[1]],) + option[1:] for option in options]
+            options.sort(key=lambda option: (-option[0], option[2], option[1]))
+            self.candidates[match_id] = options
+
+    def solve(self):
+        """
+        Search for the best plan.
+
+        Returns:
+            dict: {'assignments': {match_id: scenario_id or None}, 'scheduled', 'unscheduled',
+                   'objective', 'optimal' (False when the time limit cut the search), 'nodes', 'elapsed'}
+        """
+        started = time.perf_counter()
+        total_weight = sum(self.weights.values())
+        # Leaving a match out costs more than any score the other matches could gain
+        skip_penalty = len(self.match_ids) * total_weight + 1.0
+
+        # Most constrained matches first; bound[i] = best value still reachable from depth i
+        order = sorted(self.match_ids, key=lambda match_id: len(self.candidates[match_id]))
+        best_option = [self.candidates[m][0][0] if self.candidates[m] else -skip_penalty for m in order]
+        bound = [0.0] * (len(order) + 1)
+        for i in range(len(order) - 1, -1, -1):
+            bound[i] = bound[i + 1] + best_option[i]
+
+        day_load = dict(self.day_load)
+        stadium_days = set(self.stadium_days)
+        team_days = {team: set(days) for team, days in self.team_days.items()}
+        chosen = [None] * len(order)
+        best = {'value': -math.inf, 'choice': list(chosen)}
+        nodes = 0
+        timed_out = False
+
+        def rested(team, ordinal):
+            days = team_days.get(team)
+            return not days or all((ordinal + k) not in days for k in range(1 - MIN_REST_DAYS, MIN_REST_DAYS))
+
+        def search(depth, value):
+            nonlocal nodes, timed_out
+            nodes += 1
+            if nodes % 1024 == 0 and time.perf_counter() - started > self.time_limit:
+                timed_out = True
+            if timed_out or value + bound[depth] <= best['value']:
+                return
+            if depth == len(order):
+                best['value'] = value
+                best['choice'] = list(chosen)
+                return
+            for option in self.candidates[order[depth]]:
+                score, scenario_id, ordinal, stadium, home, away = option
+                if value + score + bound[depth + 1] <= best['value']:
+                    break  # Options are sorted best first
+                if (day_load.get(ordinal, 0) >= MAX_MATCHES_PER_DAY or (stadium, ordinal) in stadium_days
+                        or not rested(home, ordinal) or not rested(away, ordinal)):
+                    continue
+                day_load[ordinal] = day_load.get(ordinal, 0) + 1
+                stadium_days.add((stadium, ordinal))
+                team_days.setdefault(home, set()).add(ordinal)
+                team_days.setdefault(away, set()).add(ordinal)
+                chosen[depth] = scenario_id
+                search(depth + 1, value + score)
+                chosen[depth] = None
+                team_days[home].discard(ordinal)
+                team_days[away].discard(ordinal)
+                stadium_days.discard((stadium, ordinal))
+                day_load[ordinal] -= 1
+            # Leave the match unscheduled (only pays off when nothing above fits)
+            search(depth + 1, value - skip_penalty)
+
+        search(0, 0.0)
+        assignments = dict(zip(order, best['choice']))
+        unscheduled = [match_id for match_id in self.match_ids if assignments.get(match_id) is None]
+        return {
+            'assignments': {match_id: assignments.get(match_id) for match_id in self.match_ids},
+            'scheduled': len(self.match_ids) - len(unscheduled),
+            'unscheduled': unscheduled,
+            'objective': best['value'] + len(unscheduled) * skip_penalty if best['value'] > -math.inf else 0.0,
+            'optimal': not timed_out,
+            'nodes': nodes,
+            'elapsed': time.perf_counter() - self._started
+        }
+
+
+class SeasonScheduler:
+    """
+    Season-wide plan for every open match of weeks 7-34, built by decomposition:
+      1. Forward pass: each week is solved exactly with WeekOptimizer, with every earlier
+         week's plan fixed, so rest days and bookings across the week boundary are respected.
+      2. Repair: a week left with unscheduled matches is re-solved jointly with its
+         neighbouring weeks (REPAIR_WINDOW weeks either side); the new plan is kept only
+         if it schedules more matches.
+    Existing selections are kept. Nothing is selected until the plan is applied.
+    """
+    REPAIR_WINDOW = 1
+
+    def __init__(self, scenario_manager, week_match_ids, week_start_dates=None, weights=None,
+                 time_limit=OPTIMIZER_TIME_LIMIT_SECONDS):
+        self.manager = scenario_manager
+        week_start_dates = week_start_dates or LEAGUE_WEEK_START_DATES
+        self.weeks = sorted(week for week in week_match_ids if week in week_start_dates)
+        # Open matches per week, in week order
+        self.week_matches = {
+            week: [match_id for match_id in week_match_ids[week].values()
+                   if match_id not in scenario_manager.selected_scenarios and scenario_manager.match_rows.get(match_id)]
+            for week in self.weeks
+        }
+        self.weights = weights
+        self.time_limit = time_limit
+
+    def _solve(self, match_ids, plan):
+        fixed = {match_id: scenario_id for match_id, scenario_id in plan.items() if match_id not in set(match_ids)}
+        return WeekOptimizer(self.manager, match_ids, weights=self.weights, time_limit=self.time_limit,
+                             fixed_assignments=fixed).solve()
+
+    def solve(self):
+        """
+        Returns:
+            dict: {'assignments': {match_id: scenario_id or None}, 'scheduled', 'unscheduled',
+                   'repaired' (matches rescued by the repair pass), 'optimal_weeks', 'elapsed'}
+        """
+        started = time.perf_counter()
+        plan = {}
+        optimal_weeks = 0
+        for week in self.weeks:
+            result = self._solve(self.week_matches[week], plan)
+            plan.update(result['assignments'])
+            optimal_weeks += result['optimal']
+
+        unscheduled_before = sum(scenario_id is None for scenario_id in plan.values())
+        for i, week in enumerate(self.weeks):
+            if all(plan.get(match_id) is not None for match_id in self.week_matches[week]):
+                continue
+            window = self.weeks[max(i - self.REPAIR_WINDOW, 0):i + self.REPAIR_WINDOW + 1]
+            window_matches = [match_id for w in window for match_id in self.week_matches[w]]
+            # Relaxation: solve the week with its neighbours' plans dropped. If that cannot
+            # schedule more either, the conflict is inside the week and no repair can help.
+            relaxed = self._solve(self.week_matches[week], {match_id: scenario_id for match_id, scenario_id in plan.items()
+                                                            if match_id not in set(window_matches)})
+            if relaxed['scheduled'] <= sum(plan.get(match_id) is not None for match_id in self.week_matches[week]):
+                continue
+            result = self._solve(window_matches, plan)
+            current = sum(plan.get(match_id) is not None for match_id in window_matches)
+            if result['scheduled'] > current:
+                plan.update(result['assignments'])
+
+        unscheduled = [match_id for match_id, scenario_id in plan.items() if scenario_id is None]
+        return {
+            'assignments': plan,
+            'scheduled': len(plan) - len(unscheduled),
+            'unscheduled': unscheduled,
+            'repaired': unscheduled_before - len(unscheduled),
+            'optimal_weeks': optimal_weeks,
+            'elapsed': time.perf_counter() - started
+        }
+
+
+def auto_schedule_season(scenario_manager=None):
+    """
+    Plan and select every open match of the season (one journal entry).
+    Returns the scheduler result.
+    """
+    scenario_manager = scenario_manager or st.session_state.scenario_manager
+    plan = SeasonScheduler(scenario_manager, st.session_state.week_match_ids).solve()
+    changed = scenario_manager.select_many({match_id: scenario_id for match_id, scenario_id in plan['assignments'].items()
+                                            if scenario_id is not None})
+    sync_session_with_selection(changed)
+    return plan
+
+
+def auto_select_week(week_number, scenario_manager=None):
+    """
+    Select the best feasible scenario for every unselected match of a week (one journal entry).
+    Returns the optimizer result.
+    """
+    scenario_manager = scenario_manager or st.session_state.scenario_manager
+    week_match_ids = [match_id for match_id in st.session_state.week_match_ids.get(week_number, {}).values()
+                      if match_id not in scenario_manager.selected_scenarios]
+    plan = WeekOptimizer(scenario_manager, week_match_ids).solve()
+    changed = scenario_manager.select_many({match_id: scenario_id for match_id, scenario_id in plan['assignments'].items()
+                                            if scenario_id is not None})
+    sync_session_with_selection(changed)
+    return plan
+
+
+LOCAL_SEARCH_COMFORT_REST_DAYS = 4  # Rest shorter than this (but >= MIN_REST_DAYS) is penalized
+LOCAL_SEARCH_REST_WEIGHT = 0.05     # Objective units per squared missing rest day
+LOCAL_SEARCH_VENUE_PENALTY = 0.01   # Objective units for a match away from its home team's primary stadium
+LOCAL_SEARCH_TIME_LIMIT_SECONDS = 3.0
+
+
+class ScheduleImprover:
+    """
+    Simulated annealing over the selected schedule of a ScenarioManager.
+
+    Objective: weighted attendance/profit/suitability of the selected scenarios (scaled as in
+    WeekOptimizer) minus LOCAL_SEARCH_REST_WEIGHT * (missing rest days)^2 for every gap between
+    two consecutive matches of a team that is shorter than LOCAL_SEARCH_COMFORT_REST_DAYS,
+    and minus LOCAL_SEARCH_VENUE_PENALTY for every match away from its home team's primary stadium.
+    Neighbourhoods:
+      - move:    a match takes another of its scenarios (another slot or day),
+      - swap:    two matches of the same week exchange days,
+      - stadium: a match moves to another stadium of its home team in TEAM_STADIUMS.
+    Hard constraints are the WeekOptimizer ones. A move only touches its matches' days,
+    stadium-days and teams, so its delta is evaluated incrementally from those alone.
+    Stadium moves that do not gain anything are rejected, so venues never drift at random.
+    Works on its own copy of the state; the manager is only changed by apply_schedule_improvement.
+    """
+
+    def __init__(self, scenario_manager, match_weeks, weights=None, rest_weight=LOCAL_SEARCH_REST_WEIGHT,
+                 comfort_rest_days=LOCAL_SEARCH_COMFORT_REST_DAYS, venue_penalty=LOCAL_SEARCH_VENUE_PENALTY, seed=None):
+        self.manager = scenario_manager
+        self.rest_weight = rest_weight
+        self.venue_penalty = venue_penalty
+        self.comfort_rest_days = comfort_rest_days
+        self.rng = random.Random(seed)
+        store = scenario_manager.store
+        columns = store.columns
+        weights = weights or OPTIMIZER_WEIGHTS
+        stadium_calendar = get_stadium_calendar()
+
+        self.match_ids = list(scenario_manager.selected_scenarios)
+        rows = [row for match_id in self.match_ids for row in scenario_manager.match_rows.get(match_id, [])]
+        scores = np.zeros(store.size)
+        if rows:
+            for column, weight in weights.items():
+                values = columns[column][rows].astype(float)
+                top = values.max()
+                if top > 0:
+                    scores[rows] += weight * values / top
+
+        # Static data per row and per match
+        self.row_info = {}     # {row: (date_ordinal, kickoff_minutes, home, away, stadium, score)}
+        self.options = {}      # {match_id: [rows whose teams are available]}
+        self.rows_by_day = {}  # {(match_id, date_ordinal): [rows]}
+        self.stadium_options = {}  # {match_id: [stadiums]}
+        self.primary_stadium = {}  # {match_id: home team's primary stadium}
+        self._open = {}        # {(stadium, date_ordinal): not closed}
+        self._stadium_calendar = stadium_calendar
+        for match_id in self.match_ids:
+            options = []
+            for row in scenario_manager.match_rows.get(match_id, []):
+                scenario = ScenarioView(store, row)
+                info = (scenario.date_ordinal, scenario.kickoff_minutes, scenario.home_team,
+                        scenario.away_team, scenario.stadium, float(scores[row]))
+                self.row_info[row] = info
+                if is_team_available(info[2], scenario.match_date)[0] and is_team_available(info[3], scenario.match_date)[0]:
+                    options.append(row)
+                    self.rows_by_day.setdefault((match_id, info[0]), []).append(row)
+            self.options[match_id] = options
+            home = self.row_info[scenario_manager.match_rows[match_id][0]][2]
+            team_info = TEAM_STADIUMS.get(home, {})
+            stadiums = [team_info.get('primary')] + list(team_info.get('alternatives', []))
+            stadiums += [self.row_info[row][4] for row in options]
+            self.stadium_options[match_id] = list(dict.fromkeys(s for s in stadiums if s))
+            self.primary_stadium[match_id] = team_info.get('primary', self.row_info[scenario_manager.match_rows[match_id][0]][4])
+        self.week_matches = {}
+        for match_id in self.match_ids:
+            self.week_matches.setdefault(match_weeks.get(match_id), []).append(match_id)
+        self.match_week = {match_id: match_weeks.get(match_id) for match_id in self.match_ids}
+
+        # Mutable state, built from the current selection
+        self.current = {}      # {match_id: (row, stadium)}
+        self.day_load = {}
+        self.stadium_days = {}
+        self.timelines = {}    # {team: sorted [date_ordinal, ...]}
+        self.objective = 0.0
+        for match_id, scenario_id in scenario_manager.selected_scenarios.items():
+            scenario = scenario_manager.get_scenario(scenario_id)
+            self.objective += self._place(match_id, store.row_by_id[scenario_id], scenario.stadium, check=False)
+
+    def _rest_penalty(self, gap):
+        short = self.comfort_rest_days - gap
+        return self.rest_weight * short * short if short > 0 else 0.0
+
+    def _is_open(self, stadium, ordinal):
+        key = (stadium, ordinal)
+        if key not in self._open:
+            self._open[key] = self._stadium_calendar.is_available(stadium, datetime.date.fromordinal(ordinal))
+        return self._open[key]
+
+    def _remove(self, match_id):
+        """Take a match out of the state; returns the objective delta"""
+        row, stadium = self.current.pop(match_id)
+        ordinal, _, home, away, _, score = self.row_info[row]
+        self.day_load[ordinal] -= 1
+        self.stadium_days[(stadium, ordinal)] -= 1
+        delta = -score
+        if stadium != self.primary_stadium[match_id]:
+            delta += self.venue_penalty
+        for team in (home, away):
+            timeline = self.timelines[team]
+            i = bisect.bisect_left(timeline, ordinal)
+            prev_day = timeline[i - 1] if i > 0 else None
+            next_day = timeline[i + 1] if i + 1 < len(timeline) else None
+            if prev_day is not None:
+                delta += self._rest_penalty(ordinal - prev_day)
+            if next_day is not None:
+                delta += self._rest_penalty(next_day - ordinal)
+            if prev_day is not None and next_day is not None:
+                delta -= self._rest_penalty(next_day - prev_day)
+            del timeline[i]
+        return delta
+
+    def _place(self, match_id, row, stadium, check=True):
+        """Put a match in the state; returns the objective delta, or None (state unchanged) if infeasible"""
+        ordinal, _, home, away, _, score = self.row_info[row]
+        if check:
+            if (self.day_load.get(ordinal, 0) >= MAX_MATCHES_PER_DAY or self.stadium_days.get((stadium, ordinal), 0)
+                    or not self._is_open(stadium, ordinal)):
+                return None
+        delta = score
+        if stadium != self.primary_stadium[match_id]:
+            delta -= self.venue_penalty
+        for team in (home, away):
+            timeline = self.timelines.get(team, [])
+            i = bisect.bisect_left(timeline, ordinal)
+            prev_day = timeline[i - 1] if i > 0 else None
+            next_day = timeline[i] if i < len(timeline) else None
+            if check and ((prev_day is not None and ordinal - prev_day < MIN_REST_DAYS)
+                          or (next_day is not None and next_day - ordinal < MIN_REST_DAYS)):
+                return None
+            if prev_day is not None:
+                delta -= self._rest_penalty(ordinal - prev_day)
+            if next_day is not None:
+                delta -= self._rest_penalty(next_day - ordinal)
+            if prev_day is not None and next_day is not None:
+                delta += self._rest_penalty(next_day - prev_day)
+        if check and home == away:
+            return None
+        for team in (home, away):
+            bisect.insort(self.timelines.setdefault(team, []), ordinal)
+        self.day_load[ordinal] = self.day_load.get(ordinal, 0) + 1
+        self.stadium_days[(stadium, ordinal)] = self.stadium_days.get((stadium, ordinal), 0) + 1
+        self.current[match_id] = (row, stadium)
+        return delta
+
+    def _apply(self, changes):
+        """
+        Apply [(match_id, row, stadium), ...] together.
+        Returns (delta, previous) or None when infeasible (state restored).
+        """
+        previous = [(match_id,) + self.current[match_id] for match_id, _, _ in changes]
+        delta = 0.0
+        for match_id, _, _ in changes:
+            delta += self._remove(match_id)
+        placed = []
+        for match_id, row, stadium in changes:
+            placed_delta = self._place(match_id, row, stadium)
+            if placed_delta is None:
+                for placed_id in placed:
+                    self._remove(placed_id)
+                for match_id_back, row_back, stadium_back in previous:
+                    self._place(match_id_back, row_back, stadium_back, check=False)
+                return None
+            delta += placed_delta
+            placed.append(match_id)
+        return delta, previous
+
+    def _revert(self, previous):
+        for match_id, _, _ in previous:
+            self._remove(match_id)
+        for match_id, row, stadium in previous:
+            self._place(match_id, row, stadium, check=False)
+
+    def _propose(self):
+        """Random neighbour as [(match_id, row, stadium), ...], or None; stadium moves are tagged by _last_move"""
+        rng = self.rng
+        kind = rng.random()
+        self._last_move = 'stadium' if kind >= 0.85 else 'scenario'
+        match_id = self.match_ids[rng.randrange(len(self.match_ids))]
+        row, stadium = self.current[match_id]
+        if kind < 0.6:
+            options = self.options[match_id]
+            new_row = options[rng.randrange(len(options))] if options else row
+            return None if new_row == row else [(match_id, new_row, stadium)]
+        if kind < 0.85:
+            week_matches = self.week_matches.get(self.match_week[match_id], [])
+            other_id = week_matches[rng.randrange(len(week_matches))]
+            other_row, other_stadium = self.current[other_id]
+            day, other_day = self.row_info[row][0], self.row_info[other_row][0]
+            if other_id == match_id or day == other_day:
+                return None
+            first = self._row_on_day(match_id, other_day, self.row_info[row][1])
+            second = self._row_on_day(other_id, day, self.row_info[other_row][1])
+            if first is None or second is None:
+                return None
+            return [(match_id, first, stadium), (other_id, second, other_stadium)]
+        stadiums = self.stadium_options[match_id]
+        new_stadium = stadiums[rng.randrange(len(stadiums))]
+        return None if new_stadium == stadium else [(match_id, row, new_stadium)]
+
+    def _row_on_day(self, match_id, ordinal, kickoff_minutes):
+        """Scenario of a match on a day, preferring the same kick-off"""
+        rows = self.rows_by_day.get((match_id, ordinal))
+        if not rows:
+            return None
+        for row in rows:
+            if self.row_info[row][1] == kickoff_minutes:
+                return row
+        return rows[self.rng.randrange(len(rows))]
+
+    def run(self, time_limit=LOCAL_SEARCH_TIME_LIMIT_SECONDS, max_iterations=None, stop_event=None,
+            initial_temperature=0.05, final_temperature=0.0005):
+        """
+        Anneal until time_limit, max_iterations or stop_event (threading.Event) stops it.
+
+        Returns:
+            dict: {'assignments': {match_id: scenario_id}, 'stadiums': {match_id: stadium},
+                   'initial_objective', 'best_objective', 'iterations', 'accepted',
+                   'moves_per_second', 'elapsed', 'stopped' (interrupted by stop_event)}
+        """
+        started = time.perf_counter()
+        initial_objective = best_objective = self.objective
+        best = dict(self.current)
+        iterations = accepted = 0
+        temperature = initial_temperature
+        stopped = False
+        while self.match_ids:
+            if iterations % 256 == 0:
+                elapsed = time.perf_counter() - started
+                if stop_event is not None and stop_event.is_set():
+                    stopped = True
+                    break
+                if elapsed >= time_limit or (max_iterations is not None and iterations >= max_iterations):
+                    break
+                progress = elapsed / time_limit if time_limit else 1.0
+                if max_iterations:
+                    progress = max(progress, iterations / max_iterations)
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** min(progress, 1.0)
+            iterations += 1
+            changes = self._propose()
+            if changes is None:
+                continue
+            applied = self._apply(changes)
+            if applied is None:
+                continue
+            delta, previous = applied
+            if self._last_move == 'stadium' and delta == 0:
+                self._revert(previous)  # A venue change must earn its place
+                continue
+            if delta >= 0 or self.rng.random() < math.exp(delta / temperature):
+                accepted += 1
+                self.objective += delta
+                if self.objective > best_objective + 1e-12:
+                    best_objective = self.objective
+                    best = dict(self.current)
+            else:
+                self._revert(previous)
+
+        elapsed = time.perf_counter() - started
+        scenario_ids = self.manager.store.columns['scenario_id']
+        return {
+            'assignments': {match_id: int(scenario_ids[row]) for match_id, (row, _) in best.items()},
+            # Only venues that differ from the stadium stored on the chosen scenario
+            'stadiums': {match_id: stadium for match_id, (row, stadium) in best.items() if stadium != self.row_info[row][4]},
+            'initial_objective': initial_objective,
+            'best_objective': best_objective,
+            'iterations': iterations,
+            'accepted': accepted,
+            'moves_per_second': iterations / elapsed if elapsed else 0.0,
+            'elapsed': elapsed,
+            'stopped': stopped
+        }
+
+
+def apply_schedule_improvement(scenario_manager, result):
+    """Select the improved scenarios and move matches to their new stadiums, as one journal entry"""
+    store = scenario_manager.store
+    venues = {}
+    for match_id, stadium in result['stadiums'].items():
+        scenario = ScenarioView(store, store.row_by_id[result['assignments'][match_id]])
+        venues[match_id] = (stadium, TEAM_STADIUMS.get(scenario.home_team, {}).get('city', scenario.city))
+    changed = scenario_manager.select_many(result['assignments'], venues=venues)
+    sync_session_with_selection(changed)
+    return changed
+
+
+PARETO_MAX_REST_DAYS = 7  # Longer gaps count as fully rested for travel burden
+PARETO_WEIGHT_SAMPLES = 40
+PARETO_GREEDY_SAMPLES = 200
+PARETO_ANCHOR_TIME_LIMIT_SECONDS = 0.25  # Single-criterion and equal-weight solves
+PARETO_SOLVE_TIME_LIMIT_SECONDS = 0.02   # Random weighted solves; the best plan found so far is used
+# Objective columns: (label, sense) with +1 maximized and -1 minimized
+PARETO_OBJECTIVES = {
+    'attendance': ('Avg attendance (%)', 1),
+    'profit': ('Total profit (SAR)', 1),
+    'travel_burden': ('Travel burden (km per rest day)', -1),
+    'rest_imbalance': ('Rest imbalance (missing rest days²)', -1),
+}
+# Criteria are compared at this precision, so float noise cannot make a plan non-dominated
+PARETO_DECIMALS = {'attendance': 2, 'profit': 0, 'travel_burden': 1, 'rest_imbalance': 2}
+
+
+@lru_cache(maxsize=None)
+def city_distance_km(city_a, city_b):
+    """Great-circle (haversine) distance between two cities of CITY_COORDINATES, 0 if either is unknown"""
+    if city_a == city_b or city_a not in CITY_COORDINATES or city_b not in CITY_COORDINATES:
+        return 0.0
+    lat_a, lon_a = map(math.radians, CITY_COORDINATES[city_a])
+    lat_b, lon_b = map(math.radians, CITY_COORDINATES[city_b])
+    h = math.sin((lat_b - lat_a) / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin((lon_b - lon_a) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def fast_non_dominated_sort(objectives):
+    """
+    Deb's fast non-dominated sorting, with the domination matrix built in one numpy pass.
+
+    Args:
+        objectives: (n, m) array, every column minimized
+
+    Returns:
+        list: fronts as lists of row indices, best front first
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    if not len(objectives):
+        return []
+    no_worse = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+    dominates = no_worse & better  # dominates[i, j]: i dominates j
+    dominated_by = dominates.sum(axis=0)
+    assigned = np.zeros(len(objectives), dtype=bool)
+    fronts = []
+    current = np.flatnonzero(dominated_by == 0)
+    while current.size:
+        fronts.append(current.tolist())
+        assigned[current] = True
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        current = np.flatnonzero((dominated_by == 0) & ~assigned)
+    return fronts
+
+
+class WeekParetoExplorer:
+    """
+    Pareto frontier of full-week schedules over attendance, profit, travel burden and rest imbalance.
+
+    Every schedule re-plans all matches of the week against the other selections, with the
+    WeekOptimizer constraints. Candidate schedules come from
+      - exact WeekOptimizer solves of random weighted sums of the four criteria (supported points),
+      - randomized greedy constructions (points inside non-convex parts of the frontier).
+    Only schedules that place the most matches are compared; fast_non_dominated_sort keeps the first front.
+    Travel burden: km each team travels from its previous venue (home city if none) divided by its
+    rest days (capped at PARETO_MAX_REST_DAYS). Rest imbalance: squared shortfall of every rest gap
+    below LOCAL_SEARCH_COMFORT_REST_DAYS, as in ScheduleImprover.
+    """
+
+    def __init__(self, scenario_manager, match_ids, weight_samples=PARETO_WEIGHT_SAMPLES,
+                 greedy_samples=PARETO_GREEDY_SAMPLES, seed=None):
+        self.manager = scenario_manager
+        self.match_ids = list(dict.fromkeys(match_ids))
+        self.weight_samples = weight_samples
+        self.greedy_samples = greedy_samples
+        self.rng = np.random.default_rng(seed)
+        self.optimizer = WeekOptimizer(scenario_manager, self.match_ids)
+        self._load_team_timelines()
+        self._build_criteria()
+
+    def _load_team_timelines(self):
+        """Sorted (date_ordinal, city) of the kept selections per team"""
+        free = set(self.match_ids)
+        self.timelines = {}
+        for match_id, scenario_id in self.manager.selected_scenarios.items():
+            if match_id in free:
+                continue
+            scenario = self.manager.get_scenario(scenario_id)
+            for team in (scenario.home_team, scenario.away_team):
+                self.timelines.setdefault(team, []).append((scenario.date_ordinal, scenario.city))
+        for timeline in self.timelines.values():
+            timeline.sort()
+
+    def _team_cost(self, team, ordinal, city, timeline):
+        """(travel burden, rest imbalance) of one team playing in city on ordinal, given its timeline"""
+        i = bisect.bisect_left(timeline, (ordinal, ''))
+        if i > 0:
+            prev_day, prev_city = timeline[i - 1]
+            gap = ordinal - prev_day
+        else:
+            prev_city, gap = TEAM_STADIUMS.get(team, {}).get('city', city), PARETO_MAX_REST_DAYS
+        travel = city_distance_km(prev_city, city) / max(1, min(gap, PARETO_MAX_REST_DAYS))
+        rest = max(0, LOCAL_SEARCH_COMFORT_REST_DAYS - gap) ** 2 if i > 0 else 0
+        if i < len(timeline):
+            rest += max(0, LOCAL_SEARCH_COMFORT_REST_DAYS - (timeline[i][0] - ordinal)) ** 2
+        return travel, rest
+
+    def _build_criteria(self):
+        """Per-candidate values of the four criteria against the kept selections"""
+        store = self.manager.store
+        columns = store.columns
+        self.values = {}  # {scenario_id: np.array([attendance, profit, travel, rest])}
+        for options in self.optimizer.candidates.values():
+            for _, scenario_id, ordinal, _, home, away in options:
+                row = store.row_by_id[scenario_id]
+                city = ScenarioView(store, row).city
+                travel = rest = 0.0
+                for team in (home, away):
+                    team_travel, team_rest = self._team_cost(team, ordinal, city, self.timelines.get(team, []))
+                    travel += team_travel
+                    rest += team_rest
+                self.values[scenario_id] = np.array([columns['attendance_percentage'][row], columns['profit'][row],
+                                                     travel, rest], dtype=float)
+        if self.values:
+            matrix = np.array(list(self.values.values()))
+            top = np.where(matrix.max(axis=0) > 0, matrix.max(axis=0), 1.0)
+            # 0..1 per criterion, higher is better
+            senses = np.array([sense for _, sense in PARETO_OBJECTIVES.values()])
+            scaled = np.where(senses > 0, matrix / top, 1.0 - matrix / top)
+            self.scaled = dict(zip(self.values, scaled))
+        else:
+            self.scaled = {}
+
+    def _scalarized(self, weights):
+        return {scenario_id: float(scaled @ weights) for scenario_id, scaled in self.scaled.items()}
+
+    def _solve(self, weights, time_limit):
+        scores = self._scalarized(weights)
+        self.optimizer.rescore(scores, dict(zip(PARETO_OBJECTIVES, weights)))
+        self.optimizer.time_limit = time_limit
+        return self.optimizer.solve()['assignments']
+
+    def _greedy(self, weights):
+        """Random-order greedy plan with noisy scalarized scores"""
+        optimizer = self.optimizer
+        day_load = dict(optimizer.day_load)
+        stadium_days = set(optimizer.stadium_days)
+        team_days = {team: set(days) for team, days in optimizer.team_days.items()}
+        scores = self._scalarized(weights)
+        assignments = {}
+        for index in self.rng.permutation(len(self.match_ids)):
+            match_id = self.match_ids[index]
+            options = optimizer.candidates[match_id]
+            noise = self.rng.normal(0.0, 0.1, len(options))
+            best = None
+            for option, jitter in zip(options, noise):
+                _, scenario_id, ordinal, stadium, home, away = option
+                if (day_load.get(ordinal, 0) >= MAX_MATCHES_PER_DAY or (stadium, ordinal) in stadium_days
+                        or any((ordinal + k) in team_days.get(team, ()) for team in (home, away)
+                               for k in range(1 - MIN_REST_DAYS, MIN_REST_DAYS))):
+                    continue
+                value = scores[scenario_id] + jitter
+                if best is None or value > best[0]:
+                    best = (value, option)
+            assignments[match_id] = None
+            if best is not None:
+                _, scenario_id, ordinal, stadium, home, away = best[1]
+                assignments[match_id] = scenario_id
+                day_load[ordinal] = day_load.get(ordinal, 0) + 1
+                stadium_days.add((stadium, ordinal))
+                team_days.setdefault(home, set()).add(ordinal)
+                team_days.setdefault(away, set()).add(ordinal)
+        return assignments
+
+    def evaluate(self, assignments):
+        """Criteria of a week plan (rounded to PARETO_DECIMALS), with the week's own matches in the team timelines"""
+        store = self.manager.store
+        # Fixed order (by scenario id) so equal plans always sum to the same value
+        chosen = [ScenarioView(store, store.row_by_id[scenario_id])
+                  for scenario_id in sorted(s for s in assignments.values() if s is not None)]
+        timelines = {team: list(timeline) for team, timeline in self.timelines.items()}
+        for scenario in chosen:
+            for team in (scenario.home_team, scenario.away_team):
+                bisect.insort(timelines.setdefault(team, []), (scenario.date_ordinal, scenario.city))
+        travel, rest = [], []
+        for scenario in chosen:
+            for team in (scenario.home_team, scenario.away_team):
+                timeline = timelines[team]
+                own = timeline.pop(bisect.bisect_left(timeline, (scenario.date_ordinal, scenario.city)))
+                team_travel, team_rest = self._team_cost(team, scenario.date_ordinal, scenario.city, timeline)
+                timeline.insert(bisect.bisect_left(timeline, own), own)
+                travel.append(team_travel)
+                rest.append(team_rest)
+        criteria = {
+            'attendance': math.fsum(scenario.attendance_percentage for scenario in chosen) / len(chosen) if chosen else 0.0,
+            'profit': math.fsum(scenario.profit for scenario in chosen),
+            'travel_burden': math.fsum(travel),
+            'rest_imbalance': math.fsum(rest),
+        }
+        result = {name: round(float(value), PARETO_DECIMALS[name]) for name, value in criteria.items()}
+        result['scheduled'] = len(chosen)
+        return result
+
+    def solve(self):
+        """
+        Returns:
+            pd.DataFrame: one row per frontier schedule, with the PARETO_OBJECTIVES columns,
+                          'scheduled', 'label' and 'assignments' ({match_id: scenario_id}),
+                          sorted by profit (highest first)
+        """
+        criteria = len(PARETO_OBJECTIVES)
+        anchors = list(np.eye(criteria)) + [np.full(criteria, 1.0 / criteria)]
+        plans = [self._solve(weights, PARETO_ANCHOR_TIME_LIMIT_SECONDS) for weights in anchors]
+        plans += [self._solve(weights, PARETO_SOLVE_TIME_LIMIT_SECONDS)
+                  for weights in self.rng.dirichlet(np.ones(criteria), self.weight_samples)]
+        plans += [self._greedy(weights) for weights in self.rng.dirichlet(np.ones(criteria), self.greedy_samples)]
+
+        unique = {}
+        for plan in plans:
+            unique.setdefault(tuple(sorted(plan.items())), plan)
+        records = [dict(self.evaluate(plan), assignments=plan) for plan in unique.values()]
+        if not records:
+            return pd.DataFrame(columns=list(PARETO_OBJECTIVES) + ['scheduled', 'label', 'assignments'])
+        most = max(record['scheduled'] for record in records)
+        records = [record for record in records if record['scheduled'] == most]
+
+        senses = np.array([sense for _, sense in PARETO_OBJECTIVES.values()])
+        minimized = np.array([[record[name] for name in PARETO_OBJECTIVES] for record in records]) * -senses
+        frontier = pd.DataFrame([records[i] for i in fast_non_dominated_sort(minimized)[0]])
+        # Plans with identical criteria are interchangeable; keep one of each
+        frontier = frontier.drop_duplicates(subset=list(PARETO_OBJECTIVES))
+        frontier = frontier.sort_values('profit', ascending=False).reset_index(drop=True)
+        frontier['label'] = ''
+        for name, tag in (('profit', 'Max revenue'), ('attendance', 'Max attendance'),
+                          ('travel_burden', 'Min travel'), ('rest_imbalance', 'Max rest')):
+            index = frontier[name].idxmax() if PARETO_OBJECTIVES[name][1] > 0 else frontier[name].idxmin()
+            frontier.loc[index, 'label'] = f"{frontier.loc[index, 'label']}, {tag}".strip(', ')
+        return frontier
+
+
+def compute_week_pareto_frontier(week_number, scenario_manager=None):
+    """Pareto frontier of full schedules for every match of a week (see WeekParetoExplorer)"""
+    scenario_manager = scenario_manager or st.session_state.scenario_manager
+    match_ids = list(st.session_state.week_match_ids.get(week_number, {}).values())
+    return WeekParetoExplorer(scenario_manager, match_ids).solve()
+
+
+REPAIR_TIME_LIMIT_SECONDS = 0.3  # Per solve; a repair runs at most three
+
+
+class ScheduleRepairer:
+    """
+    Minimal-change repair of the selected schedule after a disruption (a stadium closure or
+    a moved external fixture). The current selection is the warm start: only selected matches
+    that the new calendars reject are re-planned, everything else stays fixed.
+      1. A match whose stadium closed keeps its date and kick-off if another stadium of its
+         home team is open and free that day.
+      2. The rest are re-planned with WeekOptimizer against every other selection.
+      3. If some cannot be placed, the rest of their weeks and then REPAIR_WINDOW weeks
+         either side are re-planned as well, with a bonus for keeping each current scenario
+         that outweighs every score, so as few matches as possible move.
+    Matches that still cannot be placed are deselected and reported.
+    """
+    REPAIR_WINDOW = 1
+
+    def __init__(self, scenario_manager, week_match_ids, time_limit=REPAIR_TIME_LIMIT_SECONDS):
+        self.manager = scenario_manager
+        self.time_limit = time_limit
+        self.week_of = {match_id: week for week, ids in week_match_ids.items() for match_id in ids.values()}
+        self.weeks = sorted(week_match_ids)
+
+    def disrupted_matches(self, match_ids=None):
+        """{match_id: reason} for selected matches a team or stadium calendar now rejects"""
+        stadium_calendar = get_stadium_calendar()
+        disrupted = {}
+        for match_id in (self.manager.selected_scenarios if match_ids is None else match_ids):
+            scenario = self.manager.get_selected_scenario(match_id)
+            if scenario is None:
+                continue
+            reasons = []
+            for team in (scenario.home_team, scenario.away_team):
+                available, reason = is_team_available(team, scenario.match_date)
+                if not available:
+                    reasons.append(f"{team}: {reason}")
+            closure = stadium_calendar.closure_reason(scenario.stadium, scenario.match_date)
+            if closure:
+                reasons.append(f"{scenario.stadium}: {closure}")
+            if reasons:
+                disrupted[match_id] = "; ".join(reasons)
+        return disrupted
+
+    def _open_stadium(self, scenario, taken):
+        """Another open and unbooked stadium of the home team on the scenario's date, or None"""
+        ordinal = scenario.date_ordinal
+        for stadium, _, closure_reason in _stadium_candidates(scenario.home_team, scenario.match_date, get_stadium_calendar()):
+            if (closure_reason is None and stadium != scenario.stadium and (stadium, ordinal) not in taken
+                    and not self.manager.stadium_bookings.get((stadium, scenario.date))):
+                return stadium
+        return None
+
+    def _solve(self, match_ids, moved_stadiums):
+        optimizer = WeekOptimizer(self.manager, match_ids, time_limit=self.time_limit)
+        optimizer.stadium_days.update(moved_stadiums)
+        total = sum(optimizer.weights.values())
+        keep = len(match_ids) * total + 1.0
+        selected = self.manager.selected_scenarios
+        scores = {option[1]: option[0] + (keep if selected.get(match_id) == option[1] else 0.0)
+                  for match_id, options in optimizer.candidates.items() for option in options}
+        optimizer.rescore(scores, dict(optimizer.weights, keep=keep))
+        return optimizer.solve()
+
+    def repair(self, disrupted):
+        """
+        Args:
+            disrupted: match_ids (or {match_id: reason}) to repair
+
+        Returns:
+            dict: {'assignments': {match_id: scenario_id or None} for re-planned matches that change,
+                   'stadiums': {match_id: (stadium, city)} for matches that only change venue,
+                   'changed', 'unscheduled', 'level' (0 venue/affected only, 1 whole weeks, 2 window), 'elapsed'}
+        """
+        started = time.perf_counter()
+        selected = self.manager.selected_scenarios
+        stadium_calendar = get_stadium_calendar()
+        stadiums, taken, remaining = {}, set(), []
+        for match_id in disrupted:
+            scenario = self.manager.get_selected_scenario(match_id)
+            if scenario is None:
+                continue
+            teams_ok = all(is_team_available(team, scenario.match_date)[0] for team in (scenario.home_team, scenario.away_team))
+            stadium = None
+            if teams_ok and not stadium_calendar.is_available(scenario.stadium, scenario.match_date):
+                stadium = self._open_stadium(scenario, taken)
+            if stadium is None:
+                remaining.append(match_id)
+                continue
+            taken.add((stadium, scenario.date_ordinal))
+            stadiums[match_id] = (stadium, TEAM_STADIUMS.get(scenario.home_team, {}).get('city', scenario.city))
+
+        result, chosen_level = None, 0
+        if remaining:
+            disrupted_weeks = {self.week_of.get(match_id) for match_id in remaining}
+            window_weeks = {w for week in disrupted_weeks if week in self.weeks
+                            for w in self.weeks[max(self.weeks.index(week) - self.REPAIR_WINDOW, 0):
+                                                self.weeks.index(week) + self.REPAIR_WINDOW + 1]}
+            levels = [
+                remaining,
+                [match_id for match_id in selected if match_id in remaining or self.week_of.get(match_id) in disrupted_weeks],
+                [match_id for match_id in selected if match_id in remaining or self.week_of.get(match_id) in window_weeks],
+            ]
+            for level, match_ids in enumerate(levels):
+                if level and len(match_ids) == len(levels[level - 1]):
+                    continue
+                attempt = self._solve(match_ids, taken)
+                # A wider level only wins if it places more matches; ties keep the smaller change
+                if result is None or len(attempt['unscheduled']) < len(result['unscheduled']):
+                    result, chosen_level = attempt, level
+                if not attempt['unscheduled']:
+                    break
+
+        assignments = {}
+        if result is not None:
+            assignments = {match_id: scenario_id for match_id, scenario_id in result['assignments'].items()
+                           if selected.get(match_id) != scenario_id}
+        return {
+            'assignments': assignments,
+            'stadiums': stadiums,
+            'changed': sorted(set(assignments) | set(stadiums)),
+            'unscheduled': [match_id for match_id, scenario_id in assignments.items() if scenario_id is None],
+            'level': chosen_level,
+            'elapsed': time.perf_counter() - started
+        }
+
+
+def apply_repair(scenario_manager, plan):
+    """Apply a ScheduleRepairer plan, re-planned matches and venue changes, as one journal entry"""
+    changed = scenario_manager.select_many(plan['assignments'], venues=plan['stadiums'])
+    sync_session_with_selection(changed)
+    return changed
+
+
+# Disruptions are what-ifs of one session: they change session copies of the shared
+# calendars, never the st.cache_resource originals, and clear_disruptions() drops them.
+DISRUPTION_SESSION_KEYS = ('disrupted_stadium_calendar', 'disrupted_fixtures_registry', 'disrupted_team_calendar')
+
+
+def _session_copy(key, shared):
+    """This session's copy of a shared calendar, made on the first disruption"""
+    if st.session_state.get(key) is None:
+        st.session_state[key] = copy.deepcopy(shared)
+    return st.session_state[key]
+
+
+def active_disruptions():
+    """Descriptions of the disruptions applied in this session, oldest first"""
+    return st.session_state.get('disruptions', [])
+
+
+def clear_disruptions():
+    """Revert this session to the shared calendars. Repairs stay selected; Undo reverts them."""
+    for key in DISRUPTION_SESSION_KEYS + ('disruptions',):
+        st.session_state.pop(key, None)
+
+
+def reoptimize_after_stadium_closure(stadium, start_date, end_date, alternative=None, scenario_manager=None):
+    """Close a stadium for [start_date, end_date] and repair the matches booked there. Returns the repair plan."""
+    scenario_manager = scenario_manager or st.session_state.scenario_manager
+    _session_copy('disrupted_stadium_calendar', load_stadium_calendar()).add_closure(stadium, start_date, end_date, alternative)
+    st.session_state.disruptions = active_disruptions() + [f"{stadium} closed {start_date} to {end_date}"]
+    repairer = ScheduleRepairer(scenario_manager, st.session_state.week_match_ids)
+    affected = [match_id for match_id in scenario_manager.selected_scenarios
+                if scenario_manager.get_selected_scenario(match_id).stadium == stadium]
+    plan = repairer.repair(repairer.disrupted_matches(affected))
+    apply_repair(scenario_manager, plan)
+    return plan
+
+
+def reoptimize_after_fixture_move(team, old_date, new_date, scenario_manager=None):
+    """Move a team's external fixture and repair the team's matches it now blocks. Returns the repair plan."""
+    scenario_manager = scenario_manager or st.session_state.scenario_manager
+    registry = _session_copy('disrupted_fixtures_registry', load_external_fixtures_registry())
+    registry.move_fixture(team, old_date, new_date)
+    _session_copy('disrupted_team_calendar', load_team_availability_calendar()).refresh_team(team, registry.fixtures)
+    st.session_state.disruptions = active_disruptions() + [f"{team}: fixture {old_date} moved to {new_date}"]
+    repairer = ScheduleRepairer(scenario_manager, st.session_state.week_match_ids)
+    affected = [match_id for match_id in scenario_manager.selected_scenarios
+                if team in (scenario_manager.get_selected_scenario(match_id).home_team,
+                            scenario_manager.get_selected_scenario(match_id).away_team)]
+    plan = repairer.repair(repairer.disrupted_matches(affected))
+    apply_repair(scenario_manager, plan)
+    return plan
+
+
+def sync_session_with_selection(match_ids):
+    """
+    Bring day_counts and schedule_df in line with the scenario manager after an undo/redo.
+    Only the given matches' rows of schedule_df are touched.
+    """
+    scenario_manager = st.session_state.scenario_manager
+
+    # The weekly view keys day_counts by datetime.date: recount those from the selections
+    day_counts = st.session_state.day_counts
+    for key in [key for key in day_counts if isinstance(key, datetime.date)]:
+        del day_counts[key]
+    for match_id in scenario_manager.selected_scenarios:
+        match_date = scenario_manager.get_selected_scenario(match_id).match_date
+        day_counts[match_date] = day_counts.get(match_date, 0) + 1
+
+    if 'schedule_df' not in st.session_state:
+        return
+    schedule_df = st.session_state.schedule_df
+    if 'match_id' in schedule_df.columns:
+        schedule_df = schedule_df[~schedule_df['match_id'].isin(list(match_ids))]
+    new_rows = []
+    for match_id in match_ids:
+        scenario = scenario_manager.get_selected_scenario(match_id)
+        if scenario is None:
+            continue
+        week_number = next((week for week, ids in st.session_state.week_match_ids.items() if match_id in ids.values()), None)
+        new_rows.append({
+            'match_id': match_id, 'home_team': scenario.home_team, 'away_team': scenario.away_team,
+            'date': scenario.date, 'time': scenario.time,
+            'city': scenario.city, 'stadium': scenario.stadium,
+            'suitability_score': scenario.suitability_score,
+            'attendance_percentage': scenario.attendance_percentage,
+            'profit': scenario.profit, 'week': week_number,
+            'is_selected': True
+        })
+    if new_rows:
+        schedule_df = pd.concat([schedule_df, pd.DataFrame(new_rows)], ignore_index=True)
+    st.session_state.schedule_df = schedule_df
+
+
 def display_week_scenarios(week_number, matches_from_excel):
     """
     Display matches for a week with stadium dropdown selection.
@@ -2193,22 +4627,7 @@ def display_week_scenarios(week_number, matches_from_excel):
         st.info(f"No matches found for week {week_number}.")
         return
 
-    week_start_dates = {
-        7: datetime.date(2025, 10, 30), 8: datetime.date(2025, 11, 6),
-        9: datetime.date(2025, 11, 21), 10: datetime.date(2025, 12, 19),
-        11: datetime.date(2025, 12, 25), 12: datetime.date(2025, 12, 29),
-        13: datetime.date(2026, 1, 2), 14: datetime.date(2026, 1, 8),
-        15: datetime.date(2026, 1, 12), 16: datetime.date(2026, 1, 16),
-        17: datetime.date(2026, 1, 20), 18: datetime.date(2026, 1, 24),
-        19: datetime.date(2026, 1, 28), 20: datetime.date(2026, 2, 1),
-        21: datetime.date(2026, 2, 5), 22: datetime.date(2026, 2, 12),
-        23: datetime.date(2026, 2, 19), 24: datetime.date(2026, 2, 26),
-        25: datetime.date(2026, 3, 5), 26: datetime.date(2026, 3, 12),
-        27: datetime.date(2026, 4, 3), 28: datetime.date(2026, 4, 9),
-        29: datetime.date(2026, 4, 23), 30: datetime.date(2026, 4, 28),
-        31: datetime.date(2026, 5, 2), 32: datetime.date(2026, 5, 7),
-        33: datetime.date(2026, 5, 13), 34: datetime.date(2026, 5, 21),
-    }
+    week_start_dates = LEAGUE_WEEK_START_DATES
     
     thu_date = week_start_dates.get(week_number)
     if not thu_date:
@@ -2218,6 +4637,23 @@ def display_week_scenarios(week_number, matches_from_excel):
     days = [thu_date + datetime.timedelta(days=d) for d in range(3)]
     day_names = [day.strftime('%A') for day in days]
 
+    # One-click plan for every match of the week that is still open
+    if st.button("⚡ Auto-select best scenarios", key=f"auto_select_{week_number}",
+                 help="Pick the best feasible scenario for each unselected match (day cap, stadiums, availability, rest).",
+                 disabled=external_fixtures_error() is not None):
+        plan = auto_select_week(week_number)
+        st.session_state.optimizer_message = (
+            f"Week {week_number}: scheduled {plan['scheduled']} match(es)"
+            + (f", {len(plan['unscheduled'])} without a feasible scenario" if plan['unscheduled'] else "")
+            + f" in {plan['elapsed'] * 1000:.1f} ms" + ("" if plan['optimal'] else " (time limit reached, best found)")
+        )
+        st.rerun()
+    if st.session_state.get('optimizer_message'):
+        st.info(st.session_state.pop('optimizer_message'))
+
+    # Stadium options for all cards of the week, resolved with one booking scan
+    week_stadium_options = resolve_week_stadium_options(week_number, pairings, days, st.session_state.scenario_manager)
+
     selected_count = 0
     for home, away in pairings:
         match_key = (home, away)
@@ -2229,17 +4665,12 @@ def display_week_scenarios(week_number, matches_from_excel):
         # Check if match is already selected
         if match_id in st.session_state.scenario_manager.selected_scenarios:
             selected_count += 1
-            scenario_id = st.session_state.scenario_manager.selected_scenarios[match_id]
             scenarios = st.session_state.scenario_manager.get_scenarios_for_match(match_id)
-            selected_scenario = None
-            for scenario in scenarios:
-                if scenario.scenario_id == scenario_id:
-                    selected_scenario = scenario
-                    break
+            selected_scenario = st.session_state.scenario_manager.get_selected_scenario(match_id)
                         
             # For SELECTED matches
             if selected_scenario:
-                day_name = datetime.datetime.strptime(selected_scenario.date, '%Y-%m-%d').strftime('%A')
+                day_name = selected_scenario.match_date.strftime('%A')
                 time_context = get_scenario_time_context(selected_scenario, scenarios)
                                 
                 # Get team rankings for the card
@@ -2330,9 +4761,9 @@ def display_week_scenarios(week_number, matches_from_excel):
                 st.markdown(''.join(selected_card_parts), unsafe_allow_html=True)
                 
                 if st.button(f"Deselect Match", key=f"deselect_{match_id}_{week_number}"):
-                    # Remove from selected scenarios
-                    del st.session_state.scenario_manager.selected_scenarios[match_id]
-                    current_date = datetime.datetime.strptime(selected_scenario.date, '%Y-%m-%d').date()
+                    # Remove from selected scenarios and release the stadium booking
+                    st.session_state.scenario_manager.deselect_scenario(match_id)
+                    current_date = selected_scenario.match_date
                     
                     # Decrement day count
                     if st.session_state.day_counts.get(current_date, 0) > 0:
@@ -2358,7 +4789,7 @@ def display_week_scenarios(week_number, matches_from_excel):
         available_scenarios = []
         filtered_out_count = 0
         for s in scenarios:
-            scenario_date = datetime.datetime.strptime(s.date, '%Y-%m-%d').date()
+            scenario_date = s.match_date
             if scenario_date not in days:
                 filtered_out_count += 1
                 continue
@@ -2392,11 +4823,8 @@ def display_week_scenarios(week_number, matches_from_excel):
             
             available_scenarios.append(s)
 
-        # Sort scenarios by date and time
-        available_scenarios.sort(key=lambda s: (
-            datetime.datetime.strptime(s.date, '%Y-%m-%d').date(),
-            datetime.datetime.strptime(s.time, '%H:%M').time()
-        ))
+        # Best scenarios first: available, most suitable, then by date and time
+        available_scenarios.sort(key=scenario_rank_key)
 
         st.subheader(f"{home} vs {away}")
         if not available_scenarios:
@@ -2409,16 +4837,19 @@ def display_week_scenarios(week_number, matches_from_excel):
         cols = st.columns(3)
         for i, scenario in enumerate(available_scenarios):
             with cols[i % 3]:
-                scenario_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
+                scenario_date = scenario.match_date
                 
-                # Get available and unavailable stadiums for the home team on this date and time
-                available_stadiums, unavailable_stadiums = get_available_stadiums_for_team(
-                    home, 
-                    scenario_date, 
-                    scenario.time,
-                    current_match_id=match_id,
-                    scenario_manager=st.session_state.scenario_manager
-                )
+                # Get available and unavailable stadiums for the home team on this date (resolved for the whole week)
+                stadium_key = (home, scenario_date, match_id)
+                if stadium_key not in week_stadium_options:
+                    week_stadium_options[stadium_key] = get_available_stadiums_for_team(
+                        home, 
+                        scenario_date, 
+                        scenario.time,
+                        current_match_id=match_id,
+                        scenario_manager=st.session_state.scenario_manager
+                    )
+                available_stadiums, unavailable_stadiums = week_stadium_options[stadium_key]
                 
                 # Check if the day is full (3 matches already selected)
                 current_day_count = st.session_state.day_counts.get(scenario_date, 0)
@@ -2435,7 +4866,7 @@ def display_week_scenarios(week_number, matches_from_excel):
                     card_color = "#e8f5e9" if scenario.suitability_score > 80 else "#fff3e0" if scenario.suitability_score > 60 else "#ffebee"
                     border_color = "#4caf50" if scenario.suitability_score > 80 else "#ff9800" if scenario.suitability_score > 60 else "#f44336"
                     
-                day_name = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').strftime('%A')
+                day_name = scenario.match_date.strftime('%A')
                 time_context = get_scenario_time_context(scenario, available_scenarios)
                 
                 # Get team rankings
@@ -2520,6 +4951,7 @@ def display_week_scenarios(week_number, matches_from_excel):
                 card_parts.append(f'<div>🏟️ {scenario.stadium} ({scenario.city})</div>')
                 card_parts.append(f'<div style="margin-top: 5px;">{time_context}</div>')
                 card_parts.append(f'<div>👥 Attendance: {scenario.attendance_percentage}%</div>')
+                card_parts.append(f'<div>⭐ Suitability: {scenario.suitability_score:.0f}%</div>')
                 
                 if last_match_html:
                     card_parts.append(last_match_html)
@@ -2605,13 +5037,12 @@ def display_week_scenarios(week_number, matches_from_excel):
                             # Keep the current stadium unchanged
                         elif new_stadium != scenario.stadium and is_selectable:
                             # Valid selection, update the scenario
-                            scenario.stadium = new_stadium
-                            scenario.city = new_city
+                            st.session_state.scenario_manager.set_scenario_stadium(scenario.scenario_id, new_stadium, new_city)
                 
                 # Select button
                 if scenario.is_available:
                     if st.button(f"Select", key=f"select_{scenario.scenario_id}_{week_number}_{match_id}"):
-                        current_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
+                        current_date = scenario.match_date
                         if st.session_state.day_counts.get(current_date, 0) >= 3:
                             st.error(f"Cannot select: {current_date} is full (3 matches).")
                         else:
@@ -2766,15 +5197,381 @@ def is_international_stop_day(check_date, afc_df):
                     continue
     return False, ""
 
-def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model, profit_model, models_loaded, start_date, end_date, selected_teams=None, selected_cities=None, selected_time_filters=None, matches_per_week=9, matches_from_excel=None):
+# Spellings the shipped models were trained with, for names the app writes differently.
+# Anything the models never saw (e.g. NEOM, Najran) is ignored by their one-hot encoders.
+MODEL_CATEGORY_ALIASES = {
+    'Al-riyadh': 'Al-Riyadh',
+    'Buraydah': 'Buraidah',
+    'Al-Majmaah': "Al Majma'ah",
+}
+MODEL_SEASON_LABEL = 'Season 2'
+PRIME_TIME_START_MINUTES = 20 * 60
+WEEKEND_DAYS = {'Friday', 'Saturday'}
+TOP_TEAM_RANK = 5  # Teams ranked this high (or 'strong') make a top-team match
+# Training means of the model inputs, used where the schedule cannot know the value in advance
+MODEL_FEATURE_DEFAULTS = {
+    'avg_ticket_price': 81.3,
+    'attendance_percentage': 56.4,
+    'temperature': 24.8,
+    'humidity': 51.2,
+    'stadium_capacity': 20000,
+    'fajr_minutes': 246, 'dhuhr_minutes': 727, 'asr_minutes': 933,
+    'maghrib_minutes': 1121, 'isha_minutes': 1211,
+}
+PRAYER_MINUTE_COLUMNS = ['fajr_minutes', 'dhuhr_minutes', 'asr_minutes', 'maghrib_minutes', 'isha_minutes']
+
+
+def build_scenario_features(store, rows, teams_data, weather_data, match_weeks):
+    """
+    Build the model feature matrix for a set of ScenarioStore rows in one pass.
+    Team, city and day attributes are computed once per distinct value and broadcast
+    to the rows by their categorical codes, so the cost grows with the number of teams,
+    cities and days rather than with the number of scenarios.
+
+    Args:
+        store (ScenarioStore): Scenario columns
+        rows (array-like): Store rows to build features for
+        teams_data (DataFrame): team, city, stadium, stadium_capacity and strength per team
+        weather_data (DataFrame): temperature and humidity per city
+        match_weeks (dict): {match_id: league week}
+
+    Returns:
+        DataFrame: One row per store row with every column the shipped models expect
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = store.columns
+    teams = store.categories['team']
+    cities = store.categories['city']
+    home = columns['home_team'][rows]
+    away = columns['away_team'][rows]
+    city = columns['city'][rows]
+    ordinals = columns['date_ordinal'][rows].astype(np.int64)
+    kickoff = columns['kickoff_minutes'][rows].astype(np.int64)
+
+    # Per-team attributes, indexed by team code
+    team_info = teams_data.drop_duplicates('team').set_index('team')
+    rankings = get_team_ranking()
+    team_is_top = np.array([
+        (team in team_info.index and team_info.at[team, 'strength'] == 'strong')
+        or rankings.get(team, {}).get('rank', 999) <= TOP_TEAM_RANK
+        for team in teams
+    ], dtype=bool)
+    team_home_city = np.array([team_info.at[team, 'city'] if team in team_info.index else team for team in teams], dtype=object)
+    team_capacity = np.array([
+        float(team_info.at[team, 'stadium_capacity']) if team in team_info.index else MODEL_FEATURE_DEFAULTS['stadium_capacity']
+        for team in teams
+    ])
+    team_labels = np.array([MODEL_CATEGORY_ALIASES.get(team, team) for team in teams], dtype=object)
+
+    # Capacity of the scenario's venue: the home team's figure at its own ground, otherwise the
+    # largest capacity teams_data lists for that stadium (the home team's if it lists none)
+    stadiums = store.categories['stadium']
+    stadium = columns['stadium'][rows]
+    listed_capacity = teams_data.groupby('stadium')['stadium_capacity'].max() if 'stadium' in teams_data.columns else pd.Series(dtype=float)
+    stadium_listed = np.array([s in listed_capacity.index for s in stadiums], dtype=bool)
+    stadium_capacity = np.array([float(listed_capacity[s]) if s in listed_capacity.index else 0.0 for s in stadiums])
+    home_grounds = [
+        {team_info.at[team, 'stadium'] if team in team_info.index and 'stadium' in team_info.columns else None,
+         TEAM_STADIUMS.get(team, {}).get('primary')}
+        for team in teams
+    ]
+    at_home_ground = np.array([stadiums[s] in home_grounds[h] for h, s in zip(home, stadium)], dtype=bool)
+    venue_capacity = np.where(at_home_ground | ~stadium_listed[stadium], team_capacity[home], stadium_capacity[stadium])
+
+    # Per-city weather, indexed by city code
+    city_weather = weather_data.groupby('city')[['temperature', 'humidity']].mean() if weather_data is not None and not weather_data.empty else pd.DataFrame(columns=['temperature', 'humidity'])
+    city_temperature = np.array([city_weather.at[c, 'temperature'] if c in city_weather.index else MODEL_FEATURE_DEFAULTS['temperature'] for c in cities], dtype=float)
+    city_humidity = np.array([city_weather.at[c, 'humidity'] if c in city_weather.index else MODEL_FEATURE_DEFAULTS['humidity'] for c in cities], dtype=float)
+    city_labels = np.array([MODEL_CATEGORY_ALIASES.get(c, c) for c in cities], dtype=object)
+
+    # Per-day attributes
+    unique_days, day_index = np.unique(ordinals, return_inverse=True)
+    day_names = np.array([datetime.date.fromordinal(int(o)).strftime('%A') for o in unique_days], dtype=object)[day_index]
+
+    # Prayer times once per distinct city-day (served by the prayer time cache)
+    prayer_minutes = np.empty((len(rows), len(PRAYER_MINUTE_COLUMNS)), dtype=float)
+    if len(rows):
+        city_days, city_day_index = np.unique(np.stack([city.astype(np.int64), ordinals], axis=1), axis=0, return_inverse=True)
+        city_day_minutes = np.empty((len(city_days), len(PRAYER_MINUTE_COLUMNS)), dtype=float)
+        for i, (city_code, ordinal) in enumerate(city_days):
+            prayer_times = get_prayer_times_unified(cities[city_code], datetime.date.fromordinal(int(ordinal)))
+            minutes = prayer_times.get('minutes', {}) if isinstance(prayer_times, dict) else {}
+            city_day_minutes[i] = [minutes.get(column, MODEL_FEATURE_DEFAULTS[column]) for column in PRAYER_MINUTE_COLUMNS]
+        prayer_minutes = city_day_minutes[city_day_index.reshape(-1)]
+
+    features = pd.DataFrame({
+        'home_team': team_labels[home],
+        'away_team': team_labels[away],
+        'week': np.array([match_weeks.get(int(m), 0) for m in columns['match_id'][rows]], dtype=np.int64),
+        'city': city_labels[city],
+        'stadium_capacity': venue_capacity,
+        'avg_ticket_price': MODEL_FEATURE_DEFAULTS['avg_ticket_price'],
+        'attendance_percentage': MODEL_FEATURE_DEFAULTS['attendance_percentage'],
+        'temperature': city_temperature[city],
+        'humidity': city_humidity[city],
+        'weather_description': 'Clear',
+        'is_weekend': np.isin(day_names, list(WEEKEND_DAYS)).astype(np.int64),
+        'match_hour': kickoff // 60,
+        'is_top_team_match': (team_is_top[home] | team_is_top[away]).astype(np.int64),
+        'is_derby': (team_home_city[home] == team_home_city[away]).astype(np.int64),
+        'is_prime_time': (kickoff >= PRIME_TIME_START_MINUTES).astype(np.int64),
+        'day_of_week': day_names,
+        'season': MODEL_SEASON_LABEL,
+    })
+    for i, column in enumerate(PRAYER_MINUTE_COLUMNS):
+        features[column] = prayer_minutes[:, i]
+    return features
+
+
+MODEL_INPUT_CLIP_STD = 2  # Numeric inputs are held within this many training standard deviations
+
+
+def clip_to_training_range(model, features):
+    """
+    Return the model's input columns with numeric values clipped to the range the model
+    was fitted on (mean +/- MODEL_INPUT_CLIP_STD standard deviations of its StandardScaler).
+    The shipped models were trained on summer fixtures, so winter prayer times would
+    otherwise be extrapolated far outside anything they have seen.
+    """
+    inputs = features[list(model.feature_names_in_)].copy()
+    preprocessor = model.named_steps.get('preprocessor') if hasattr(model, 'named_steps') else None
+    if preprocessor is None:
+        return inputs
+    for name, transformer, transformer_columns in preprocessor.transformers_:
+        if not hasattr(transformer, 'mean_') or not hasattr(transformer, 'scale_'):
+            continue
+        for column, mean, scale in zip(transformer_columns, transformer.mean_, transformer.scale_):
+            if column in inputs.columns:
+                inputs[column] = inputs[column].clip(mean - MODEL_INPUT_CLIP_STD * scale, mean + MODEL_INPUT_CLIP_STD * scale)
+    return inputs
+
+
+PREDICTION_CACHE_PATH = 'prediction_cache.sqlite'
+PREDICTION_CACHE_MAX_ENTRIES = 200000
+PREDICTION_FEATURES_VERSION = 2  # Bump whenever build_scenario_features or the cached values change meaning
+
+
+def get_prediction_model_signature():
+    """
+    Identify the model files and feature builder in use.
+    Cached predictions made with a different signature are discarded.
+    """
+    files = {}
+    for name, path in sorted(MODEL_PATHS.items()):
+        try:
+            stat = os.stat(path)
+            files[name] = [stat.st_size, int(stat.st_mtime)]
+        except OSError:
+            files[name] = None
+    payload = json.dumps({'files': files, 'features_version': PREDICTION_FEATURES_VERSION}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class PredictionCache:
+    """
+    Persistent LRU cache of model outputs keyed by (model name, hash of the model's feature row).
+    Most rows are unchanged when a week is regenerated or a stadium is swapped, so only
+    new feature rows reach the models. Recently used entries are kept in memory; SQLite
+    keeps them between runs and is trimmed to PREDICTION_CACHE_MAX_ENTRIES.
+    """
+    def __init__(self, path=PREDICTION_CACHE_PATH, model_signature=None, max_entries=PREDICTION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.model_signature = model_signature or get_prediction_model_signature()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # {(model, key): value}, least recently used first
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "model TEXT NOT NULL, key INTEGER NOT NULL, value REAL NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._invalidate_on_model_change()
+        self._conn.commit()
+        # Upper bound of the rows on disk; the table is only scanned for eviction once it passes max_entries
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def _invalidate_on_model_change(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'model_signature'").fetchone()
+        if row is None or row[0] != self.model_signature:
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('model_signature', ?)",
+                (self.model_signature,)
+            )
+            self._memory.clear()
+
+    @staticmethod
+    def feature_keys(inputs):
+        """One stable 64-bit key per feature row (same row, same key across runs)."""
+        return pd.util.hash_pandas_object(inputs, index=False).to_numpy().view(np.int64)
+
+    def _remember(self, entry, value):
+        self._memory[entry] = value
+        self._memory.move_to_end(entry)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model, keys):
+        """
+        Look up cached values for an array of keys.
+        Returns (values, missing) where missing marks the keys that must still be predicted.
+        """
+        values = np.full(len(keys), np.nan)
+        with self._lock:
+            on_disk = []
+            for i, key in enumerate(keys.tolist()):
+                entry = (model, key)
+                if entry in self._memory:
+                    self._memory.move_to_end(entry)
+                    values[i] = self._memory[entry]
+                else:
+                    on_disk.append(i)
+            for start in range(0, len(on_disk), 500):
+                chunk = on_disk[start:start + 500]
+                chunk_keys = [int(keys[i]) for i in chunk]
+                found = dict(self._conn.execute(
+                    f"SELECT key, value FROM predictions WHERE model = ? AND key IN ({','.join('?' * len(chunk_keys))})",
+                    [model] + chunk_keys
+                ).fetchall())
+                for i, key in zip(chunk, chunk_keys):
+                    if key in found:
+                        values[i] = found[key]
+                        self._remember((model, key), found[key])
+            # Mark every hit as used now, so trimming evicts the least recently used entries
+            hit_keys = [int(key) for key, hit in zip(keys.tolist(), ~np.isnan(values)) if hit]
+            if hit_keys:
+                now = time.time()
+                for start in range(0, len(hit_keys), 500):
+                    chunk_keys = hit_keys[start:start + 500]
+                    self._conn.execute(
+                        f"UPDATE predictions SET last_used = ? WHERE model = ? AND key IN ({','.join('?' * len(chunk_keys))})",
+                        [now, model] + chunk_keys
+                    )
+                self._conn.commit()
+        missing = np.isnan(values)
+        self.misses += int(missing.sum())
+        self.hits += int(len(keys) - missing.sum())
+        return values, missing
+
+    def put_many(self, model, keys, values):
+        """Store predicted values for an array of keys in one transaction."""
+        now = time.time()
+        rows = [(model, int(key), float(value), now) for key, value in zip(keys.tolist(), values.tolist())]
+        with self._lock:
+            for _, key, value, _ in rows:
+                self._remember((model, key), value)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions (model, key, value, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._disk_entries += len(rows)  # Replaced keys are over-counted until the next eviction
+            if self._disk_entries > self.max_entries:
+                # Evict the least recently used entries beyond the size limit
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM predictions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            self._conn.commit()
+
+    def cached_predict(self, model, inputs, predict):
+        """
+        Return predict(inputs) for every row, calling predict only on rows not cached yet.
+        predict must be row-wise (each output depends on its own row only).
+        """
+        keys = self.feature_keys(inputs)
+        values, missing = self.get_many(model, keys)
+        if missing.any():
+            values[missing] = predict(inputs[missing])
+            self.put_many(model, keys[missing], values[missing])
+        return values
+
+    def clear(self):
+        """Remove every cached prediction and reset counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.commit()
+            self._disk_entries = 0
+            self._memory.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+            'entries': len(self._memory)
+        }
+
+
+@st.cache_resource
+def get_prediction_cache():
+    """Process-wide prediction cache shared by every session."""
+    return PredictionCache()
+
+
+def predict_scenarios_batch(scenario_manager, teams_data, weather_data, match_weeks,
+                            attendance_model=None, profit_model=None, suitability_model=None, rows=None):
+    """
+    Predict attendance, profit and suitability for every available scenario with a
+    single predict call per model, and write the results into the scenario store.
+    The feature matrix is built once and shared; models that are None are skipped and
+    leave their column untouched. Unavailable scenarios keep 0, as before.
+    rows limits the prediction to those store rows (e.g. scenarios moved to another stadium).
+
+    Returns:
+        int: Number of scenarios predicted
+    """
+    store = scenario_manager.store
+    available = np.flatnonzero(store.columns['is_available'][:store.size])
+    rows = available if rows is None else np.intersect1d(available, np.asarray(rows, dtype=np.int64))
+    if not len(rows):
+        return 0
+
+    features = build_scenario_features(store, rows, teams_data, weather_data, match_weeks)
+    cache = get_prediction_cache()
+    if attendance_model is not None:
+        # The attendance model predicts spectators; the schedule shows the share of the stadium filled
+        spectators = cache.cached_predict('attendance', clip_to_training_range(attendance_model, features), attendance_model.predict)
+        attendance = np.clip(spectators / features['stadium_capacity'].to_numpy() * 100, 0, 100)
+        store.columns['attendance_percentage'][rows] = np.round(attendance, 1)
+        features['attendance_percentage'] = attendance  # Suitability sees the predicted crowd
+    if profit_model is not None:
+        profit = cache.cached_predict(
+            'profit', clip_to_training_range(profit_model, features),
+            lambda inputs: np.maximum(profit_model.predict(inputs), 0)
+        )
+        store.columns['profit'][rows] = np.round(profit)
+    if suitability_model is not None:
+        def predict_suitability(inputs):
+            probabilities = suitability_model.predict_proba(inputs)
+            # Normalize rows: forests pickled with older scikit-learn return class counts, not fractions
+            probabilities = probabilities / probabilities.sum(axis=1, keepdims=True)
+            return probabilities[:, list(suitability_model.classes_).index(1)] * 100
+
+        suitability = cache.cached_predict('suitability', clip_to_training_range(suitability_model, features), predict_suitability)
+        store.columns['suitability_score'][rows] = np.round(suitability, 1)
+    return len(rows)
+
+
+def scenario_rank_key(scenario):
+    """Sort key ranking scenarios best first: available, most suitable, then earliest kick-off"""
+    return (not scenario.is_available, -scenario.suitability_score, scenario.date_ordinal, scenario.kickoff_minutes)
+
+
+def generate_full_schedule_with_isha(teams_data, weather_data, start_date, end_date, selected_teams=None, selected_cities=None, selected_time_filters=None, matches_per_week=9, matches_from_excel=None):
     """
     Generates up to 9 match scenarios per match for weeks 7 to 34, using three time slots per day (16:00, Maghrib - 51 min, Isha - 44 min, with 21:00 mandatory),
     incorporating Asr, Maghrib, and Isha prayer times, ensuring matches avoid prayer times or place prayers during halftime.
     """
     st.write("Starting scenario generation for weeks 7 to 34...")
     scenario_manager = st.session_state.scenario_manager
-    scenario_manager.scenarios = {}
-    scenario_manager.selected_scenarios = {}
+    scenario_manager.clear()
 
     match_id_counter = 0
     scenario_id_counter = 0
@@ -2791,18 +5588,7 @@ def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model,
     if not weeks_to_process:
         weeks_to_process = list(range(7, 35))
 
-    week_start_dates = {
-        7: datetime.date(2025, 10, 30), 8: datetime.date(2025, 11, 6), 9: datetime.date(2025, 11, 21),
-        10: datetime.date(2025, 12, 19), 11: datetime.date(2025, 12, 25), 12: datetime.date(2025, 12, 29),
-        13: datetime.date(2026, 1, 2), 14: datetime.date(2026, 1, 8), 15: datetime.date(2026, 1, 12),
-        16: datetime.date(2026, 1, 16), 17: datetime.date(2026, 1, 20), 18: datetime.date(2026, 1, 24),
-        19: datetime.date(2026, 1, 28), 20: datetime.date(2026, 2, 1), 21: datetime.date(2026, 2, 5),
-        22: datetime.date(2026, 2, 12), 23: datetime.date(2026, 2, 19), 24: datetime.date(2026, 2, 26),
-        25: datetime.date(2026, 3, 5), 26: datetime.date(2026, 3, 12), 27: datetime.date(2026, 4, 3),
-        28: datetime.date(2026, 4, 9), 29: datetime.date(2026, 4, 23), 30: datetime.date(2026, 4, 28),
-        31: datetime.date(2026, 5, 2), 32: datetime.date(2026, 5, 7), 33: datetime.date(2026, 5, 13),
-        34: datetime.date(2026, 5, 21)
-    }
+    week_start_dates = LEAGUE_WEEK_START_DATES
 
     redistributed_matches = validate_and_redistribute_matches(matches_from_excel, week_start_dates)
     st.session_state.week_match_ids = {week: {} for week in weeks_to_process}
@@ -2818,6 +5604,20 @@ def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model,
     teams_data_normalized = teams_data.copy()
     teams_data_normalized['team_lower'] = teams_data_normalized['team'].str.lower()
 
+    # Fill the prayer time cache for every city-day of the season in one pass
+    home_cities = set(teams_data_normalized['city'].unique()) | {info['city'] for info in TEAM_STADIUMS.values()}
+    season_city_days = collect_prayer_time_requests(
+        {week: week_start_dates[week] for week in weeks_to_process if week in week_start_dates},
+        cities=home_cities
+    )
+    prefetch_summary = prefetch_prayer_times(season_city_days)
+    logger.info("Prayer times prefetched: %s", prefetch_summary)
+
+    # Slots are calculated once per distinct city-day, not per match
+    slot_table = get_slot_table()
+    slot_table.precompute(season_city_days)
+    logger.info("Slot table ready: %s", slot_table.stats())
+
     for week in weeks_to_process:
         thu_this_week = week_start_dates.get(week)
         if not thu_this_week:
@@ -2933,12 +5733,10 @@ def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model,
                         suitability_score=100 if is_available else 0,
                         attendance_percentage=random.randint(40, 95) if is_available else 0,
                         profit=random.randint(3000, 10000) if is_available else 0,
-                        is_available=is_available
+                        is_available=is_available,
+                        conflict_reason=conflict_reason
                     )
                     
-                    # Add conflict reason to scenario object
-                    scenario.conflict_reason = conflict_reason
-                    
                     scenarios_for_match.append(scenario)
                     scenario_id_counter += 1
                     match_scenarios_total += 1
@@ -3026,12 +5824,10 @@ def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model,
                                 suitability_score=100 if is_available_extra else 0,
                                 attendance_percentage=random.randint(40, 95) if is_available_extra else 0,
                                 profit=random.randint(3000, 10000) if is_available_extra else 0,
-                                is_available=is_available_extra
+                                is_available=is_available_extra,
+                                conflict_reason=extra_conflict_reason
                             )
                             
-                            # Add conflict reason to extra scenario
-                            scenario.conflict_reason = extra_conflict_reason
-                            
                             scenarios_for_match.append(scenario)
                             scenario_id_counter += 1
                             match_scenarios_total += 1
@@ -3047,19 +5843,35 @@ def generate_full_schedule_with_isha(teams_data, weather_data, attendance_model,
             scenarios_for_match = scenarios_for_match[:12]
             
             # Sort scenarios by date and time before storing
-            scenarios_for_match.sort(key=lambda s: (
-                datetime.datetime.strptime(s.date, '%Y-%m-%d').date(),
-                datetime.datetime.strptime(s.time, '%H:%M').time()
-            ))
+            scenarios_for_match.sort(key=lambda s: (s.date_ordinal, s.kickoff_minutes))
             
             for scenario in scenarios_for_match:
-                if match_id not in scenario_manager.scenarios:
-                    scenario_manager.scenarios[match_id] = []
-                scenario_manager.scenarios[match_id].append(scenario)
+                scenario_manager.add_scenario(scenario)
 
             st.write(f"Generated {len(scenarios_for_match)} scenarios for match {match_id}")
 
-    scenarios_df = pd.DataFrame([s.to_dict() for match_scenarios in scenario_manager.scenarios.values() for s in match_scenarios])
+    # Replace the placeholder attendance/profit/suitability figures with model predictions, one batch per model
+    # Models are loaded on first use here and shared by every session
+    attendance_model = load_model('attendance')
+    profit_model = load_model('profit')
+    suitability_model = load_model('suitability')
+    if any(model is not None for model in (attendance_model, profit_model, suitability_model)):
+        match_weeks = {match_id: week for week, ids in st.session_state.week_match_ids.items() for match_id in ids.values()}
+        try:
+            predicted = predict_scenarios_batch(
+                scenario_manager, teams_data_normalized, weather_data, match_weeks,
+                attendance_model=attendance_model,
+                profit_model=profit_model,
+                suitability_model=suitability_model
+            )
+            scenario_manager.prediction_context = {
+                'teams_data': teams_data_normalized, 'weather_data': weather_data, 'match_weeks': match_weeks
+            }
+            st.write(f"Model predictions written for {predicted} scenarios")
+        except Exception as e:
+            st.warning(f"Model prediction failed, keeping default estimates: {e}")
+
+    scenarios_df = scenario_manager.to_dataframe()
     if not scenarios_df.empty:
         scenarios_df = scenarios_df.sort_values(by=['date', 'time'])
     return scenarios_df
@@ -3203,6 +6015,46 @@ def get_week_number(match_date, start_date):
 import html
 
 
+def display_pareto_frontier():
+    """Calendar tab: trade-off between revenue, attendance, travel and rest for a week's schedule"""
+    st.header("⚖️ Schedule Trade-offs (Pareto Frontier)")
+    week_match_ids = st.session_state.get('week_match_ids', {})
+    if not week_match_ids or not st.session_state.scenario_manager.match_rows:
+        st.info("Generate scenarios to compare full-week schedules.")
+        return
+    weeks = sorted(week for week, ids in week_match_ids.items() if ids)
+    week = st.selectbox("Week", weeks, key='pareto_week')
+    if st.button("Compute Pareto Frontier", key='compute_pareto', disabled=external_fixtures_error() is not None):
+        with st.spinner("Exploring schedules..."):
+            st.session_state.pareto_frontier = (week, compute_week_pareto_frontier(week))
+    stored = st.session_state.get('pareto_frontier')
+    if not stored or stored[0] != week:
+        return
+    frontier = stored[1]
+    if frontier.empty:
+        st.warning("No feasible schedule for this week.")
+        return
+
+    labels = {name: label for name, (label, _) in PARETO_OBJECTIVES.items()}
+    fig = px.scatter(frontier, x='profit', y='rest_imbalance', color='travel_burden', size='attendance',
+                     text='label', hover_data={'scheduled': True, 'label': False}, labels=labels,
+                     title=f"Week {week}: {len(frontier)} non-dominated schedules")
+    fig.update_traces(textposition='top center')
+    fig.update_yaxes(autorange='reversed')  # Better rest at the top
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = frontier[['label'] + list(PARETO_OBJECTIVES) + ['scheduled']].rename(columns=labels)
+    st.dataframe(table.round(2), use_container_width=True)
+    choice = st.selectbox("Schedule to apply", frontier.index,
+                          format_func=lambda i: f"#{i + 1} {frontier.loc[i, 'label']}".strip(), key='pareto_choice')
+    if st.button("Apply Selected Schedule", key='apply_pareto'):
+        # One journal entry; matches the plan leaves out (None) are deselected
+        changed = st.session_state.scenario_manager.select_many(frontier.loc[choice, 'assignments'])
+        sync_session_with_selection(changed)
+        st.session_state.pop('pareto_frontier', None)
+        st.rerun()
+
+
 def show_afc_replica_calendar_tab():
     event_color_map = {
         "Match": "#0d6efd", "ACL Elite": "#0d6efd", "ACL Two": "#0dcaf0",
@@ -3353,7 +6205,7 @@ def show_afc_replica_calendar_tab():
                     week_number = week
                     break
             
-            match_date = datetime.datetime.strptime(selected_scenario.date, '%Y-%m-%d')
+            match_date = datetime.datetime.combine(selected_scenario.match_date, datetime.time())
             all_events.append({
                 'match_id': match_id,
                 'home_team': selected_scenario.home_team,
@@ -3651,6 +6503,13 @@ def export_week_schedule(week_number, scenario_manager, week_match_ids):
     
     # Get match IDs for the specified week
     week_matches = week_match_ids.get(week_number, {})
+
+    # Precompute prayer times and slots for every selected match of the week in one pass
+    get_slot_table().precompute({
+        (scenario.city, scenario.date)
+        for match_id, scenario_id in selected_scenarios.items() if match_id in week_matches.values()
+        for scenario in scenario_manager.get_scenarios_for_match(match_id) if scenario.scenario_id == scenario_id
+    })
     
     # Collect match data for this week
     matches_data = []
@@ -3659,13 +6518,12 @@ def export_week_schedule(week_number, scenario_manager, week_match_ids):
             scenarios = scenario_manager.get_scenarios_for_match(match_id)
             for scenario in scenarios:
                 if scenario.scenario_id == scenario_id:
-                    # Get prayer times for this match's city and date
-                    match_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
-                    prayer_times = get_prayer_times_unified(scenario.city, match_date, prayer='all')
+                    # Get prayer times for this match's city and date from the slot table
+                    day_slots = get_slot_table().get(scenario.city, scenario.date)
                     
                     # Extract Maghrib and Isha times
-                    maghrib_time = prayer_times.get('timings', {}).get('maghrib', 'N/A')
-                    isha_time = prayer_times.get('timings', {}).get('isha', 'N/A')
+                    maghrib_time = day_slots.get('maghrib_time') or 'N/A'
+                    isha_time = day_slots.get('isha_time') or 'N/A'
                     
                     matches_data.append({
                         'Week': week_number,
@@ -3674,7 +6532,7 @@ def export_week_schedule(week_number, scenario_manager, week_match_ids):
                         'Maghrib Prayer': maghrib_time,
                         'Isha Prayer': isha_time,
                         'Date': scenario.date,
-                        'Day': datetime.datetime.strptime(scenario.date, '%Y-%m-%d').strftime('%A'),
+                        'Day': scenario.match_date.strftime('%A'),
                         'Time': scenario.time,
                         'Stadium': scenario.stadium,
                         'City': scenario.city,
@@ -3699,6 +6557,13 @@ def export_all_scheduled_weeks(scenario_manager, week_match_ids):
     if not selected_scenarios:
         return None
     
+    # Precompute prayer times and slots for every selected match in one pass
+    get_slot_table().precompute({
+        (scenario.city, scenario.date)
+        for match_id, scenario_id in selected_scenarios.items()
+        for scenario in scenario_manager.get_scenarios_for_match(match_id) if scenario.scenario_id == scenario_id
+    })
+
     # Collect match data for all weeks
     matches_data = []
     
@@ -3714,13 +6579,12 @@ def export_all_scheduled_weeks(scenario_manager, week_match_ids):
             scenarios = scenario_manager.get_scenarios_for_match(match_id)
             for scenario in scenarios:
                 if scenario.scenario_id == scenario_id:
-                    # Get prayer times for this match's city and date
-                    match_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
-                    prayer_times = get_prayer_times_unified(scenario.city, match_date, prayer='all')
+                    # Get prayer times for this match's city and date from the slot table
+                    day_slots = get_slot_table().get(scenario.city, scenario.date)
                     
                     # Extract Maghrib and Isha times
-                    maghrib_time = prayer_times.get('timings', {}).get('maghrib', 'N/A')
-                    isha_time = prayer_times.get('timings', {}).get('isha', 'N/A')
+                    maghrib_time = day_slots.get('maghrib_time') or 'N/A'
+                    isha_time = day_slots.get('isha_time') or 'N/A'
                     
                     matches_data.append({
                         'Week': week_number,
@@ -3729,7 +6593,7 @@ def export_all_scheduled_weeks(scenario_manager, week_match_ids):
                         'Maghrib Prayer': maghrib_time,
                         'Isha Prayer': isha_time,
                         'Date': scenario.date,
-                        'Day': datetime.datetime.strptime(scenario.date, '%Y-%m-%d').strftime('%A'),
+                        'Day': scenario.match_date.strftime('%A'),
                         'Time': scenario.time,
                         'Stadium': scenario.stadium,
                         'City': scenario.city,
@@ -3754,7 +6618,7 @@ def main():
     st.markdown('<h3 style="text-align: center; color: #666;">Scenario-Based Match Selection System</h3>', unsafe_allow_html=True)
     
     # Load data
-    teams_data, weather_data, attendance_model, profit_model, models_loaded = load_data()
+    teams_data, weather_data = load_data()
     teams_data['team_lower'] = teams_data['team'].str.lower()  # Normalize for lookups
 
     # Load and debug matches
@@ -3767,36 +6631,7 @@ def main():
         return
 
     # Define week start dates for weeks 7 to 34
-    week_start_dates = {
-        7: datetime.date(2025, 10, 30),  # Thursday
-        8: datetime.date(2025, 11, 6),   # Thursday
-        9: datetime.date(2025, 11, 21),  # Friday
-        10: datetime.date(2025, 12, 19), # Friday
-        11: datetime.date(2025, 12, 25), # Thursday
-        12: datetime.date(2025, 12, 29), # Monday
-        13: datetime.date(2026, 1, 2),   # Friday
-        14: datetime.date(2026, 1, 8),   # Thursday
-        15: datetime.date(2026, 1, 12),  # Monday
-        16: datetime.date(2026, 1, 16),  # Friday
-        17: datetime.date(2026, 1, 20),  # Tuesday
-        18: datetime.date(2026, 1, 24),  # Saturday
-        19: datetime.date(2026, 1, 28),  # Wednesday
-        20: datetime.date(2026, 2, 1),   # Sunday
-        21: datetime.date(2026, 2, 5),   # Thursday
-        22: datetime.date(2026, 2, 12),  # Thursday
-        23: datetime.date(2026, 2, 19),  # Thursday
-        24: datetime.date(2026, 2, 26),  # Thursday
-        25: datetime.date(2026, 3, 5),   # Thursday
-        26: datetime.date(2026, 3, 12),  # Thursday
-        27: datetime.date(2026, 4, 3),   # Friday
-        28: datetime.date(2026, 4, 9),   # Thursday
-        29: datetime.date(2026, 4, 23),  # Thursday
-        30: datetime.date(2026, 4, 28),  # Tuesday
-        31: datetime.date(2026, 5, 2),   # Saturday
-        32: datetime.date(2026, 5, 7),   # Thursday
-        33: datetime.date(2026, 5, 13),  # Wednesday
-        34: datetime.date(2026, 5, 21),  # Thursday
-    }
+    week_start_dates = LEAGUE_WEEK_START_DATES
 
 # Initialize session state
     if 'scenario_manager' not in st.session_state:
@@ -3851,6 +6686,18 @@ def main():
     start_date_dt = datetime.datetime.combine(start_date, datetime.datetime.min.time())
     end_date_dt = datetime.datetime.combine(end_date, datetime.datetime.min.time())
 
+    # Undo/redo of match selections (restores hidden scenarios without regenerating)
+    scenario_manager = st.session_state.scenario_manager
+    undo_col, redo_col = st.sidebar.columns(2)
+    if undo_col.button("↩️ Undo", disabled=not scenario_manager.can_undo(), use_container_width=True):
+        entry = scenario_manager.undo()
+        sync_session_with_selection(ScenarioManager.entry_match_ids(entry))
+        st.rerun()
+    if redo_col.button("↪️ Redo", disabled=not scenario_manager.can_redo(), use_container_width=True):
+        entry = scenario_manager.redo()
+        sync_session_with_selection(ScenarioManager.entry_match_ids(entry))
+        st.rerun()
+
     if st.sidebar.button("Reset Schedule"):
         st.session_state.scenario_manager = ScenarioManager()
         st.session_state.week_match_ids = {w: {} for w in range(7, 35)}
@@ -3862,13 +6709,72 @@ def main():
 
 
 
+    if st.session_state.scenario_manager.match_rows:
+        # Without external fixtures every team looks available, so no automatic scheduling
+        fixtures_error = external_fixtures_error()
+        if fixtures_error:
+            st.sidebar.error(f"Automatic scheduling is disabled: external fixtures could not be loaded ({fixtures_error}).")
+        if st.sidebar.button("🗓️ Auto-schedule Whole Season", disabled=fixtures_error is not None,
+                             help="Select the best feasible scenario for every open match of weeks 7-34, keeping existing selections."):
+            plan = auto_schedule_season()
+            st.session_state.season_schedule_message = (
+                f"Season plan: {plan['scheduled']} match(es) scheduled, {len(plan['unscheduled'])} without a feasible scenario "
+                f"({plan['repaired']} rescued by repair) in {plan['elapsed']:.2f} s"
+            )
+            st.rerun()
+        if st.session_state.get('season_schedule_message'):
+            st.sidebar.success(st.session_state.pop('season_schedule_message'))
+
+        if st.session_state.scenario_manager.selected_scenarios:
+            improve_seconds = st.sidebar.number_input("Local search time (s)", min_value=1, max_value=60,
+                                                      value=int(LOCAL_SEARCH_TIME_LIMIT_SECONDS))
+            if st.sidebar.button("✨ Improve Selected Schedule", disabled=fixtures_error is not None,
+                                 help="Simulated annealing over the selected matches: revenue and rest balance."):
+                match_weeks = {match_id: week for week, ids in st.session_state.week_match_ids.items() for match_id in ids.values()}
+                improver = ScheduleImprover(st.session_state.scenario_manager, match_weeks)
+                result = improver.run(time_limit=improve_seconds)
+                changed = apply_schedule_improvement(st.session_state.scenario_manager, result)
+                st.session_state.season_schedule_message = (
+                    f"Objective {result['initial_objective']:.2f} → {result['best_objective']:.2f}, "
+                    f"{len(changed)} match(es) changed, {result['moves_per_second']:,.0f} moves/s"
+                )
+                st.rerun()
+
+            with st.sidebar.expander("🚧 Disruptions"):
+                plan = None
+                stadiums = sorted({s for city_stadiums in CITY_STADIUMS.values() for s in city_stadiums}
+                                  | {info['primary'] for info in TEAM_STADIUMS.values()})
+                closed_stadium = st.selectbox("Stadium", stadiums, key='disruption_stadium')
+                closure_dates = st.date_input("Closed from / to", value=(start_date_dt.date(), start_date_dt.date()),
+                                              key='disruption_closure_dates')
+                if st.button("Close Stadium & Repair", disabled=fixtures_error is not None) and len(closure_dates) == 2:
+                    plan = reoptimize_after_stadium_closure(closed_stadium, closure_dates[0], closure_dates[1])
+
+                registry = get_external_fixtures_registry()
+                fixture_team = st.selectbox("Team", sorted(registry.teams()), key='disruption_team')
+                old_fixture = st.selectbox("External fixture", registry.fixtures_for(fixture_team), key='disruption_fixture')
+                new_fixture = st.date_input("Moves to", value=old_fixture or start_date_dt.date(), key='disruption_new_date')
+                if st.button("Move Fixture & Repair", disabled=fixtures_error is not None) and old_fixture is not None:
+                    plan = reoptimize_after_fixture_move(fixture_team, old_fixture, new_fixture)
+
+                if plan is not None:
+                    st.session_state.season_schedule_message = (
+                        f"Repaired in {plan['elapsed'] * 1000:.0f} ms: {len(plan['changed'])} match(es) changed"
+                        + (f", {len(plan['unscheduled'])} could not be placed and were deselected" if plan['unscheduled'] else "")
+                    )
+                    st.rerun()
+
+                # Disruptions only apply to this session until reverted
+                if active_disruptions():
+                    st.caption("Active in this session: " + "; ".join(active_disruptions()))
+                    if st.button("Revert Disruptions", help="Back to the shared calendars. Use Undo to revert the repairs."):
+                        clear_disruptions()
+                        st.rerun()
+
     if st.sidebar.button("Generate Scenarios"):
         st.session_state.schedule_df = generate_full_schedule_with_isha(
             teams_data=teams_data,
             weather_data=weather_data,
-            attendance_model=attendance_model,
-            profit_model=profit_model,
-            models_loaded=models_loaded,
             start_date=start_date_dt,
             end_date=end_date_dt,
             matches_from_excel=matches_from_excel,
@@ -3879,10 +6785,17 @@ def main():
         st.rerun()
         
     # Download All Scenarios Button
-    if not st.session_state.schedule_df.empty and st.session_state.scenario_manager.scenarios:
+    if not st.session_state.schedule_df.empty and st.session_state.scenario_manager.match_rows:
         if st.sidebar.button("📥 Download All Scenarios", use_container_width=True):
             # Prepare comprehensive scenarios data
             all_scenarios_data = []
+
+            # Precompute prayer times and slots for every scenario city-day in one pass
+            get_slot_table().precompute({
+                (scenario.city, scenario.date)
+                for scenarios in st.session_state.scenario_manager.scenarios.values()
+                for scenario in scenarios
+            })
             
             for match_id, scenarios in st.session_state.scenario_manager.scenarios.items():
                 # Find week number for this match
@@ -3905,11 +6818,10 @@ def main():
                     is_selected = match_id in st.session_state.scenario_manager.selected_scenarios and \
                                  st.session_state.scenario_manager.selected_scenarios[match_id] == scenario.scenario_id
                     
-                    # Get prayer times for context
-                    match_date = datetime.datetime.strptime(scenario.date, '%Y-%m-%d').date()
-                    prayer_times = get_prayer_times_unified(scenario.city, match_date, prayer='all')
-                    maghrib_time = prayer_times.get('timings', {}).get('maghrib', 'N/A')
-                    isha_time = prayer_times.get('timings', {}).get('isha', 'N/A')
+                    # Get prayer times for context from the slot table
+                    day_slots = get_slot_table().get(scenario.city, scenario.date)
+                    maghrib_time = day_slots.get('maghrib_time') or 'N/A'
+                    isha_time = day_slots.get('isha_time') or 'N/A'
                     
                     all_scenarios_data.append({
                         'Week': week_number if week_number else 'Unknown',
@@ -3918,7 +6830,7 @@ def main():
                         'Home_Team': scenario.home_team,
                         'Away_Team': scenario.away_team,
                         'Date': scenario.date,
-                        'Day': datetime.datetime.strptime(scenario.date, '%Y-%m-%d').strftime('%A'),
+                        'Day': scenario.match_date.strftime('%A'),
                         'Time': scenario.time,
                         'City': scenario.city,
                         'Stadium': scenario.stadium,
@@ -4009,7 +6921,43 @@ def main():
             else:
                 st.sidebar.warning("No scenario data to export.")
     else:
-        st.sidebar.info("💡 Generate scenarios first to enable download")    
+        st.sidebar.info("💡 Generate scenarios first to enable download")
+
+    # Prayer times cache status
+    prayer_cache_stats = get_prayer_times_cache().stats()
+    st.sidebar.caption(
+        f"🕌 Prayer times cache: {prayer_cache_stats['entries']} city-days | "
+        f"{prayer_cache_stats['hits']} hits / {prayer_cache_stats['misses']} misses"
+    )
+    slot_table_stats = get_slot_table().stats()
+    st.sidebar.caption(
+        f"⏱️ Slot table (rules v{slot_table_stats['rules_version']}): {slot_table_stats['entries']} city-days | "
+        f"{slot_table_stats['hits']} hits / {slot_table_stats['misses']} misses"
+    )
+    prediction_cache_stats = get_prediction_cache().stats()
+    st.sidebar.caption(
+        f"🤖 Prediction cache: {prediction_cache_stats['entries']} predictions | "
+        f"{prediction_cache_stats['hits']} hits / {prediction_cache_stats['misses']} misses"
+    )
+    if st.sidebar.button("Clear Prayer Times Cache"):
+        get_prayer_times_cache().clear()
+        get_slot_table().clear()
+        st.rerun()
+    if st.sidebar.button("Clear Prediction Cache"):
+        get_prediction_cache().clear()
+        st.rerun()
+
+    # Slot calculation trace (replaces the old inline DEBUG output)
+    st.sidebar.checkbox("Show slot calculation trace", key='show_slot_trace')
+    if st.session_state.get('show_slot_trace', False):
+        slot_traces = st.session_state.get('slot_traces', [])
+        with st.sidebar.expander(f"Slot calculation trace ({len(slot_traces)})"):
+            for trace in reversed(slot_traces[-20:]):
+                st.markdown(f"**{trace.city} - {trace.match_date}**")
+                st.text("\n".join(trace.to_lines()))
+            if st.button("Clear Trace"):
+                st.session_state.slot_traces = []
+                st.rerun()
 
 
     # Tabs
@@ -4028,6 +6976,7 @@ def main():
 
     with tab2:
         show_afc_replica_calendar_tab()
+        display_pareto_frontier()
 
     with tab6:
         st.markdown('<h2 class="sub-header">Matchday Simulation</h2>', unsafe_allow_html=True)
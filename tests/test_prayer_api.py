@@ -0,0 +1,125 @@
+import calendar
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+TIMINGS = {'Fajr': '04:30 (+03)', 'Sunrise': '05:50 (+03)', 'Dhuhr': '11:45 (+03)',
+           'Asr': '15:05 (+03)', 'Maghrib': '17:30 (+03)', 'Isha': '19:00 (+03)'}
+
+
+class StubAladhan:
+    """Local stand-in for the Aladhan API: records request times and fails on demand."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.failures = []  # Status codes returned, in order, before requests succeed
+        self.arrivals = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def respond(self, path):
+        with self.lock:
+            self.arrivals.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self.failures.pop(0) if self.failures else None
+        try:
+            time.sleep(self.delay)
+            if failure is not None:
+                return failure, {'code': failure, 'status': 'Unavailable'}
+            endpoint, *args = urlparse(path).path.strip('/').split('/')[1:]  # Drop the /v1 prefix
+            if endpoint == 'calendarByCity':
+                year, month = int(args[0]), int(args[1])
+                days = [{'timings': TIMINGS, 'date': {'gregorian': {'date': f'{day:02d}-{month:02d}-{year}'}}}
+                        for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+                return 200, {'code': 200, 'status': 'OK', 'data': days}
+            return 200, {'code': 200, 'status': 'OK', 'data': {'timings': TIMINGS}}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def stub():
+    state = StubAladhan(delay=0.05)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = state.respond(self.path)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.base_url = f'http://127.0.0.1:{server.server_port}/v1'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(app, stub, **overrides):
+    options = dict(base_url=stub.base_url, max_workers=4, max_retries=3, backoff_seconds=0.01,
+                   min_interval_seconds=0.0, timeout=5)
+    options.update(overrides)
+    return app.PrayerTimesFetcher(**options)
+
+
+def test_fetch_months_runs_concurrently(app, stub):
+    fetcher = make_fetcher(app, stub)
+    keys = [(city, 2025, month) for city in ('Riyadh', 'Jeddah', 'Dammam') for month in (9, 10)]
+
+    results = fetcher.fetch_months(keys)
+
+    assert set(results) == set(keys)
+    for (city, year, month), month_times in results.items():
+        assert len(month_times) == calendar.monthrange(year, month)[1]
+        assert month_times[datetime.date(year, month, 1)]['minutes']['maghrib_minutes'] == 17 * 60 + 30
+    assert fetcher.request_count == len(keys)
+    assert stub.max_in_flight > 1
+
+
+@pytest.mark.parametrize('failures', [[503], [429, 500]])
+def test_retries_after_server_errors(app, stub, failures):
+    stub.failures = list(failures)
+    fetcher = make_fetcher(app, stub)
+
+    prayer_times = fetcher.fetch_day('Riyadh', datetime.date(2025, 10, 1))
+
+    assert prayer_times['timings']['isha'] == '19:00'
+    assert fetcher.request_count == len(failures) + 1
+
+
+def test_gives_up_after_max_retries(app, stub):
+    stub.failures = [503] * 3
+    fetcher = make_fetcher(app, stub, max_retries=2)
+
+    with pytest.raises(Exception, match='after 3 attempts'):
+        fetcher.fetch_day('Riyadh', datetime.date(2025, 10, 1))
+    assert fetcher.request_count == 3
+
+
+def test_rate_limit_spaces_requests_to_one_host(app, stub):
+    interval = 0.05
+    fetcher = make_fetcher(app, stub, min_interval_seconds=interval)
+    days = [('Riyadh', datetime.date(2025, 10, day)) for day in range(1, 9)]
+
+    results = fetcher.fetch_days(days)
+
+    assert not [result for result in results.values() if isinstance(result, Exception)]
+    gaps = [later - earlier for earlier, later in zip(stub.arrivals, stub.arrivals[1:])]
+    assert len(gaps) == len(days) - 1
+    assert min(gaps) >= interval * 0.8
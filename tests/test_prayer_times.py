@@ -0,0 +1,25 @@
+import datetime
+
+
+def isha_after_maghrib(app, city, date):
+    minutes = app.calculate_prayer_times_offline(city, date)['minutes']
+    return minutes['isha_minutes'] - minutes['maghrib_minutes']
+
+
+def test_ramadan_dates(app):
+    assert app.is_ramadan(datetime.date(2026, 2, 18))
+    assert app.is_ramadan(datetime.date(2026, 3, 19))
+    assert not app.is_ramadan(datetime.date(2026, 2, 17))
+    assert not app.is_ramadan(datetime.date(2026, 3, 20))
+    assert not app.is_ramadan(datetime.date(2025, 3, 30))
+    assert app.gregorian_to_hijri(datetime.date(2026, 2, 18)) == (1447, 9, 1)
+
+
+def test_isha_is_two_hours_after_maghrib_in_ramadan(app):
+    assert isha_after_maghrib(app, 'Riyadh', datetime.date(2026, 3, 5)) == 120
+    assert isha_after_maghrib(app, 'Jeddah', datetime.date(2026, 2, 19)) == 120
+
+
+def test_isha_is_ninety_minutes_after_maghrib_outside_ramadan(app):
+    assert isha_after_maghrib(app, 'Riyadh', datetime.date(2026, 4, 15)) == 90
+    assert isha_after_maghrib(app, 'Dammam', datetime.date(2025, 10, 2)) == 90
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def make_cache(app, tmp_path, max_entries):
+    return app.PredictionCache(path=str(tmp_path / 'predictions.sqlite'), model_signature='test', max_entries=max_entries)
+
+
+def disk_keys(cache):
+    return sorted(key for (key,) in cache._conn.execute("SELECT key FROM predictions"))
+
+
+def test_put_many_only_evicts_over_capacity(app, tmp_path):
+    cache = make_cache(app, tmp_path, max_entries=10)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    cache.put_many('attendance', np.arange(6), np.arange(6, dtype=float))
+    assert not [sql for sql in statements if sql.startswith('DELETE')]
+
+    cache.put_many('attendance', np.arange(6, 12), np.arange(6, 12, dtype=float))
+    assert [sql for sql in statements if sql.startswith('DELETE')]
+    assert len(disk_keys(cache)) == 10
+
+
+def test_eviction_keeps_recently_read_entries(app, tmp_path):
+    cache = make_cache(app, tmp_path, max_entries=4)
+    cache.put_many('attendance', np.arange(4), np.arange(4, dtype=float))
+    cache._conn.execute("UPDATE predictions SET last_used = last_used - 10")  # Inserted a while ago
+    values, missing = cache.get_many('attendance', np.array([0, 1]))
+
+    cache.put_many('attendance', np.array([4, 5]), np.array([4.0, 5.0]))
+
+    assert not missing.any() and values.tolist() == [0.0, 1.0]
+    assert disk_keys(cache) == [0, 1, 4, 5]
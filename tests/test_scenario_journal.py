@@ -0,0 +1,77 @@
+import pytest
+
+# (scenario_id, match_id, home, away, date, city, stadium)
+SCENARIOS = [
+    (11, 1, 'Al-Hilal', 'Al-Nassr', '2025-10-01', 'Riyadh', 'Kingdom Arena'),
+    (12, 1, 'Al-Hilal', 'Al-Nassr', '2025-10-02', 'Riyadh', 'Kingdom Arena'),
+    (21, 2, 'Al-Hilal', 'Al-Ittihad', '2025-10-01', 'Riyadh', 'Prince Faisal bin Fahd Stadium'),
+    (22, 2, 'Al-Hilal', 'Al-Ittihad', '2025-10-04', 'Riyadh', 'Prince Faisal bin Fahd Stadium'),
+    (31, 3, 'Al-Shabab', 'Al-Ahli', '2025-10-01', 'Riyadh', 'Kingdom Arena'),
+    (32, 3, 'Al-Shabab', 'Al-Ahli', '2025-10-02', 'Riyadh', 'Al-Shabab Club Stadium'),
+]
+
+
+@pytest.fixture
+def manager(app):
+    manager = app.ScenarioManager()
+    for scenario_id, match_id, home, away, date, city, stadium in SCENARIOS:
+        manager.add_scenario(app.MatchScenario(scenario_id, match_id, home, away, date, '21:00', city, stadium,
+                                               50.0, 60.0, 100000.0))
+    return manager
+
+
+def snapshot(manager):
+    return {
+        'selected': dict(manager.selected_scenarios),
+        'mask_count': manager.store.columns['mask_count'].tolist(),
+        'is_selected': manager.store.columns['is_selected'].tolist(),
+        'bookings': {key: sorted(b['match_id'] for b in bookings) for key, bookings in manager.stadium_bookings.items()},
+        'venues': {scenario_id: (manager.get_scenario(scenario_id).stadium, manager.get_scenario(scenario_id).city)
+                   for scenario_id, *_ in SCENARIOS},
+        'rest': {team: list(timeline) for team, timeline in manager.rest_tracker.timelines.items() if timeline},
+    }
+
+
+def test_undo_and_redo_walk_the_journal(manager):
+    steps = [
+        lambda: manager.select_scenario(1, 11),
+        lambda: manager.select_scenario(3, 31),
+        lambda: manager.select_scenario(1, 12),  # Re-selection releases 21
+        lambda: manager.deselect_scenario(3),
+        lambda: manager.select_many({2: 21, 3: 32}, venues={2: ('Al-Awwal Park', 'Riyadh')}),
+        lambda: manager.select_many({1: None}, venues={3: ('Kingdom Arena', 'Riyadh')}),
+    ]
+    snapshots = [snapshot(manager)]
+    for step in steps:
+        step()
+        snapshots.append(snapshot(manager))
+
+    assert snapshots[1]['mask_count'][2] == 1  # Scenario 11 hides 21 (same team, same day)
+    assert snapshots[3]['mask_count'][2] == 0
+    assert snapshots[5]['venues'][21] == ('Al-Awwal Park', 'Riyadh')
+    assert ('Al-Awwal Park', '2025-10-01') in snapshots[5]['bookings']
+    assert manager.journal_position == len(steps)
+
+    for expected in reversed(snapshots[:-1]):
+        assert manager.undo() is not None
+        assert snapshot(manager) == expected
+    assert not manager.can_undo() and manager.undo() is None
+
+    for expected in snapshots[1:]:
+        assert manager.redo() is not None
+        assert snapshot(manager) == expected
+    assert not manager.can_redo() and manager.redo() is None
+
+
+def test_new_action_discards_redo(manager):
+    manager.select_scenario(1, 11)
+    manager.select_many({2: 22}, venues={2: ('Al-Awwal Park', 'Riyadh')})
+    manager.undo()
+    manager.select_scenario(3, 32)
+
+    assert not manager.can_redo()
+    assert manager.get_scenario(22).stadium == 'Prince Faisal bin Fahd Stadium'
+    manager.undo()
+    manager.undo()
+    assert manager.selected_scenarios == {}
+    assert manager.stadium_bookings == {}
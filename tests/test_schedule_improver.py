@@ -0,0 +1,122 @@
+import datetime
+import random
+
+import pytest
+
+FIRST_MONDAY = datetime.date(2026, 1, 5)  # No external fixtures or stadium closures for these teams
+WEEKS = [
+    [('Al-Ittihad', 'Al-Hilal'), ('Al-Ahli', 'Al-Nassr'), ('Al-Shabab', 'Al-riyadh')],
+    [('Al-Hilal', 'Al-Ahli'), ('Al-Nassr', 'Al-Ittihad'), ('Al-riyadh', 'Al-Shabab')],
+    [('Al-Ahli', 'Al-Shabab'), ('Al-Ittihad', 'Al-riyadh'), ('Al-Hilal', 'Al-Nassr')],
+]
+KICKOFFS = ['17:00', '21:00']
+
+
+@pytest.fixture
+def schedule(app):
+    """Three weeks of three matches, four days and two kick-offs each, the first day of each match selected"""
+    rng = random.Random(7)
+    manager = app.ScenarioManager()
+    match_weeks = {}
+    scenario_id = 0
+    for week, pairs in enumerate(WEEKS, start=1):
+        for index, (home, away) in enumerate(pairs):
+            match_id = week * 10 + index
+            match_weeks[match_id] = week
+            venue = app.TEAM_STADIUMS[home]
+            for day in range(4):
+                for kickoff in KICKOFFS:
+                    scenario_id += 1
+                    date = FIRST_MONDAY + datetime.timedelta(days=7 * (week - 1) + day)
+                    manager.add_scenario(app.MatchScenario(
+                        scenario_id, match_id, home, away, date, kickoff, venue['city'], venue['primary'],
+                        rng.uniform(0, 100), rng.uniform(20, 100), rng.uniform(1e5, 1e6)))
+            first = manager.match_rows[match_id][2 * index + 1]  # Day `index`, 21:00
+            manager.select_scenario(match_id, int(manager.store.columns['scenario_id'][first]))
+    return manager, match_weeks
+
+
+def full_objective(app, improver):
+    """Objective of the improver's current state recomputed from scratch"""
+    objective = 0.0
+    timelines = {}
+    for match_id, (row, stadium) in improver.current.items():
+        ordinal, _, home, away, _, score = improver.row_info[row]
+        objective += score
+        if stadium != improver.primary_stadium[match_id]:
+            objective -= improver.venue_penalty
+        for team in (home, away):
+            timelines.setdefault(team, []).append(ordinal)
+    for days in timelines.values():
+        days.sort()
+        objective -= sum(improver._rest_penalty(later - earlier) for earlier, later in zip(days, days[1:]))
+    return objective, timelines
+
+
+def assert_consistent(app, improver):
+    objective, timelines = full_objective(app, improver)
+    assert improver.objective == pytest.approx(objective, abs=1e-9)
+    assert {team: days for team, days in improver.timelines.items() if days} == timelines
+
+    day_load, stadium_days = {}, {}
+    for row, stadium in improver.current.values():
+        ordinal = improver.row_info[row][0]
+        day_load[ordinal] = day_load.get(ordinal, 0) + 1
+        stadium_days[(stadium, ordinal)] = stadium_days.get((stadium, ordinal), 0) + 1
+        assert improver._is_open(stadium, ordinal)
+    assert {day: n for day, n in improver.day_load.items() if n} == day_load
+    assert {key: n for key, n in improver.stadium_days.items() if n} == stadium_days
+    assert max(day_load.values()) <= app.MAX_MATCHES_PER_DAY
+    assert max(stadium_days.values()) == 1
+    for days in timelines.values():
+        assert all(later - earlier >= app.MIN_REST_DAYS for earlier, later in zip(days, days[1:]))
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_incremental_objective_matches_full_recompute(app, schedule, seed):
+    manager, match_weeks = schedule
+    improver = app.ScheduleImprover(manager, match_weeks, seed=seed)
+    assert_consistent(app, improver)
+    decide = random.Random(seed)
+
+    applied = rejected = 0
+    for _ in range(3000):
+        changes = improver._propose()
+        if changes is None:
+            continue
+        before = dict(improver.current)
+        result = improver._apply(changes)
+        if result is None:
+            rejected += 1
+            assert improver.current == before
+        else:
+            applied += 1
+            delta, previous = result
+            if decide.random() < 0.5:
+                improver.objective += delta
+            else:
+                improver._revert(previous)
+                assert improver.current == before
+        assert_consistent(app, improver)
+    assert applied and rejected
+
+
+def test_partially_placed_swap_is_rolled_back(app, schedule):
+    manager, match_weeks = schedule
+    improver = app.ScheduleImprover(manager, match_weeks, seed=0)
+    # Week 1: match 10 plays Monday, match 11 Tuesday, both at Alinma Stadium (Al-Ittihad and Al-Ahli share it)
+    first_row, first_stadium = improver.current[10]
+    second_row, second_stadium = improver.current[11]
+    assert first_stadium == second_stadium
+    wednesday = improver.row_info[first_row][0] + 2
+    thursday_row = improver._row_on_day(10, wednesday + 1, improver.row_info[first_row][1])
+    clash_row = improver._row_on_day(11, wednesday + 1, improver.row_info[second_row][1])
+    before = dict(improver.current)
+    objective = improver.objective
+
+    # Match 10 moves to Thursday, then match 11 cannot take the same stadium on Thursday
+    assert improver._apply([(10, thursday_row, first_stadium), (11, clash_row, second_stadium)]) is None
+
+    assert improver.current == before
+    assert improver.objective == objective
+    assert_consistent(app, improver)